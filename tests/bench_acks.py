@@ -0,0 +1,67 @@
+"""请求确认吞吐：逐条 send_request 与单连接流水线 send_requests 对比（独立运行，不依赖 pytest-qt）
+
+服务端在本进程（worker 线程解析），客户端在子进程中发送 N 条带 req 的消息并等待全部回复。
+"""
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+import json
+import subprocess
+import sys
+import time
+from PySide6 import QtCore, QtWidgets
+
+N_REQUESTS = 2000
+
+
+def run_client(name, mode, n):
+    """子进程：按 mode 发送 n 条请求，输出 {"ok": 收到回复数, "elapsed": 秒}"""
+    import toast as toast_mod
+    app = QtCore.QCoreApplication([])  # noqa: F841
+    payloads = [{"req": i, "title": f"t{i}"} for i in range(n)]
+    start = time.perf_counter()
+    if mode == "serial":
+        replies = [toast_mod.send_request(p, name=name, timeout=3000) for p in payloads]
+    else:
+        replies = toast_mod.send_requests(payloads, name=name, timeout=30000) or []
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"ok": sum(1 for r in replies if r and r.get("status") == "accepted"),
+                      "elapsed": elapsed}))
+
+
+def measure(mode):
+    import toast as toast_mod
+    name = f"bench_acks_{mode}_{os.getpid()}"
+    srv = toast_mod.LocalServer(name=name, threaded=True,
+                                handler=lambda p: {"status": "accepted", "id": str(p["req"])})
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--client", name, mode,
+                             str(N_REQUESTS)], stdout=subprocess.PIPE, env=env)
+    loop = QtCore.QEventLoop()
+    poll = QtCore.QTimer()
+    poll.timeout.connect(lambda: loop.quit() if proc.poll() is not None else None)
+    poll.start(5)
+    loop.exec()
+    poll.stop()
+    result = json.loads(proc.stdout.read())
+    proc.stdout.close()
+    srv.close()
+    label = "逐条请求（每条新连接）" if mode == "serial" else "单连接流水线"
+    print(f"\n  [{label}]")
+    print(f"  确认: {result['ok']}/{N_REQUESTS}，耗时 {result['elapsed']:.2f}s"
+          f"（{result['ok'] / result['elapsed']:.0f} 条/秒）")
+    return result["elapsed"]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "--client":
+        run_client(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+        sys.exit(0)
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    print("\n" + "=" * 60)
+    print(f"  请求确认吞吐（{N_REQUESTS} 条）")
+    print("=" * 60)
+    serial = measure("serial")
+    pipelined = measure("pipelined")
+    print(f"\n  流水线加速: {serial / pipelined:.1f}x")
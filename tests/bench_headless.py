@@ -0,0 +1,73 @@
+"""无界面模式压测：消息处理速率与完整生命周期推进（独立运行，不依赖 pytest-qt）
+
+无界面管理器处理 10 万条 payload，并按虚拟时间推进全部 toast 的
+active → expired → 历史 → 关闭；对照组为控件模式处理 500 条。
+虚拟时间由 lifecycle.process_due(now) 显式推进，结果与墙钟无关。
+"""
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+import time
+from unittest.mock import MagicMock
+from PySide6 import QtCore, QtWidgets
+
+import toast as toast_mod
+
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+screen = MagicMock()
+screen.availableGeometry.return_value = QtCore.QRect(0, 0, 1920, 1080)
+app.primaryScreen = lambda: screen
+
+HEADLESS_N = 100000
+WIDGET_N = 500
+
+
+def payloads(n):
+    for i in range(n):
+        yield {"title": f"job {i}", "message": "done", "duration": 3000 + (i % 10) * 1000,
+               "show_countdown": i % 2 == 0, "id": f"j{i % (n // 2)}"}  # 一半为同 ID 原地更新
+
+
+def run_headless():
+    m = toast_mod.ToastManager(headless=True)
+    start = time.perf_counter()
+    for p in payloads(HEADLESS_N):
+        m.handle_payload(p)
+    ingest = time.perf_counter() - start
+    live = len(m.toasts)
+
+    # 虚拟时间每步 1 秒推进，直到全部关闭
+    now = time.time()
+    steps = 0
+    start = time.perf_counter()
+    while len(m.toasts) and steps < 100:
+        now += 1
+        steps += 1
+        m.lifecycle.process_due(now)
+    lifecycle = time.perf_counter() - start
+    print(f"\n  [无界面] {HEADLESS_N} 条 payload → {live} 个 toast")
+    print(f"  处理: {ingest:.2f}s（{HEADLESS_N / ingest:.0f} 条/秒）")
+    print(f"  生命周期推进: {steps} 步虚拟秒，耗时 {lifecycle:.2f}s，"
+          f"历史 {m.expired_history.count()} 条，剩余 {len(m.toasts)}")
+    return HEADLESS_N / ingest
+
+
+def run_widgets():
+    m = toast_mod.ToastManager(no_expired_history=True)
+    start = time.perf_counter()
+    for p in payloads(WIDGET_N):
+        m.handle_payload(p)
+    app.processEvents()
+    elapsed = time.perf_counter() - start
+    print(f"\n  [控件模式] {WIDGET_N} 条 payload → {len(m.toasts)} 个 toast")
+    print(f"  处理: {elapsed:.2f}s（{WIDGET_N / elapsed:.0f} 条/秒）")
+    m.container.close()
+    return WIDGET_N / elapsed
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("  无界面模式压测")
+    print("=" * 60)
+    headless_rate = run_headless()
+    widget_rate = run_widgets()
+    print(f"\n  无界面 / 控件模式 处理速率: {headless_rate / widget_rate:.0f}x")
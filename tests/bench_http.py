@@ -0,0 +1,90 @@
+"""回环 HTTP 接入压测：keep-alive 连接上的持续请求吞吐（独立运行，不依赖 pytest-qt）
+
+服务端在本进程（HTTP 解析在 IPC worker 线程，分发在 GUI 线程，handler 为空操作），
+客户端在子进程中以多个 keep-alive 连接并发发送，分别测单条与批量（每请求 50 条）。
+"""
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+import http.client
+import json
+import subprocess
+import sys
+import threading
+import time
+from PySide6 import QtCore, QtWidgets
+
+DURATION_S = 3.0
+CONNECTIONS = 4
+BATCH_SIZE = 50
+
+
+def run_client(port, batch):
+    """子进程：CONNECTIONS 个线程各持一个 keep-alive 连接，持续发送 DURATION_S 秒"""
+    body = [{"title": "load", "message": "m"}] * batch if batch > 1 else {"title": "load", "message": "m"}
+    data = json.dumps(body)
+    counts = [0] * CONNECTIONS
+    latencies = [[] for _ in range(CONNECTIONS)]
+    deadline = time.perf_counter() + DURATION_S
+
+    def worker(i):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            conn.request("POST", "/notify", body=data, headers={"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            resp.read()
+            latencies[i].append((time.perf_counter() - start) * 1000)
+            if resp.status == 200:
+                counts[i] += 1
+        conn.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(CONNECTIONS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    all_lat = sorted(x for lat in latencies for x in lat)
+    print(json.dumps({"requests": sum(counts), "p50": all_lat[len(all_lat) // 2],
+                      "p99": all_lat[min(len(all_lat) - 1, int(len(all_lat) * 0.99))]}))
+
+
+def measure(batch):
+    import toast as toast_mod
+    received = [0]
+
+    def handler(payload):
+        received[0] += 1
+        return None
+
+    srv = toast_mod.LocalServer(name=f"bench_http_{os.getpid()}", threaded=True, handler=handler,
+                                http_port=0)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--client", str(srv.http.port),
+                             str(batch)], stdout=subprocess.PIPE, env=env)
+    loop = QtCore.QEventLoop()
+    poll = QtCore.QTimer()
+    poll.timeout.connect(lambda: loop.quit() if proc.poll() is not None else None)
+    poll.start(5)
+    loop.exec()
+    poll.stop()
+    result = json.loads(proc.stdout.read())
+    proc.stdout.close()
+    srv.close()
+    label = "单条" if batch == 1 else f"批量（{batch} 条/请求）"
+    print(f"\n  [{label}，{CONNECTIONS} 个 keep-alive 连接，{DURATION_S:.0f}s]")
+    print(f"  请求: {result['requests'] / DURATION_S:.0f} 次/秒，通知: {received[0] / DURATION_S:.0f} 条/秒")
+    print(f"  延迟: p50={result['p50']:.2f}ms p99={result['p99']:.2f}ms")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "--client":
+        run_client(int(sys.argv[2]), int(sys.argv[3]))
+        sys.exit(0)
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    print("\n" + "=" * 60)
+    print("  回环 HTTP 接入压测")
+    print("=" * 60)
+    measure(1)
+    measure(BATCH_SIZE)
@@ -0,0 +1,118 @@
+"""IPC 接入压测：1 万条消息涌入时 GUI 线程 tick 抖动（独立运行，不依赖 pytest-qt）
+
+对比 LocalServer 在 GUI 线程解析（threaded=False）与 worker 线程解析（threaded=True）
+两种模式下，16ms 定时器的实际触发间隔分布。客户端在子进程中通过单连接连续写入。
+"""
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+import json
+import subprocess
+import sys
+import time
+from PySide6 import QtCore, QtWidgets, QtNetwork
+
+N_MESSAGES = 10000
+MESSAGE_BYTES = 16384  # 单条消息正文字符数（模拟含中文与转义的日志片段）
+TICK_MS = 16
+
+
+def run_client(name, n, size):
+    """子进程：单连接连续写入 n 条消息"""
+    app = QtCore.QCoreApplication([])  # noqa: F841
+    socket = QtNetwork.QLocalSocket()
+    socket.connectToServer(name)
+    if not socket.waitForConnected(3000):
+        sys.exit(1)
+    def drain():
+        # waitForBytesWritten 写出部分数据即返回，需循环到发送缓冲清空
+        while socket.bytesToWrite() > 0 and socket.waitForBytesWritten(3000):
+            pass
+
+    line = '日志 "quoted" \\path\tcol\n'
+    body = (line * (size // len(line) + 1))[:size]
+    chunk = []
+    for i in range(n):
+        chunk.append(json.dumps({"title": f"t{i}", "message": body, "seq": i}) + "\n")
+        if len(chunk) == 100:
+            socket.write("".join(chunk).encode("utf-8"))
+            drain()
+            chunk = []
+    if chunk:
+        socket.write("".join(chunk).encode("utf-8"))
+    drain()
+    socket.disconnectFromServer()
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def measure(app, threaded):
+    import toast as toast_mod
+    name = f"bench_ingest_{int(threaded)}_{os.getpid()}"
+    received = [0]
+
+    def handler(payload):
+        received[0] += 1
+        return None
+
+    srv = toast_mod.LocalServer(name=name, handler=handler, threaded=threaded)
+
+    intervals = []
+    last = [time.perf_counter()]
+
+    def tick():
+        now = time.perf_counter()
+        intervals.append((now - last[0]) * 1000)
+        last[0] = now
+
+    timer = QtCore.QTimer()
+    timer.setTimerType(QtCore.Qt.TimerType.PreciseTimer)
+    timer.timeout.connect(tick)
+    timer.start(TICK_MS)
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--client", name,
+                             str(N_MESSAGES), str(MESSAGE_BYTES)], env=env)
+    loop = QtCore.QEventLoop()
+    poll = QtCore.QTimer()
+    poll.timeout.connect(lambda: loop.quit() if received[0] >= N_MESSAGES or
+                         time.perf_counter() - start > 60 else None)
+    poll.start(5)
+    last[0] = time.perf_counter()
+    intervals.clear()
+    loop.exec()
+    elapsed = time.perf_counter() - start
+    timer.stop()
+    poll.stop()
+    proc.wait()
+    srv.close()
+
+    mode = "worker 线程解析" if threaded else "GUI 线程解析"
+    print(f"\n  [{mode}]")
+    print(f"  接收消息: {received[0]}/{N_MESSAGES}，耗时 {elapsed:.2f}s（{received[0] / elapsed:.0f} 条/秒）")
+    if intervals:
+        print(f"  tick 间隔（目标 {TICK_MS}ms）: p50={percentile(intervals, 50):.1f}ms "
+              f"p99={percentile(intervals, 99):.1f}ms max={max(intervals):.1f}ms（{len(intervals)} 次）")
+    return max(intervals) if intervals else 0.0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "--client":
+        run_client(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+        sys.exit(0)
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    print("\n" + "=" * 60)
+    print(f"  IPC 接入压测（{N_MESSAGES} 条 × {MESSAGE_BYTES}B）")
+    print("=" * 60)
+    gui_max = measure(app, threaded=False)
+    worker_max = measure(app, threaded=True)
+    print()
+    if worker_max < gui_max:
+        print(f"  ✓ worker 线程解析最大 tick 延迟 {worker_max:.1f}ms < GUI 线程解析 {gui_max:.1f}ms")
+    else:
+        print(f"  ⚠ worker 线程解析未降低最大 tick 延迟（{worker_max:.1f}ms vs {gui_max:.1f}ms）")
@@ -0,0 +1,258 @@
+"""IPC 负载生成器：按生产流量形态驱动 LocalServer（独立运行，不依赖 pytest-qt）
+
+每个客户端连接是一个子进程，按到达过程发送 payload（带 req，异步收取回复）：
+  - steady：固定间隔；poisson：指数分布间隔；cron：每 burst_period 秒整点集中涌入
+    （模拟大量定时任务在 :00 同时触发），一个周期的量在 50ms 内发完
+  - 正文长度分布：fixed:N / uniform:A-B / lognormal:MEDIAN
+  - 倒计时比例、同 ID 碰撞率（从共享的少量 key 中取 id，命中存活 toast 时原地更新）
+默认在本进程内启动服务端（控件或无界面模式），统计：
+  - 实际吞吐（服务端处理条数 / 处理时间窗）与丢弃率（回复 dropped / invalid 的比例）
+  - 端到端延迟：发送 → 服务端分发完成；发送 → toast 可见（控件 Show 事件，仅控件模式新建的 toast）
+指定 --name 时改为压测已在运行的服务端，只统计回复。
+
+    PYTHONPATH=. python tests/bench_load.py --arrival poisson --rate 40 --clients 4 --seconds 20
+    PYTHONPATH=. python tests/bench_load.py --arrival cron --burst-period 5 --rate 100 --headless
+"""
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+import argparse
+import json
+import random
+import subprocess
+import sys
+import time
+from unittest.mock import MagicMock
+from PySide6 import QtCore, QtNetwork, QtWidgets
+
+import toast as toast_mod
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BURST_SPREAD = 0.05  # cron 模式下一个周期的量在该秒数内发完
+
+
+# ========== 客户端（子进程） ==========
+
+def arrivals(kind, rate, seconds, burst_period, rng):
+    """产出相对开始时刻的发送时间（秒）"""
+    if kind == "steady":
+        t = rng.random() / rate  # 各客户端错开相位
+        while t < seconds:
+            yield t
+            t += 1 / rate
+    elif kind == "poisson":
+        t = rng.expovariate(rate)
+        while t < seconds:
+            yield t
+            t += rng.expovariate(rate)
+    else:  # cron
+        per_burst = max(1, round(rate * burst_period))
+        start = 0.0
+        while start < seconds:
+            for offset in sorted(rng.random() * BURST_SPREAD for _ in range(per_burst)):
+                yield start + offset
+            start += burst_period
+
+
+def message_size(spec, rng):
+    kind, _, arg = spec.partition(":")
+    if kind == "fixed":
+        return int(arg)
+    if kind == "uniform":
+        low, high = (int(x) for x in arg.split("-"))
+        return rng.randint(low, high)
+    if kind == "lognormal":
+        return int(rng.lognormvariate(0, 1) * int(arg))
+    raise ValueError(f"unknown size distribution: {spec}")
+
+
+def run_client(spec):
+    """按 spec 发送并收取回复，结果以一行 JSON 写到标准输出"""
+    app = QtCore.QCoreApplication([])  # noqa: F841
+    rng = random.Random(spec["seed"])
+    socket = QtNetwork.QLocalSocket()
+    socket.connectToServer(spec["name"])
+    if not socket.waitForConnected(3000):
+        sys.exit(1)
+    sent_at = {}   # req → 发送时刻
+    statuses = {}
+    reply_latency = []
+    buf = b""
+
+    def collect(wait_ms):
+        nonlocal buf
+        if not socket.bytesAvailable() and not socket.waitForReadyRead(max(0, wait_ms)):
+            return
+        buf += socket.readAll().data()
+        *lines, buf = buf.split(b"\n")
+        now = time.time()
+        for line in lines:
+            reply = json.loads(line)
+            statuses[reply["status"]] = statuses.get(reply["status"], 0) + 1
+            reply_latency.append(now - sent_at.pop(reply["req"]))
+
+    body = "负载 load " * 64
+    start = time.time()
+    seq = 0
+    for at in arrivals(spec["arrival"], spec["rate"], spec["seconds"], spec["burst_period"], rng):
+        while (left := start + at - time.time()) > 0:
+            collect(int(left * 1000))
+        size = message_size(spec["size"], rng)
+        if rng.random() < spec["dedupe_rate"]:
+            toast_id = f"key-{rng.randrange(spec['dedupe_keys'])}"
+        else:
+            toast_id = f"c{spec['client']}-{seq}"
+        payload = {"req": seq, "id": toast_id, "title": f"load {seq}",
+                   "message": (body * (size // len(body) + 1))[:size],
+                   "duration": spec["toast_ms"], "show_countdown": rng.random() < spec["countdown"],
+                   "sent_at": time.time()}
+        sent_at[seq] = payload["sent_at"]
+        socket.write((json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8"))
+        socket.flush()
+        seq += 1
+        collect(0)
+    deadline = time.time() + 10
+    while sent_at and time.time() < deadline:
+        collect(100)
+    socket.disconnectFromServer()
+    print(json.dumps({"sent": seq, "unanswered": len(sent_at), "statuses": statuses,
+                      "reply_latency": reply_latency}))
+
+
+# ========== 服务端与统计 ==========
+
+def percentiles(values):
+    if not values:
+        return "—"
+    values = sorted(values)
+    pick = lambda p: values[min(len(values) - 1, int(len(values) * p))] * 1000  # noqa: E731
+    return f"p50={pick(0.5):.1f}ms p90={pick(0.9):.1f}ms p99={pick(0.99):.1f}ms max={values[-1] * 1000:.1f}ms"
+
+
+class VisibleProbe(QtCore.QObject):
+    """应用级事件过滤：toast 控件第一次 Show 时记录 发送 → 可见 的延迟"""
+
+    def __init__(self, pending):
+        super().__init__()
+        self.pending = pending  # toast id → 发送时刻（新建的 toast 才登记）
+        self.latency = []
+
+    def eventFilter(self, obj, event):
+        if event.type() == QtCore.QEvent.Type.Show and isinstance(obj, toast_mod.Toast):
+            sent = self.pending.pop(obj.toast_id, None)
+            if sent is not None:
+                self.latency.append(time.time() - sent)
+        return False
+
+
+def run(args):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    screen = MagicMock()
+    screen.availableGeometry.return_value = QtCore.QRect(0, 0, 1920, 1080)
+    app.primaryScreen = lambda: screen
+
+    name = args.name
+    srv = probe = None
+    handled = []        # 服务端分发完成时刻
+    dispatch_latency = []
+    pending_visible = {}
+    if name is None:
+        name = f"toast_bench_load_{os.getpid()}"
+        mgr = toast_mod.ToastManager(headless=args.headless, no_expired_history=True,
+                                     max_visible=args.max_visible, rate_limit=args.server_rate_limit)
+
+        def handler(payload, origin):
+            # 先登记：add_toast 内部处理事件，零延迟入场的 toast 在分发返回前就已显示
+            if not args.headless:
+                pending_visible[payload["id"]] = payload["sent_at"]
+            reply = mgr.handle_payload(payload, origin)
+            now = time.time()
+            handled.append(now)
+            dispatch_latency.append(now - payload["sent_at"])
+            if reply["status"] != "accepted":
+                pending_visible.pop(payload["id"], None)
+            return reply
+        srv = toast_mod.LocalServer(name=name, handler=handler, threaded=True, pass_origin=True)
+        if not args.headless:
+            probe = VisibleProbe(pending_visible)
+            app.installEventFilter(probe)
+
+    per_client = args.rate / args.clients
+    procs = []
+    for i in range(args.clients):
+        spec = {"name": name, "client": i, "seed": args.seed + i, "arrival": args.arrival,
+                "rate": per_client, "seconds": args.seconds, "burst_period": args.burst_period,
+                "size": args.size, "countdown": args.countdown, "dedupe_rate": args.dedupe_rate,
+                "dedupe_keys": args.dedupe_keys, "toast_ms": args.toast_ms}
+        procs.append(subprocess.Popen([sys.executable, os.path.abspath(__file__), "--client", json.dumps(spec)],
+                                      env=dict(os.environ, PYTHONPATH=ROOT), stdout=subprocess.PIPE,
+                                      text=True))
+    while any(p.poll() is None for p in procs):
+        app.processEvents(QtCore.QEventLoop.ProcessEventsFlag.AllEvents, 10)
+    end = time.time() + 1.5  # 等待错峰入场中的 toast 显示
+    while time.time() < end:
+        app.processEvents(QtCore.QEventLoop.ProcessEventsFlag.AllEvents, 10)
+
+    sent = unanswered = 0
+    statuses = {}
+    reply_latency = []
+    for p in procs:
+        out = p.stdout.read().strip()
+        if p.returncode or not out:
+            print(f"  客户端退出码 {p.returncode}，结果缺失", file=sys.stderr)
+            continue
+        r = json.loads(out)
+        sent += r["sent"]
+        unanswered += r["unanswered"]
+        reply_latency += r["reply_latency"]
+        for k, v in r["statuses"].items():
+            statuses[k] = statuses.get(k, 0) + v
+
+    print("\n" + "=" * 72)
+    print(f"  IPC 负载：{args.arrival}，目标 {args.rate:g} 条/秒 × {args.seconds:g}s，{args.clients} 个连接，"
+          f"正文 {args.size}")
+    print("=" * 72)
+    dropped = statuses.get("dropped", 0) + statuses.get("invalid", 0) + unanswered
+    print(f"  发送 {sent} 条，回复 {json.dumps(statuses, ensure_ascii=False)}，未回复 {unanswered}")
+    print(f"  丢弃率 {dropped / max(1, sent):.1%}")
+    if len(handled) >= 2:
+        window = handled[-1] - handled[0]
+        print(f"  实际吞吐 {len(handled) / max(window, 1e-9):.1f} 条/秒（服务端处理 {len(handled)} 条，"
+              f"时间窗 {window:.1f}s）")
+    print(f"  发送 → 回复:     {percentiles(reply_latency)}")
+    if srv is not None:
+        print(f"  发送 → 分发完成: {percentiles(dispatch_latency)}")
+    if probe is not None:
+        print(f"  发送 → 可见:     {percentiles(probe.latency)}（{len(probe.latency)} 个新建 toast）")
+        app.removeEventFilter(probe)
+    if srv is not None:
+        srv.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="toast IPC 负载生成器")
+    parser.add_argument("--arrival", choices=("steady", "poisson", "cron"), default="poisson")
+    parser.add_argument("--rate", type=float, default=20, help="全部连接合计的平均条数/秒")
+    parser.add_argument("--seconds", type=float, default=15, help="发送时长")
+    parser.add_argument("--burst-period", type=float, default=60, help="cron 模式的涌入周期（秒）")
+    parser.add_argument("--clients", type=int, default=4, help="并发连接数（每个一个子进程）")
+    parser.add_argument("--size", default="lognormal:200",
+                        help="正文长度分布：fixed:N / uniform:A-B / lognormal:MEDIAN")
+    parser.add_argument("--countdown", type=float, default=0.3, help="倒计时 toast 比例")
+    parser.add_argument("--dedupe-rate", type=float, default=0.1, help="使用共享 key 作为 id 的比例")
+    parser.add_argument("--dedupe-keys", type=int, default=20, help="共享 key 的数量")
+    parser.add_argument("--toast-ms", type=int, default=3000, help="toast 显示时长（毫秒）")
+    parser.add_argument("--headless", action="store_true", help="内置服务端使用无界面模式")
+    parser.add_argument("--max-visible", type=int, default=None, help="内置服务端的显示上限")
+    parser.add_argument("--server-rate-limit", type=float, default=None, help="内置服务端的限流（条/秒）")
+    parser.add_argument("--name", default=None, help="压测已运行的服务端（不启动内置服务端）")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    message_size(args.size, random.Random())  # 提前校验分布参数
+    run(args)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 3 and sys.argv[1] == "--client":
+        run_client(json.loads(sys.argv[2]))
+        sys.exit(0)
+    main()
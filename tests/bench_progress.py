@@ -0,0 +1,81 @@
+"""进度 toast CPU 压测：20 个进度 toast 并发高频更新（独立运行，不依赖 pytest-qt）"""
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+import time
+from unittest.mock import MagicMock
+from PySide6 import QtCore, QtWidgets
+
+import toast as toast_mod
+
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+screen = MagicMock()
+screen.availableGeometry.return_value = QtCore.QRect(0, 0, 1920, 1080)
+app.primaryScreen = lambda: screen
+
+N_TOASTS = 20
+RATE_PER_TOAST = 250   # 每个 toast 每秒更新次数（生产端远快于显示刷新率）
+SECONDS = 3
+
+
+def run():
+    m = toast_mod.ToastManager(theme="dark", no_expired_history=False)
+    for i in range(N_TOASTS):
+        m.handle_payload({"id": f"job{i}", "title": f"Job {i}", "message": "running",
+                          "duration": 600000, "progress": 0})
+    app.processEvents()
+
+    repaints = [0]
+    for t in m.toasts:
+        t.progress_bar.valueChanged.connect(lambda _v: repaints.__setitem__(0, repaints[0] + 1))
+
+    total_steps = RATE_PER_TOAST * SECONDS
+    step = [0]
+
+    loop = QtCore.QEventLoop()
+
+    def produce():
+        # 每 4ms 为每个 toast 推送一次进度（≈250 次/秒/toast）
+        if step[0] >= total_steps:
+            loop.quit()
+            return
+        value = step[0] * 100.0 / total_steps
+        for i in range(N_TOASTS):
+            m.handle_payload({"id": f"job{i}", "progress": value})
+        step[0] += 1
+
+    timer = QtCore.QTimer()
+    timer.setTimerType(QtCore.Qt.TimerType.PreciseTimer)
+    timer.timeout.connect(produce)
+    timer.start(4)
+
+    wall0 = time.perf_counter()
+    cpu0 = time.process_time()
+    # 用真实事件循环阻塞等待（忙等 processEvents 会把 CPU 占满，测不出真实开销）
+    loop.exec()
+    timer.stop()
+    for i in range(N_TOASTS):
+        m.handle_payload({"id": f"job{i}", "progress": 100})
+    QtCore.QTimer.singleShot(100, loop.quit)
+    loop.exec()
+    wall = time.perf_counter() - wall0
+    cpu = time.process_time() - cpu0
+
+    sent = step[0] * N_TOASTS
+    frames = wall * 1000 / toast_mod.FRAME_INTERVAL_MS
+    completed = sum(1 for t in m.toasts if t.phase == "expired")
+    print(f"  进度消息: {sent} 条，耗时 {wall:.2f}s（{sent / wall:.0f} 条/秒）")
+    print(f"  CPU 占用: {cpu:.2f}s / {wall:.2f}s = {cpu / wall * 100:.0f}%")
+    print(f"  进度条重绘: {repaints[0]} 次（{repaints[0] / N_TOASTS:.0f} 次/toast，帧上限约 {frames:.0f}）")
+    print(f"  已完成并进入过期阶段: {completed}/{N_TOASTS}，历史记录 {m.expired_history.count()} 条")
+    if repaints[0] / N_TOASTS <= frames + 1:
+        print("  ✓ 进度更新已按帧合并")
+    else:
+        print("  ⚠ 进度更新超过显示刷新率")
+    m.container.close()
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print(f"  进度 toast CPU 压测（{N_TOASTS} 个并发）")
+    print("=" * 60)
+    run()
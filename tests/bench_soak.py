@@ -0,0 +1,99 @@
+"""24 小时浸泡测试：按虚拟时钟回放一天的生产流量（独立运行，不依赖 pytest-qt）
+
+SimulatedClock 驱动全部截止时间、过期与调度，一天的流量在数秒内回放完毕。
+流量按昼夜曲线生成（白天高峰、夜间低谷），混合普通 / 倒计时 / 进度（同 ID 更新）/
+优先级 / 周期通知；每个虚拟小时记录存活 toast、历史条数、待触发 timer 与 Python 内存。
+分别以无界面模式（每小时 6000 条）与控件模式（每小时 100 条，受控件创建开销限制）各跑一遍。
+"""
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+import math
+import random
+import time
+import tracemalloc
+from unittest.mock import MagicMock
+from PySide6 import QtCore, QtWidgets
+
+import toast as toast_mod
+
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+screen = MagicMock()
+screen.availableGeometry.return_value = QtCore.QRect(0, 0, 1920, 1080)
+app.primaryScreen = lambda: screen
+
+DAY = 86400
+STEP = 1.0  # 回放粒度：每虚拟秒注入一批流量后推进时钟
+
+
+def traffic(rate_per_hour, seed=1):
+    """按昼夜曲线逐秒生成 payload 批次：(秒, [payload, ...])"""
+    rng = random.Random(seed)
+    for sec in range(DAY):
+        # 14:00 峰值、02:00 谷值，峰谷比约 9:1
+        hour = sec / 3600
+        rate = rate_per_hour / 3600 * (1 + 0.8 * math.cos((hour - 14) / 24 * 2 * math.pi))
+        n = 0  # 整数部分必发，小数部分按概率补一条
+        while rng.random() < rate - n:
+            n += 1
+        batch = []
+        for _ in range(n):
+            kind = rng.random()
+            if kind < 0.5:
+                batch.append({"title": "deploy", "message": f"build at {sec}",
+                              "duration": rng.choice((3000, 5000, 10000))})
+            elif kind < 0.7:
+                batch.append({"title": "timer", "duration": rng.choice((30, 60, 300)) * 1000,
+                              "show_countdown": True, "priority": rng.choice(toast_mod.PRIORITIES)})
+            else:
+                job = rng.randrange(50)
+                batch.append({"id": f"job{job}", "title": f"job {job}", "duration": 20000,
+                              "progress": min(100, rng.randrange(0, 130))})
+        yield sec, batch
+
+
+def soak(label, rate_per_hour, headless):
+    clock = toast_mod.SimulatedClock()
+    m = toast_mod.ToastManager(headless=headless, clock=clock, max_visible=None if headless else 30)
+    m.handle_payload({"title": "heartbeat", "every": "15m", "duration": 2000})
+    tracemalloc.start()
+    total = peak_live = 0
+    hourly = []
+    start = time.perf_counter()
+    for sec, batch in traffic(rate_per_hour):
+        for p in batch:
+            m.handle_payload(p)
+        total += len(batch)
+        clock.advance(STEP)
+        peak_live = max(peak_live, len(m.toasts))
+        if not headless and sec % 60 == 59:
+            # 控件出场后 deleteLater：每虚拟分钟回收一次
+            QtCore.QCoreApplication.sendPostedEvents(None, QtCore.QEvent.Type.DeferredDelete)
+        if sec % 3600 == 3599:
+            hourly.append((len(m.toasts), clock.pending(), tracemalloc.get_traced_memory()[0]))
+    clock.advance(600)  # 尾部：等待最后一批全部关闭
+    QtCore.QCoreApplication.sendPostedEvents(None, QtCore.QEvent.Type.DeferredDelete)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"\n  [{label}] 回放 24 小时，{total} 条 payload，耗时 {elapsed:.1f}s"
+          f"（{DAY / elapsed:.0f}x 实时）")
+    print(f"  存活峰值 {peak_live}，结束时存活 {len(m.toasts)}，历史 {m.expired_history.count()} 条")
+    for h in (5, 11, 17, 23):
+        live, pending, mem = hourly[h]
+        print(f"    {h + 1:>2}:00  存活 {live:>4}  待触发 timer {pending:>5}  内存 {mem / 1024:.0f} KB")
+    print(f"  内存：结束 {current / 1024:.0f} KB，峰值 {peak / 1024:.0f} KB")
+    # 06:00 与 22:00 关于 14:00 峰值对称，流量相同：内存差即为一天累积的增长
+    growth = hourly[21][2] - hourly[5][2]
+    print(f"  06:00 → 22:00 内存变化 {growth / 1024:+.0f} KB")
+    if not headless:
+        m.container.close()
+    return len(m.toasts)
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("  24 小时浸泡测试（虚拟时钟）")
+    print("=" * 60)
+    soak("无界面", rate_per_hour=6000, headless=True)
+    soak("控件模式", rate_per_hour=100, headless=False)
@@ -0,0 +1,92 @@
+"""标准输入流模式压测：吞吐与客户端峰值内存（独立运行，不依赖 pytest-qt）
+
+服务端在本进程（与 toast.py 服务端相同：无界面 ToastManager + pass_origin，用户事件经 send_event 推送），
+客户端为 `toast.py --stdin` 子进程。
+分别输入 5 万 / 20 万行，比较客户端峰值 RSS：内存应与输入总量无关。
+仅 Linux/macOS（依赖 os.wait4 读取子进程峰值 RSS）。
+客户端经一个小的中间进程启动并由它 wait4：exec 时内核把父进程的峰值计入子进程的 ru_maxrss，
+直接由本进程（持有管理器，内存较大）启动会测到本进程的峰值。
+"""
+import gc
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+import subprocess
+import sys
+import threading
+import time
+from PySide6 import QtCore, QtWidgets
+
+
+def feed(stdin, n):
+    """写入 n 行混合格式输入后关闭管道"""
+    for i in range(n):
+        if i % 2:
+            stdin.write(b'{"title": "job %d", "message": "step done", "duration": 1000}\n' % i)
+        else:
+            stdin.write(b"build %d\tcompiled module\n" % i)
+    stdin.close()
+
+
+# 中间进程：启动 argv 中的命令（继承 stdin），等待其退出并打印它的峰值 RSS
+RUSAGE_WRAPPER = ("import os, subprocess, sys; p = subprocess.Popen(sys.argv[1:]); "
+                  "_, _, ru = os.wait4(p.pid, 0); print(ru.ru_maxrss)")
+
+
+def measure(n):
+    import toast as toast_mod
+    received = [0]
+    mgr = toast_mod.ToastManager(headless=True)
+    srv = toast_mod.LocalServer(name="toast_server", threaded=True, handler=mgr.handle_payload,
+                                pass_origin=True)
+    srv.message.connect(lambda payload: received.__setitem__(0, received[0] + 1))
+    mgr.toast_event.connect(srv.send_event)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", RUSAGE_WRAPPER,
+                             sys.executable, os.path.join(root, "toast.py"), "--stdin"],
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env)
+    writer = threading.Thread(target=feed, args=(proc.stdin, n))
+    writer.start()
+    usage = []
+
+    def check():
+        if not usage and proc.poll() is not None:
+            usage.append(int(proc.stdout.read() or 0))
+        if usage and received[0] >= n or time.perf_counter() - start > 120:
+            loop.quit()
+
+    loop = QtCore.QEventLoop()
+    poll = QtCore.QTimer()
+    poll.timeout.connect(check)
+    poll.start(5)
+    loop.exec()
+    poll.stop()
+    writer.join()
+    elapsed = time.perf_counter() - start
+    srv.close()
+    routed = sum(t.origin is not None for t in mgr.toasts)
+    # 在 GUI 线程回收管理器与 server 的引用环：否则 GC 可能在下一轮的 worker 线程中途触发，
+    # 在错误的线程析构其定时器
+    del mgr, srv
+    gc.collect()
+    peak_kb = usage[0] if usage else 0  # Linux 单位 KB
+    print(f"\n  [{n} 行]")
+    print(f"  接收: {received[0]}/{n}，耗时 {elapsed:.2f}s（{received[0] / elapsed:.0f} 条/秒）")
+    print(f"  客户端峰值 RSS: {peak_kb / 1024:.1f} MB")
+    print(f"  绑定来源连接的 toast: {routed}（应为 0：stdin 连接不读事件）")
+    return peak_kb
+
+
+if __name__ == "__main__":
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    print("\n" + "=" * 60)
+    print("  toast --stdin 流式发送压测")
+    print("=" * 60)
+    small = measure(50000)
+    large = measure(200000)
+    print()
+    if large <= small * 1.1:
+        print(f"  ✓ 输入量 ×4 时客户端峰值内存基本不变（{small / 1024:.1f} MB → {large / 1024:.1f} MB）")
+    else:
+        print(f"  ⚠ 客户端峰值内存随输入增长（{small / 1024:.1f} MB → {large / 1024:.1f} MB）")
@@ -0,0 +1,317 @@
+"""性能基准套件：预热 + 多次重复 + 统计摘要 + JSON 结果 + 基线对比（独立运行，不依赖 pytest-qt）
+
+与 test_performance.py 的粗粒度阈值断言不同，这里不设绝对阈值，只和同一台机器上保存的基线比较：
+    PYTHONPATH=. python tests/bench_suite.py --json baseline.json       # 记录基线
+    PYTHONPATH=. python tests/bench_suite.py --compare baseline.json    # 对比，回归时退出码为 1
+每项基准的一次采样执行 ops 次操作，结果按单次操作耗时（秒）统计；
+对比取中位数，超过基线 (1 + tolerance) 倍记为回归。
+"""
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+import argparse
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from unittest.mock import MagicMock
+from PySide6 import QtCore, QtNetwork, QtWidgets, __version__ as PYSIDE_VERSION
+
+import toast as toast_mod
+
+
+def _quiet_offscreen(mode, context, message):
+    # offscreen 平台对每个窗口操作都打印 "This plugin does not support ..."，淹没结果表
+    if not message.startswith("This plugin does not support"):
+        sys.stderr.write(message + "\n")
+
+
+QtCore.qInstallMessageHandler(_quiet_offscreen)
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+screen = MagicMock()
+screen.availableGeometry.return_value = QtCore.QRect(0, 0, 1920, 1080)
+app.primaryScreen = lambda: screen
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS = {}  # name → (fn, ops, warmup, repeat)
+
+
+def benchmark(name, ops=1, warmup=2, repeat=15):
+    """登记一项基准：fn() 执行一次采样并返回计时区间的耗时（秒），准备与清理不计入"""
+    def decorate(fn):
+        BENCHMARKS[name] = (fn, ops, warmup, repeat)
+        return fn
+    return decorate
+
+
+def drain():
+    """处理挂起事件并回收已 deleteLater 的控件，避免上一次采样的残留影响下一次"""
+    app.processEvents()
+    QtCore.QCoreApplication.sendPostedEvents(None, QtCore.QEvent.Type.DeferredDelete)
+
+
+def close_manager(m):
+    drain()
+    if m.container is not None:
+        m.container.close()
+        m.container.deleteLater()
+    drain()
+
+
+# ========== 基准 ==========
+
+@benchmark("toast_create", ops=20)
+def bench_toast_create():
+    """单个 Toast 控件的构造（不入容器）"""
+    start = time.perf_counter()
+    toasts = [toast_mod.Toast(f"t{i}", "message", 60000, show_countdown=True) for i in range(20)]
+    elapsed = time.perf_counter() - start
+    for t in toasts:
+        t.deleteLater()
+    drain()
+    return elapsed
+
+
+@benchmark("bulk_insert", ops=100, repeat=7)
+def bench_bulk_insert():
+    """经 ToastManager 连续插入 100 个倒计时 toast（含有序插入、错峰与高度调整）"""
+    m = toast_mod.ToastManager(no_expired_history=True)
+    start = time.perf_counter()
+    for i in range(100):
+        m.show_toast(f"t{i}", "message", duration=60000 + i * 1000, show_countdown=True)
+    elapsed = time.perf_counter() - start
+    close_manager(m)
+    return elapsed
+
+
+@benchmark("reorder", ops=10, warmup=3, repeat=30)
+def bench_reorder():
+    """50 个倒计时 toast 中 10 个的排序键改变（优先级提升，原地更新的热路径），逐个二分重新定位"""
+    clock = toast_mod.SimulatedClock()
+    m = toast_mod.ToastManager(no_expired_history=True, clock=clock)
+    for i in range(50):
+        m.show_toast(f"t{i}", "message", duration=60000 + i * 1000, show_countdown=True)
+    drain()
+    movers = m.toasts[-10:]  # 剩余时间最长，位于列表底部
+    start = time.perf_counter()
+    for t in movers:
+        t.priority = "high"
+        m.container.reposition_toast(t)
+    elapsed = time.perf_counter() - start
+    close_manager(m)
+    return elapsed
+
+
+@benchmark("expiry", ops=30, repeat=10)
+def bench_expiry():
+    """30 个倒计时 toast 同时到期：进入过期阶段、记入历史、刷新面板、5 秒缓冲后关闭"""
+    clock = toast_mod.SimulatedClock()
+    m = toast_mod.ToastManager(no_expired_history=False, clock=clock)
+    for i in range(30):
+        m.show_toast(f"t{i}", "message", duration=10000, show_countdown=True)
+    drain()
+    clock.advance(9)
+    start = time.perf_counter()
+    clock.advance(7)
+    elapsed = time.perf_counter() - start
+    close_manager(m)
+    return elapsed
+
+
+@benchmark("overlay_rebuild", ops=1, warmup=3, repeat=30)
+def bench_overlay_rebuild():
+    """过期历史面板以 100 条记录重建"""
+    overlay = toast_mod.ExpiredOverlay(theme="dark")
+    records = [toast_mod.ExpiredRecord(f"t{i}", "message", float(i), float(i + 1)) for i in range(100)]
+    start = time.perf_counter()
+    overlay.set_records(records)
+    elapsed = time.perf_counter() - start
+    overlay.deleteLater()
+    drain()
+    return elapsed
+
+
+@benchmark("theme_switch", ops=1, warmup=1, repeat=10)
+def bench_theme_switch():
+    """200 个存活 toast（含摘要行与浮层）运行时切换主题：批量重设样式并处理随后的重绘事件"""
+    m = toast_mod.ToastManager(no_expired_history=False, motion="off")
+    for i in range(200):
+        m.show_toast(f"t{i}", "message", duration=600000, show_countdown=i % 2 == 0)
+    drain()
+    start = time.perf_counter()
+    m.set_theme("light")
+    app.processEvents()
+    elapsed = time.perf_counter() - start
+    close_manager(m)
+    return elapsed
+
+
+def ipc_client(name, n):
+    """子进程：同一连接上逐个发送请求并等待回复，打印总耗时。
+    客户端不放在被测进程的线程里：阻塞等待会与 worker 线程争用 GIL，测到的是争用而非往返"""
+    socket = QtNetwork.QLocalSocket()
+    socket.connectToServer(name)
+    if not socket.waitForConnected(3000):
+        sys.exit(1)
+    start = time.perf_counter()
+    for i in range(n):
+        socket.write(b'{"req": %d, "title": "t", "duration": 60000}\n' % i)
+        socket.flush()
+        buf = b""
+        while b"\n" not in buf and socket.waitForReadyRead(3000):
+            buf += socket.readAll().data()
+    print(time.perf_counter() - start)
+    socket.disconnectFromServer()
+
+
+@benchmark("ipc_round_trip", ops=200, repeat=10)
+def bench_ipc_round_trip():
+    """同一连接上 200 次请求-回复（worker 线程解析，GUI 线程分发到无界面管理器）"""
+    name = f"toast_bench_suite_{os.getpid()}"
+    m = toast_mod.ToastManager(headless=True)
+    srv = toast_mod.LocalServer(name=name, handler=m.handle_payload, threaded=True, pass_origin=True)
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--client", name, "200"],
+                            env=env, stdout=subprocess.PIPE, text=True)
+    while proc.poll() is None:
+        app.processEvents(QtCore.QEventLoop.ProcessEventsFlag.AllEvents, 5)
+    srv.close()
+    out = proc.stdout.read().strip()
+    if proc.returncode or not out:
+        raise RuntimeError("IPC 客户端连接失败")
+    return float(out)
+
+
+STARTUP_SCRIPT = """
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from unittest.mock import MagicMock
+from PySide6 import QtCore, QtWidgets
+import toast
+app = QtWidgets.QApplication([])
+screen = MagicMock()
+screen.availableGeometry.return_value = QtCore.QRect(0, 0, 1920, 1080)
+app.primaryScreen = lambda: screen
+m = toast.ToastManager()
+m.show_toast("hello", "world")
+app.processEvents()
+"""
+
+
+@benchmark("startup", ops=1, warmup=1, repeat=7)
+def bench_startup():
+    """冷启动：新进程导入、创建 QApplication 与管理器并显示第一个 toast"""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], env=env, check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+# ========== 运行与统计 ==========
+
+def summarize(samples):
+    """单次操作耗时（秒）的统计摘要"""
+    ordered = sorted(samples)
+    q1, _, q3 = statistics.quantiles(ordered, n=4) if len(ordered) >= 2 else (ordered[0],) * 3
+    return {"runs": len(ordered), "min": ordered[0], "max": ordered[-1],
+            "mean": statistics.fmean(ordered), "median": statistics.median(ordered),
+            "stdev": statistics.stdev(ordered) if len(ordered) >= 2 else 0.0,
+            "iqr": q3 - q1, "samples": samples}
+
+
+def sample(fn, ops):
+    # 采样前在 GUI 线程回收引用环：否则 GC 可能在 IPC worker 线程中途触发，
+    # 在错误的线程析构上一项基准残留的 Qt 对象，且回收耗时会计入本次采样
+    gc.collect()
+    return fn() / ops
+
+
+def run(name, repeat=None, warmup=None):
+    fn, ops, default_warmup, default_repeat = BENCHMARKS[name]
+    for _ in range(default_warmup if warmup is None else warmup):
+        sample(fn, ops)
+    samples = [sample(fn, ops) for _ in range(default_repeat if repeat is None else repeat)]
+    return {"ops": ops, **summarize(samples)}
+
+
+def compare(results, baseline, tolerance):
+    """按中位数与基线比较：返回 [(名称, 变化比例, 状态)]，状态为 ok / regression / faster / new"""
+    rows = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            rows.append((name, None, "new"))
+            continue
+        change = result["median"] / base["median"] - 1
+        status = "regression" if change > tolerance else "faster" if change < -tolerance else "ok"
+        rows.append((name, change, status))
+    return rows
+
+
+def fmt(seconds):
+    if seconds >= 1:
+        return f"{seconds:.2f}s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds * 1e6:.1f}µs"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="toast 性能基准套件")
+    parser.add_argument("-k", dest="only", action="append", default=None,
+                        help="只运行名称包含该字符串的基准（可重复）")
+    parser.add_argument("--repeat", type=int, default=None, help="覆盖每项基准的重复次数")
+    parser.add_argument("--warmup", type=int, default=None, help="覆盖每项基准的预热次数")
+    parser.add_argument("--json", default=None, metavar="PATH", help="把结果写为 JSON（可作为基线）")
+    parser.add_argument("--compare", default=None, metavar="BASELINE", help="与基线 JSON 对比")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="中位数超过基线的比例上限（默认 0.15）")
+    parser.add_argument("--list", action="store_true", help="列出全部基准")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, (fn, ops, warmup, repeat) in BENCHMARKS.items():
+            print(f"  {name:<16} {fn.__doc__}（{ops} 次操作/采样，预热 {warmup}，重复 {repeat}）")
+        return 0
+    names = [n for n in BENCHMARKS if not args.only or any(k in n for k in args.only)]
+
+    print("\n" + "=" * 72)
+    print("  性能基准（单次操作耗时）")
+    print("=" * 72)
+    print(f"  {'基准':<16}{'中位数':>12}{'均值':>12}{'标准差':>12}{'最小':>12}{'最大':>12}")
+    results = {}
+    for name in names:
+        r = results[name] = run(name, args.repeat, args.warmup)
+        print(f"  {name:<16}{fmt(r['median']):>12}{fmt(r['mean']):>12}{fmt(r['stdev']):>12}"
+              f"{fmt(r['min']):>12}{fmt(r['max']):>12}")
+
+    if args.json:
+        data = {"meta": {"python": platform.python_version(), "pyside": PYSIDE_VERSION,
+                         "platform": platform.platform(), "machine": platform.machine(),
+                         "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+                "results": results}
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        print(f"\n  结果已写入 {args.json}")
+
+    if not args.compare:
+        return 0
+    with open(args.compare, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    print(f"\n  与基线对比（容差 ±{args.tolerance:.0%}）")
+    regressions = 0
+    for name, change, status in compare(results, baseline, args.tolerance):
+        delta = "" if change is None else f"{change:+.1%}"
+        mark = {"regression": "✗", "faster": "↑", "ok": "✓", "new": "·"}[status]
+        print(f"  {mark} {name:<16}{delta:>10}  {status}")
+        regressions += status == "regression"
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "--client":
+        ipc_client(sys.argv[2], int(sys.argv[3]))
+        sys.exit(0)
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""按 ID 原地更新压测：1000 次/秒持续更新同一 toast（独立运行，不依赖 pytest-qt）"""
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+import time
+from unittest.mock import MagicMock
+from PySide6 import QtCore, QtWidgets
+
+import toast as toast_mod
+
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+screen = MagicMock()
+screen.availableGeometry.return_value = QtCore.QRect(0, 0, 1920, 1080)
+app.primaryScreen = lambda: screen
+
+RATE = 1000      # 每秒更新次数
+SECONDS = 3      # 持续时间
+
+
+def run():
+    m = toast_mod.ToastManager(theme="dark", no_expired_history=True)
+    m.handle_payload({"id": "deploy", "title": "Deploy", "message": "0%", "duration": 600000})
+    toast = m.toasts[0]
+
+    # 统计真正写入标签的次数
+    applied = [0]
+    original_apply = toast._apply_pending_update
+
+    def counting_apply():
+        applied[0] += 1
+        original_apply()
+    toast._update_timer = None
+    toast._apply_pending_update = counting_apply
+
+    sent = [0]
+    handle_cost = [0.0]
+    total = RATE * SECONDS
+    per_tick = RATE // 100  # 每 10ms 发送一批，模拟 1000 次/秒
+
+    def produce():
+        for _ in range(per_tick):
+            if sent[0] >= total:
+                return
+            t0 = time.perf_counter()
+            m.handle_payload({"id": "deploy", "message": f"{sent[0] * 100 // total}%"})
+            handle_cost[0] += time.perf_counter() - t0
+            sent[0] += 1
+
+    timer = QtCore.QTimer()
+    timer.setTimerType(QtCore.Qt.TimerType.PreciseTimer)
+    timer.timeout.connect(produce)
+    timer.start(10)
+
+    start = time.perf_counter()
+    while sent[0] < total:
+        app.processEvents(QtCore.QEventLoop.ProcessEventsFlag.AllEvents, 5)
+    # 等待最后一帧生效
+    end_wait = time.perf_counter() + 0.1
+    while time.perf_counter() < end_wait:
+        app.processEvents()
+    elapsed = time.perf_counter() - start
+    timer.stop()
+
+    print(f"  发送更新: {sent[0]} 次，耗时 {elapsed:.2f}s（{sent[0] / elapsed:.0f} 次/秒）")
+    print(f"  handle_payload 平均耗时: {handle_cost[0] / sent[0] * 1e6:.1f} µs")
+    print(f"  实际标签刷新: {applied[0]} 次（上限约 {elapsed * 1000 / toast_mod.FRAME_INTERVAL_MS:.0f} 帧）")
+    print(f"  toast 数量: {len(m.toasts)}，最终文本: {toast.msg_lbl.text()}")
+    if len(m.toasts) == 1 and applied[0] <= elapsed * 1000 / toast_mod.FRAME_INTERVAL_MS + 1:
+        print("  ✓ 更新已按帧合并")
+    else:
+        print("  ⚠ 更新未按帧合并")
+    m.container.close()
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("  按 ID 原地更新压测（1000 次/秒）")
+    print("=" * 60)
+    run()
@@ -0,0 +1,82 @@
+"""请求确认：带 req 的消息回复投递状态；同一连接流水线请求按序回复"""
+import json
+import os
+import subprocess
+import sys
+from unittest.mock import MagicMock
+from toast import LocalServer
+
+
+def test_ack_statuses(manager):
+    """accepted（自动分配 id）/ deduped（同 ID 原地更新）/ 无 req 不回复"""
+    r1 = manager.handle_payload({"req": 1, "title": "a", "duration": 60000})
+    assert r1["status"] == "accepted" and r1["id"].startswith("auto-")
+    r2 = manager.handle_payload({"req": 2, "id": r1["id"], "message": "m2"})
+    assert r2 == {"status": "deduped", "id": r1["id"]}
+    assert manager.handle_payload({"title": "b", "duration": 60000}) is None
+    assert len(manager.toasts) == 2
+
+
+def test_ack_dropped_under_rate_limit(manager):
+    """限流丢弃时回复 dropped"""
+    from toast import TokenBucket
+    manager.rate_limiter = TokenBucket(0.001, burst=1)
+    assert manager.handle_payload({"req": "x", "title": "a"})["status"] == "accepted"
+    assert manager.handle_payload({"req": "y", "title": "b"}) == {"status": "dropped", "id": None}
+
+
+def test_ack_cancel(manager):
+    """cancel 带 req 时回复 ok / not_found"""
+    manager.handle_payload({"id": "k", "title": "a", "duration": 60000})
+    assert manager.handle_payload({"req": 1, "cmd": "cancel", "id": "k"}) == {"status": "ok", "id": "k"}
+    assert manager.handle_payload({"req": 2, "cmd": "cancel", "id": "zz"})["status"] == "not_found"
+
+
+def test_ack_unknown_cmd(manager, capsys):
+    """未知命令带 req 时回复 invalid；不带 req 时不回复、只计入 ipc_invalid_total"""
+    from toast import METRICS
+    before = METRICS.counter("ipc_invalid_total").value
+    assert manager.handle_payload({"req": 1, "cmd": "bogus"}) == {"status": "invalid", "error": "unknown cmd: bogus"}
+    assert manager.handle_payload({"cmd": "bogus"}) is None
+    assert METRICS.counter("ipc_invalid_total").value == before + 1
+    assert capsys.readouterr().out == ""
+
+
+def test_pipelined_replies_in_order_single_write(qtbot):
+    """一次读取中的多条请求：回复带回 req、保持顺序，并合并为一次写出；
+    带 req 的无效帧回复 invalid，不带 req 的（含无法解析的）只计数"""
+    srv = LocalServer(name="toast_test_ack_batch",
+                      handler=lambda p: {"status": "accepted", "id": p.get("n")} if "req" in p else None)
+    try:
+        sock = MagicMock()
+        sock.readAll.return_value.data.return_value = (
+            b'{"req": 1, "n": "a"}\n{"n": "silent"}\nnot json\n'
+            b'{"req": 2, "duration": "x"}\n{"req": 3, "n": "c"}\n')
+        srv.read_data(sock)
+        assert sock.write.call_count == 1
+        replies = [json.loads(line) for line in sock.write.call_args.args[0].splitlines()]
+        assert [r.get("req") for r in replies] == [1, 2, 3]
+        assert [r["status"] for r in replies] == ["accepted", "invalid", "accepted"]
+    finally:
+        srv.close()
+
+
+def test_send_requests_pipelined_over_socket(qtbot):
+    """send_requests：子进程在同一连接上流水线发送 500 条请求，逐条收到对应回复"""
+    srv = LocalServer(name="toast_test_pipeline", threaded=True,
+                      handler=lambda p: {"status": "accepted", "id": p["n"]})
+    code = ("import json, toast; "
+            "r = toast.send_requests([{'n': i} for i in range(500)], name='toast_test_pipeline'); "
+            "print(json.dumps(r))")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root, QT_QPA_PLATFORM="offscreen")
+    proc = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE, env=env)
+    try:
+        qtbot.waitUntil(lambda: proc.poll() is not None, timeout=15000)
+        replies = json.loads(proc.stdout.read())
+        assert [r["id"] for r in replies] == list(range(500))
+        assert [r["req"] for r in replies] == list(range(500))
+    finally:
+        proc.kill()
+        proc.stdout.close()
+        srv.close()
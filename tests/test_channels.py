@@ -0,0 +1,130 @@
+"""通知频道：按 payload 的 channel 字段路由，各频道独立的容器、显示上限、限流、主题与历史"""
+import pytest
+from toast import SimulatedClock, ToastManager, parse_channel_spec
+
+
+def test_parse_channel_spec():
+    assert parse_channel_spec("chat") == ("chat", {})
+    assert parse_channel_spec("ci:max_visible=3,rate-limit=0.5,theme=light,history=20") == (
+        "ci", {"max_visible": 3, "rate_limit": 0.5, "theme": "light", "history": 20})
+    for bad in (":max_visible=3", "ci:colour=red", "ci:theme=blue", "ci:max_visible=x"):
+        with pytest.raises(ValueError):
+            parse_channel_spec(bad)
+
+
+def test_channels_created_lazily_with_own_stack_and_policy(qtbot, mock_screen):
+    """频道首次收到通知时才创建；容器并排放置，主题与显示上限只作用于本频道"""
+    m = ToastManager(no_expired_history=True, max_visible=5,
+                     channels={"ci": {"max_visible": 1, "theme": "light"}})
+    qtbot.addWidget(m.container)
+    assert list(m.channels) == ["default"]
+    m.handle_payload({"id": "d1", "title": "d", "duration": 60000})
+    m.handle_payload({"id": "c1", "title": "c", "duration": 60000, "channel": "ci", "priority": "high"})
+    ci = m.channels["ci"]
+    qtbot.addWidget(ci.container)
+    assert ci.container is not m.container
+    assert ci.container.geometry().right() < m.container.geometry().left()
+    c1 = m._toasts_by_id["c1"]
+    assert c1.host is ci.container and c1.theme == "light" and m._toasts_by_id["d1"].theme == "dark"
+    reply = m.handle_payload({"title": "c", "channel": "ci", "priority": "low", "req": 1})
+    assert reply["status"] == "dropped"                  # ci 已满且低于已有
+    m.handle_payload({"id": "c2", "title": "c", "channel": "ci", "priority": "critical", "duration": 60000})
+    assert c1._exiting and not m._toasts_by_id["d1"]._exiting  # 只淘汰本频道
+    m.handle_payload({"id": "d2", "title": "d", "duration": 60000})
+    assert m._toasts_by_id["d2"].host is m.container
+
+
+def test_channel_rate_limit_and_history_are_independent(qapp):
+    """限流与到期历史按频道分开；历史容量可单独设置"""
+    clock = SimulatedClock()
+    m = ToastManager(headless=True, clock=clock,
+                     channels={"alerts": {"rate_limit": 1, "history": 2}})
+    accepted = [m.handle_payload({"title": "a", "channel": "alerts", "req": i})["status"] for i in range(3)]
+    assert accepted == ["accepted", "dropped", "dropped"]
+    for i in range(5):
+        m.handle_payload({"title": f"d{i}", "duration": 1000, "show_countdown": True})
+    clock.advance(1)
+    for i in range(3):
+        m.handle_payload({"title": f"a{i}", "channel": "alerts", "duration": 1000,
+                          "show_countdown": True})
+        clock.advance(1)
+    clock.advance(2)
+    assert m.expired_history.count() == 5
+    assert [r.title for r in m.channels["alerts"].expired_history.all()] == ["a1", "a2"]
+    assert m.stats()["gauges"]["expired_history_records"] == 7
+
+
+def test_unknown_channels_share_default_and_global_caps(qapp):
+    """未配置的频道名归入默认频道；全局显示上限与限流作用于全部频道合计"""
+    clock = SimulatedClock()
+    m = ToastManager(headless=True, clock=clock, max_visible=3, rate_limit=2,
+                     channels={"ci": {"max_visible": 5}})
+    statuses = [m.handle_payload({"title": "x", "channel": f"c{i}", "duration": 60000, "req": i})["status"]
+                for i in range(40)]
+    assert list(m.channels) == ["default"] and statuses.count("accepted") == 2
+    clock.advance(10)
+    for i in range(4):
+        m.handle_payload({"title": "ci", "channel": "ci", "duration": 60000, "priority": "high"})
+        clock.advance(1)
+    live = [t for t in m.toasts if not t._exiting]
+    assert len(live) == 3 and all(t.channel.name == "ci" for t in live)  # 全局上限淘汰默认频道的 toast
+    with pytest.raises(ValueError):
+        m.set_theme("light", channel="c1")
+
+
+def test_global_cap_evicts_oldest_across_channel_containers(qtbot, mock_screen):
+    """控件模式下插入顺序为全局序号：全局上限跨频道淘汰真正最早插入的 toast"""
+    m = ToastManager(no_expired_history=True, motion="off", max_visible=3, channels={"a": {}, "b": {}})
+    qtbot.addWidget(m.container)
+    for name in ("a0", "a1", "a2"):
+        m.handle_payload({"id": name, "title": name, "channel": "a", "duration": 60000})
+    qtbot.addWidget(m.channels["a"].container)
+    m.cancel_toast("a0")
+    m.handle_payload({"id": "b1", "title": "b1", "channel": "b", "duration": 60000})
+    qtbot.addWidget(m.channels["b"].container)
+    m.handle_payload({"id": "a3", "title": "a3", "channel": "a", "duration": 60000})
+    live = {t.toast_id for t in m.toasts if not t._exiting}
+    assert live == {"a2", "b1", "a3"}  # a1 最早插入（b1 在其容器内序号更小，但全局更晚）
+
+
+def test_rejected_toasts_spend_no_tokens(qapp):
+    """频道桶放行但全局桶拒绝、或因显示上限丢弃时，两个桶都不消耗令牌"""
+    clock = SimulatedClock()
+    m = ToastManager(headless=True, clock=clock, rate_limit=1, channels={"ci": {"rate_limit": 1}})
+    m.handle_payload({"title": "d", "duration": 60000})           # 用掉全局令牌
+    assert m.show_toast("c", "m", 60000, channel="ci") is None     # 全局拒绝
+    ci = m.channels["ci"].rate_limiter
+    assert ci.ready()                                              # ci 的令牌仍在
+    clock.advance(1)
+    assert m.show_toast("c", "m", 60000, channel="ci") is not None
+    m2 = ToastManager(headless=True, clock=clock, rate_limit=1, max_visible=1)
+    m2.show_toast("keep", "m", 60000, priority="high")
+    clock.advance(1)
+    assert m2.show_toast("low", "m", 60000, priority="low") is None  # 显示上限下丢弃
+    assert m2.rate_limiter.ready()
+
+
+def test_idle_channel_containers_released_and_slots_wrap(qtbot, mock_screen):
+    """频道容器在最后一个 toast 关闭后销毁、下次使用时重建；并排位置超出屏幕宽度时回绕"""
+    m = ToastManager(no_expired_history=True, motion="off",
+                     channels={f"c{i}": {} for i in range(8)})
+    qtbot.addWidget(m.container)
+    screen_right = m.container.screen.right()
+    toasts = [m.show_toast("t", "m", duration=60000, channel=f"c{i}") for i in range(8)]
+    containers = [t.host for t in toasts]
+    assert len({c.slot for c in containers}) == 8
+    assert all(c.screen.left() <= c.geometry().left() and c.geometry().right() <= screen_right
+               for c in containers)
+    first = containers[0]
+    toasts[0].start_exit_anim()
+    qtbot.waitUntil(lambda: toasts[0] not in m.toasts, timeout=1000)
+    ch = m.channels["c0"]
+    assert ch.container is None and ch.containers == {}
+    again = m.show_toast("t", "m", duration=60000, channel="c0")
+    assert again.host is ch.container and again.host is not first
+    d = m.show_toast("d", "m", duration=60000)
+    d.start_exit_anim()
+    qtbot.waitUntil(lambda: d not in m.toasts, timeout=1000)
+    assert m.container is not None and m.container.isVisible()  # 默认频道的主屏幕容器常驻
+    for t in m.toasts:
+        t.host.close()
@@ -117,6 +117,7 @@ def test_main_server_path_launches_app(monkeypatch, qapp):
     class FakeServer:
         def __init__(self, *a, **kw):
             self.message = MagicMock()
+        def send_event(self, conn_id, event): pass
         def close(self): pass
     monkeypatch.setattr(toast_mod, "LocalServer", FakeServer)
 
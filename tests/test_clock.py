@@ -0,0 +1,85 @@
+"""可插拔时钟：SimulatedClock 驱动截止时间、过期与调度，无需等待真实时间"""
+import pytest
+from PySide6 import QtCore
+from toast import SimulatedClock, TokenBucket, ToastManager, ToastScheduler
+
+
+@pytest.fixture
+def clock():
+    return SimulatedClock()
+
+
+def test_timers_fire_in_due_order(clock):
+    """advance 期间到期的 timer 按时间顺序触发；回调中新布置的同样触发；stop 后不再触发"""
+    fired = []
+    a = clock.timer(None, lambda: fired.append(("a", clock.time())), single_shot=True)
+    b = clock.timer(None, lambda: fired.append(("b", clock.time())))
+    c = clock.timer(None, lambda: fired.append("c"), single_shot=True)
+    a.start(1500)
+    b.start(1000)
+    c.start(500)
+    c.stop()
+    assert clock.advance(3) == 4
+    start = 1700000000.0
+    assert fired == [("b", start + 1), ("a", start + 1.5), ("b", start + 2), ("b", start + 3)]
+    assert clock.time() == start + 3 and clock.monotonic() == 3
+    assert not a.isActive() and b.isActive()
+
+
+def test_timer_skipped_after_parent_deleted(qapp, clock):
+    """同 QTimer 父子化：parent 已删除时不再回调"""
+    parent = QtCore.QObject()
+    fired = []
+    clock.timer(parent, lambda: fired.append(1), single_shot=True).start(10)
+    import shiboken6
+    shiboken6.delete(parent)
+    clock.advance(1)
+    assert fired == []
+
+
+def test_widget_lifecycle_fast_forward(qtbot, mock_screen, qapp, clock):
+    """控件模式：倒计时到期 → 过期缓冲 → 关闭，全部按虚拟时间推进"""
+    m = ToastManager(no_expired_history=False, clock=clock)
+    qtbot.addWidget(m.container)
+    events = []
+    m.toast_event.connect(lambda origin, e: events.append((e["event"], e["ts"])))
+    toast = m.show_toast("c", "m", duration=3600 * 1000, show_countdown=True)
+    start = clock.time()
+    clock.advance(3599)
+    assert toast.phase == "active" and toast.remaining == 1
+    clock.advance(1)
+    assert toast.phase == "expired" and toast.expired_time == start + 3600
+    assert m.expired_history.count() == 1
+    clock.advance(5.15)
+    assert m.toasts == []
+    assert events == [("expired", start + 3600), ("closed", start + 3605.15)]
+
+
+def test_scheduler_recurring_over_a_day(qapp, clock):
+    """周期通知：快进 24 小时按整点触发 24 次"""
+    s = ToastScheduler(clock=clock)
+    fired = []
+    s.due.connect(lambda batch: fired.append(clock.time()))
+    s.schedule({"title": "hourly"}, clock.time() + 3600, every=3600)
+    clock.advance(86400)
+    assert len(fired) == 24
+    assert fired[-1] == clock.time()
+
+
+def test_token_bucket_uses_clock(clock):
+    bucket = TokenBucket(2, clock=clock)
+    assert [bucket.allow() for _ in range(3)] == [True, True, False]
+    clock.advance(0.5)
+    assert bucket.allow() and not bucket.allow()
+
+
+def test_headless_manager_follows_clock(qapp, clock):
+    """无界面管理器的截止时间堆同样由虚拟时钟驱动"""
+    m = ToastManager(headless=True, clock=clock)
+    for i in range(100):
+        m.handle_payload({"title": f"t{i}", "duration": 1000 * (i + 1), "show_countdown": i % 2 == 0})
+    clock.advance(60)
+    # 60 秒内：非倒计时时长 ≤ 60s 的 30 条、倒计时时长 + 5s 缓冲 ≤ 60s 的 28 条已关闭
+    assert len(m.toasts) == 42
+    clock.advance(50)
+    assert len(m.toasts) == 0 and m.expired_history.count() == 50
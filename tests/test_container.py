@@ -1,7 +1,7 @@
 """容器测试：排序逻辑、错峰、浮层联动"""
 import pytest
-from functools import cmp_to_key
 from unittest.mock import MagicMock
+from PySide6 import QtCore, QtWidgets
 import toast as toast_mod
 from toast import ToastContainer, Toast
 
@@ -38,19 +38,23 @@ def test_container_remove_toast_decreases_count(qtbot, mock_screen):
     assert c.vbox.count() == initial - 1
 
 
-def test_container_reorder_5s_debounce(qtbot, mock_screen):
-    """_compare_countdown 差值<5 返回 0（防抖保持原序）"""
+def test_container_reorder_uses_order_key(qtbot, mock_screen):
+    """reorder_toasts 与二分插入使用同一排序键：全量重排后 vbox 仍可二分插入"""
     c = ToastContainer(theme="dark", no_expired_history=True)
     qtbot.addWidget(c)
-    a, b = MagicMock(), MagicMock()
-    a.remaining = 5
-    b.remaining = 4  # 差值 1 < 5
-    assert c._compare_countdown(a, b) == 0
-    assert c._compare_countdown(b, a) == 0
+    toasts = [Toast(f"t{r}", "m", duration=r * 1000, show_countdown=True) for r in (30, 10, 20)]
+    for t in toasts:
+        c.add_toast(t)
+    toasts[0].remaining, toasts[1].remaining = 12, 11  # 外部改动剩余时间后全量校正
+    c.reorder_toasts()
+    order = [c.vbox.itemAt(i).widget() for i in range(c.vbox.count() - 1)]
+    assert [t.remaining for t in order] == [11, 12, 20]
+    extra = Toast("t15", "m", duration=15000, show_countdown=True)
+    assert c._insertion_index(extra) == 2
 
 
 def test_container_sort_by_countdown_asc(qtbot, mock_screen):
-    """_sort_toasts 按 remaining 升序（差值>=5 时）"""
+    """_sort_toasts 按 remaining 升序"""
     c = ToastContainer(theme="dark", no_expired_history=True)
     qtbot.addWidget(c)
     a, b = MagicMock(), MagicMock()
@@ -58,7 +62,6 @@ def test_container_sort_by_countdown_asc(qtbot, mock_screen):
     a.expired_time, a._insert_order = None, 0
     b.remaining, b.phase, b.show_countdown = 3, "active", True
     b.expired_time, b._insert_order = None, 1
-    # 差值 7 >= 5 → b 应在前
     sorted_list = c._sort_toasts([a, b])
     assert sorted_list[0] is b
     assert sorted_list[1] is a
@@ -103,3 +106,96 @@ def test_container_adjust_height_caps_screen(qtbot, mock_screen):
     assert c.max_height > 0
     # 容器当前几何高度不应超过 max_height + 容差
     assert c.geometry().height() <= max_h + 50 or c.geometry().height() <= 1080
+
+
+def test_adjust_height_uses_cached_toast_heights(qtbot, manager, monkeypatch):
+    """高度记账：adjust_height 不再逐个调用 sizeHint；内容变化时只测量该 toast 一次"""
+    toasts = [manager.show_toast(f"t{i}", "m", duration=60000, toast_id=f"id{i}") for i in range(30)]
+    calls = {}
+
+    def counting_size_hint(self):
+        calls[self] = calls.get(self, 0) + 1
+        return QtWidgets.QFrame.sizeHint(self)
+    monkeypatch.setattr(Toast, "sizeHint", counting_size_hint)
+    for _ in range(5):
+        manager.container.adjust_height()
+    assert calls == {}
+
+    target = toasts[7]
+    before = target.layout_height()
+    manager.update_toast("id7", message="第一行\n第二行\n第三行\n第四行")
+    target._apply_pending_update()
+    assert calls == {target: 1} and target.layout_height() > before
+    assert manager.container._sum_toast_h == sum(t.layout_height() for t in toasts)
+    assert manager.container._toast_heights[target] == target.layout_height()
+
+
+def test_animation_driver_batches_and_retargets(qtbot):
+    """一个驱动器推进全部过渡；对同一属性再次 animate 时从当前值改目标，完成回调保留到结束"""
+    driver = toast_mod.AnimationDriver()
+    widgets = [QtWidgets.QWidget() for _ in range(3)]
+    done = []
+    for i, w in enumerate(widgets):
+        qtbot.addWidget(w)
+        w.setGeometry(0, 0, 100, 20)
+        driver.animate(w, "geometry", QtCore.QRect(0, 100 * (i + 1), 100, 20), 300,
+                       on_finished=lambda i=i: done.append(i))
+    assert driver.pending() == 3
+    qtbot.wait(100)
+    mid = widgets[0].geometry().y()
+    assert 0 < mid < 100
+    driver.animate(widgets[0], "geometry", QtCore.QRect(0, 0, 100, 20), 200)
+    assert driver.pending() == 3 and widgets[0].geometry().y() == mid  # 改目标不跳变
+    qtbot.waitUntil(lambda: driver.pending() == 0, timeout=2000)
+    assert sorted(done) == [0, 1, 2]
+    assert [w.geometry().y() for w in widgets] == [0, 200, 300]
+
+
+def test_container_transitions_share_one_driver(qtbot, manager):
+    """入场 / 高度过渡登记在容器驱动器上，结束后定时器停止"""
+    c = manager.container
+    for i in range(3):
+        t = manager.show_toast(f"t{i}", "m", duration=60000)
+        assert t.animator is c.animator
+    assert c.animator.is_animating(c, "geometry")
+    qtbot.waitUntil(lambda: c.animator.pending() == 0, timeout=3000)
+    assert not c.animator._timer.isActive()
+    assert all(not t._entering for t in manager.toasts)
+
+
+def test_motion_governor_degrades_and_recovers():
+    """帧间隔或动画控件数超阈值立即降级；负载回落并持续 RECOVER_S 后逐级恢复，空闲后直接恢复"""
+    now = [0.0]
+    g = toast_mod.MotionGovernor(now=lambda: now[0])
+    assert g.level(animating=3) == "full"
+    assert g.level(animating=10) == "fade"
+    assert g.level(animating=30) == "off"
+    for _ in range(3):
+        now[0] += 0.016
+        g.observe(0.016, 2)
+    assert g.level() == "off"            # 回落后需持续 RECOVER_S
+    for _ in range(80):
+        now[0] += 0.016
+        g.observe(0.016, 2)
+    assert g.level() == "fade"           # 逐级恢复
+    for _ in range(30):
+        now[0] += 0.08
+        g.observe(0.08, 1)               # 帧间隔变长
+    assert g.level() == "off"
+    now[0] += 5                          # 驱动器空闲
+    assert g.level() == "full"
+    assert toast_mod.MotionGovernor("fade").level(animating=100) == "fade"
+    with pytest.raises(ValueError):
+        toast_mod.MotionGovernor("slow")
+
+
+def test_forced_motion_off_skips_transitions(qtbot, mock_screen):
+    """motion="off"：入场、出场与高度变化都不经过动画驱动"""
+    m = toast_mod.ToastManager(no_expired_history=True, motion="off")
+    qtbot.addWidget(m.container)
+    t = m.show_toast("a", "m", duration=60000)
+    qtbot.waitUntil(lambda: t.isVisible() and not t._entering, timeout=1000)
+    assert m.container.animator.pending() == 0
+    with qtbot.waitSignal(t.closed, timeout=1000):
+        t.start_exit_anim()
+    assert m.container.animator.pending() == 0
@@ -0,0 +1,102 @@
+"""无界面模式：不创建控件，生命周期（active → expired → 历史 → 关闭）由截止时间堆驱动"""
+import pytest
+from PySide6 import QtWidgets
+from toast import HeadlessToast, ToastList, ToastManager
+
+
+@pytest.fixture
+def headless(qapp, frozen_time):
+    m = ToastManager(headless=True)
+    events = []
+    m.toast_event.connect(lambda origin, e: events.append(e["event"]))
+    m.events = events
+    yield m
+
+
+def test_no_widgets_created(qapp, headless):
+    """无界面管理器不创建 ToastContainer 与任何 toast 控件"""
+    before = set(QtWidgets.QApplication.allWidgets())
+    for i in range(50):
+        headless.handle_payload({"title": f"t{i}", "duration": 60000})
+    assert headless.container is None
+    assert set(QtWidgets.QApplication.allWidgets()) == before
+    assert len(headless.toasts) == 50
+    assert all(isinstance(t, HeadlessToast) for t in headless.toasts)
+
+
+def test_countdown_lifecycle_to_history(headless, frozen_time):
+    """倒计时：到期进入 expired（记入历史），5 秒缓冲后关闭"""
+    closed = []
+    headless.all_closed.connect(lambda: closed.append(True))
+    headless.handle_payload({"title": "c", "duration": 3000, "show_countdown": True})
+    toast = headless.toasts[0]
+    assert toast.remaining == 3
+    headless.lifecycle.process_due(frozen_time[0] + 2.9)
+    assert toast.phase == "active"
+    headless.lifecycle.process_due(frozen_time[0] + 3)
+    assert toast.phase == "expired" and toast.expired_time == frozen_time[0] + 3
+    assert headless.expired_history.count() == 1
+    headless.lifecycle.process_due(frozen_time[0] + 8)
+    assert len(headless.toasts) == 0 and closed == [True]
+    assert headless.events == ["expired", "closed"]
+
+
+def test_plain_toast_closes_after_duration(headless, frozen_time):
+    """非倒计时：时长到期回传 expired 并关闭，不记入历史（同控件版行为）"""
+    headless.handle_payload({"title": "p", "duration": 1500})
+    headless.lifecycle.process_due(frozen_time[0] + 1.5)
+    assert len(headless.toasts) == 0
+    assert headless.expired_history.count() == 0
+    assert headless.events == ["expired", "closed"]
+
+
+def test_update_in_place_and_progress(headless, frozen_time):
+    """同 ID 原地更新立即生效；进度到 100 进入过期阶段，回退后恢复 ACTIVE"""
+    headless.handle_payload({"id": "job", "title": "build", "progress": 10, "duration": 10000})
+    reply = headless.handle_payload({"req": 1, "id": "job", "message": "50%", "progress": 50})
+    toast = headless.toasts[0]
+    assert reply["status"] == "deduped"
+    assert (toast.message, toast.progress) == ("50%", 50)
+    headless.update_toast("job", progress=100)
+    assert toast.phase == "expired" and headless.expired_history.count() == 1
+    headless.update_toast("job", progress=20)
+    assert toast.phase == "active"
+
+
+def test_cancel_and_eviction(qapp, frozen_time):
+    """cancel 与显示上限淘汰在下一次处理时关闭"""
+    m = ToastManager(headless=True, max_visible=2)
+    for p in ("low", "high", "normal"):
+        m.handle_payload({"id": p, "title": p, "priority": p, "duration": 60000})
+    m.cancel_toast("high")
+    m.lifecycle.process_due(frozen_time[0])
+    assert sorted(t.toast_id for t in m.toasts) == ["normal"]
+
+
+def test_invalid_actions_dropped_like_widget_mode(headless, frozen_time):
+    """无效动作按钮：同控件模式返回 None（不抛出），定时通知到期时也不会中断调度"""
+    assert headless.show_toast("x", "y", actions=[{"bad": 1}]) is None
+    headless.scheduler.schedule({"title": "bad", "actions": [{"bad": 1}]}, frozen_time[0] - 1)
+    headless.scheduler.schedule({"title": "ok", "duration": 60000}, frozen_time[0] - 1)
+    headless.scheduler._on_timeout()
+    assert [t.title for t in headless.toasts] == ["ok"]
+
+
+def test_toast_list_order_and_index():
+    """ToastList：迭代与下标均按插入顺序；remove 后下标访问重建缓存"""
+    items = ToastList()
+    for name in "abcd":
+        items.append(name)
+    assert items[0] == "a" and items[-1] == "d" and items[1:3] == ["b", "c"]
+    items.remove("b")
+    items.append("e")
+    assert list(items) == ["a", "c", "d", "e"] and items[1] == "c" and items[-1] == "e"
+    assert "b" not in items and len(items) == 4
+
+
+def test_timer_drives_lifecycle(qtbot, qapp):
+    """不手动推进时由单个 QTimer 按最近截止时间驱动"""
+    m = ToastManager(headless=True)
+    m.handle_payload({"title": "x", "duration": 50})
+    qtbot.waitUntil(lambda: len(m.toasts) == 0, timeout=2000)
+    assert m.lifecycle.pending() == 0
@@ -0,0 +1,140 @@
+"""回环 HTTP 接入：单条/批量 JSON、keep-alive、流水线顺序、超大请求体拒绝"""
+import http.client
+import json
+import socket
+import threading
+import pytest
+from toast import LocalServer
+
+
+def run_in_thread(qtbot, fn):
+    """客户端在普通 Python 线程中阻塞收发（纯 socket，不涉及 Qt），GUI 线程继续处理事件"""
+    result = {}
+
+    def target():
+        try:
+            result["value"] = fn()
+        except Exception as e:  # 交回主线程断言
+            result["error"] = e
+    t = threading.Thread(target=target, daemon=True)
+    t.start()
+    qtbot.waitUntil(lambda: not t.is_alive(), timeout=5000)
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
+
+
+@pytest.fixture
+def bridge(qtbot, manager):
+    srv = LocalServer(name="toast_test_http", threaded=True, handler=manager.handle_payload,
+                      pass_origin=True, http_port=0)
+    yield srv
+    srv.close()
+
+
+def post(conn, body):
+    conn.request("POST", "/notify", body=json.dumps(body), headers={"Content-Type": "application/json"})
+    resp = conn.getresponse()
+    return resp.status, json.loads(resp.read())
+
+
+def test_single_and_batch_over_keep_alive(qtbot, bridge, manager):
+    """同一 keep-alive 连接：单条返回状态对象，批量返回逐条状态（无效项为 invalid）"""
+    def client():
+        conn = http.client.HTTPConnection("127.0.0.1", bridge.http.port, timeout=5)
+        single = post(conn, {"title": "a", "duration": 60000})
+        first_sock = conn.sock
+        batch = post(conn, [{"title": "b", "duration": 60000, "id": "b"},
+                            {"title": "b2", "id": "b"}, {"duration": "x"}, 7])
+        reused = conn.sock is first_sock
+        conn.close()
+        return single, batch, reused
+    single, batch, reused = run_in_thread(qtbot, client)
+    assert single[0] == 200 and single[1]["status"] == "accepted"
+    assert batch[0] == 200
+    assert [r["status"] for r in batch[1]] == ["accepted", "deduped", "invalid", "invalid"]
+    assert reused
+    assert len(manager.toasts) == 2
+
+
+def test_routes_and_errors(qtbot, bridge):
+    """GET /health 探活；未知路径 404；非 POST 405；JSON 错误 400"""
+    def client():
+        conn = http.client.HTTPConnection("127.0.0.1", bridge.http.port, timeout=5)
+        out = []
+        for method, path, body in (("GET", "/health", None), ("GET", "/other", None),
+                                   ("GET", "/notify", None), ("POST", "/notify", "{oops")):
+            conn.request(method, path, body=body, headers={"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            out.append((resp.status, json.loads(resp.read())["status"]))
+        conn.close()
+        return out
+    assert run_in_thread(qtbot, client) == [(200, "ok"), (404, "invalid"), (405, "invalid"),
+                                            (400, "invalid")]
+
+
+def test_cross_site_requests_rejected(qtbot, manager):
+    """浏览器简单请求（非 JSON Content-Type）415；带未许可 Origin 403；许可的 Origin 照常处理"""
+    srv = LocalServer(name="toast_test_http_origin", threaded=True, handler=manager.handle_payload,
+                      pass_origin=True, http_port=0, http_origins=["http://localhost:3000"])
+
+    def client():
+        conn = http.client.HTTPConnection("127.0.0.1", srv.http.port, timeout=5)
+        out = []
+        for headers in ({"Content-Type": "text/plain"}, {},
+                        {"Content-Type": "application/json", "Origin": "https://evil.example"},
+                        {"Content-Type": "application/json; charset=utf-8", "Origin": "http://localhost:3000"}):
+            conn.request("POST", "/notify", body=json.dumps({"title": "x", "req": 1}), headers=headers)
+            resp = conn.getresponse()
+            out.append((resp.status, json.loads(resp.read())["status"]))
+        conn.close()
+        return out
+    try:
+        assert run_in_thread(qtbot, client) == [(415, "invalid"), (415, "invalid"), (403, "invalid"),
+                                                (200, "accepted")]
+        assert len(manager.toasts) == 1
+    finally:
+        srv.close()
+
+
+def test_pipelined_requests_answered_in_order(qtbot, bridge):
+    """一次写入两个请求：响应按请求顺序返回"""
+    def client():
+        reqs = b""
+        for title in ("p1", "p2"):
+            body = json.dumps({"title": title, "id": title, "req": title}).encode()
+            reqs += (b"POST /notify HTTP/1.1\r\nHost: x\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n" % len(body)) + body
+        reqs += b"GET /health HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n"
+        with socket.create_connection(("127.0.0.1", bridge.http.port), timeout=5) as s:
+            s.sendall(reqs)
+            data = b""
+            while True:
+                chunk = s.recv(65536)
+                if not chunk:
+                    return data
+                data += chunk
+    data = run_in_thread(qtbot, client)
+    bodies = [json.loads(part.split(b"\r\n\r\n", 1)[1]) for part in data.split(b"HTTP/1.1 ")[1:]]
+    assert [b.get("req") for b in bodies] == ["p1", "p2", None]
+
+
+def test_oversized_body_rejected_before_reading(qtbot, manager):
+    """Content-Length 超过上限：不等待请求体，直接 413 并断开"""
+    from toast import PayloadSchema
+    srv = LocalServer(name="toast_test_http_big", threaded=True, handler=manager.handle_payload,
+                      http_port=0, schema=PayloadSchema(max_frame_bytes=1024))
+
+    def client():
+        with socket.create_connection(("127.0.0.1", srv.http.port), timeout=5) as s:
+            s.sendall(b"POST /notify HTTP/1.1\r\nHost: x\r\nContent-Length: 50000000\r\n\r\n")
+            data = b""
+            while True:
+                chunk = s.recv(65536)
+                if not chunk:
+                    return data
+                data += chunk
+    try:
+        data = run_in_thread(qtbot, client)
+        assert data.startswith(b"HTTP/1.1 413")
+    finally:
+        srv.close()
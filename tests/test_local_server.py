@@ -10,7 +10,7 @@ import json
 import pytest
 from PySide6 import QtCore, QtNetwork
 import toast as toast_mod
-from toast import LocalServer, send_message
+from toast import LocalServer, send_message, send_request
 
 
 def test_server_starts_and_listens(qtbot):
@@ -63,3 +63,68 @@ def test_server_multiple_connections_queued(qtbot):
         assert received_idx == [0, 1, 2]
     finally:
         srv.server.close()
+
+
+def test_threaded_server_parses_off_gui_thread(qtbot, monkeypatch):
+    """threaded=True：分帧/解码在 worker 线程，GUI 线程收到解析好的批次"""
+    import threading
+    gui_thread = threading.get_ident()
+    decode_threads = set()
+    original = toast_mod.decode_frame
+
+    def spy(raw):
+        decode_threads.add(threading.get_ident())
+        return original(raw)
+    monkeypatch.setattr(toast_mod, "decode_frame", spy)
+
+    received = []
+    srv = LocalServer(name="toast_test_threaded", threaded=True)
+    srv.message.connect(lambda d: received.append((threading.get_ident(), d)))
+    try:
+        assert send_message({"title": "T", "message": "M"}, name="toast_test_threaded")
+        qtbot.waitUntil(lambda: len(received) == 1, timeout=3000)
+        assert received[0] == (gui_thread, {"title": "T", "message": "M"})
+        assert decode_threads and gui_thread not in decode_threads
+    finally:
+        srv.close()
+    assert not srv.server.isListening()
+
+
+def test_threaded_server_request_reply(qtbot):
+    """threaded=True：send_request 收到 handler 的回复
+    （客户端在子进程中阻塞等待，GUI 线程保持事件循环处理批次）"""
+    import os
+    import subprocess
+    import sys
+    srv = LocalServer(name="toast_test_threaded_reply", threaded=True,
+                      handler=lambda p: {"status": "ok", "echo": p["n"]})
+    code = ("import json, toast; "
+            "print(json.dumps(toast.send_request({'n': 42}, name='toast_test_threaded_reply', "
+            "timeout=3000)))")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root, QT_QPA_PLATFORM="offscreen")
+    proc = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE, env=env)
+    try:
+        qtbot.waitUntil(lambda: proc.poll() is not None, timeout=10000)
+        assert json.loads(proc.stdout.read()) == {"status": "ok", "echo": 42}
+    finally:
+        proc.kill()
+        proc.stdout.close()
+        srv.close()
+
+
+def test_split_utf8_frame_reassembled(qtbot):
+    """多字节字符被读取边界截断时仍能正确解码"""
+    from unittest.mock import MagicMock
+    srv = LocalServer(name="toast_test_utf8")
+    received = []
+    srv.message.connect(received.append)
+    try:
+        data = (json.dumps({"title": "通知"}, ensure_ascii=False) + "\n").encode("utf-8")
+        sock = MagicMock()
+        for chunk in (data[:12], data[12:]):
+            sock.readAll.return_value.data.return_value = chunk
+            srv.read_data(sock)
+        assert received == [{"title": "通知"}]
+    finally:
+        srv.close()
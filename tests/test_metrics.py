@@ -0,0 +1,148 @@
+"""进程内指标：计数 / 瞬时值 / HDR 风格直方图，热路径计时与 IPC stats 命令"""
+import json
+import urllib.request
+import pytest
+from unittest.mock import MagicMock
+from toast import METRICS, Histogram, LocalServer, MetricsRegistry, SimulatedClock, ToastManager
+
+
+@pytest.fixture
+def metrics():
+    METRICS.reset()
+    yield METRICS
+    METRICS.enabled = True
+
+
+def test_histogram_percentiles_within_bucket_error():
+    """分位数取桶上界：相对误差不超过 1/SUB_BUCKETS，且不超过最大值"""
+    h = Histogram()
+    for ms in range(1, 1001):
+        h.observe(ms / 1000)
+    snap = h.snapshot()
+    assert snap["count"] == 1000 and snap["min"] == 0.001 and snap["max"] == 1.0
+    for q, exact in ((0.5, 0.5), (0.9, 0.9), (0.99, 0.99)):
+        assert exact <= h.percentile(q) <= exact * (1 + 1 / Histogram.SUB_BUCKETS)
+    for us in (0, 1, 31, 32, 1000, 123456789):
+        index = Histogram._index(us)
+        assert Histogram._upper(index - 1) < us <= Histogram._upper(index) if index else us == 0
+
+
+def test_registry_get_or_create_and_reset():
+    r = MetricsRegistry()
+    r.counter("a_total").inc(3)
+    r.gauge("live").set(7)
+    r.histogram("lat_seconds").observe(0.002)
+    assert r.counter("a_total").value == 3
+    with pytest.raises(TypeError):
+        r.gauge("a_total")
+    snap = r.snapshot()
+    assert snap["counters"] == {"a_total": 3} and snap["gauges"] == {"live": 7}
+    assert snap["histograms"]["lat_seconds"]["count"] == 1
+    hist = r.histogram("lat_seconds")
+    r.reset()
+    assert r.counter("a_total").value == 0 and hist.count == 0 and r.histogram("lat_seconds") is hist
+
+
+def test_hot_paths_timed(qtbot, manager, metrics):
+    """add_toast / adjust_height 每次调用记入直方图；关闭计时后不再记录"""
+    for i in range(5):
+        manager.show_toast(f"t{i}", "m", duration=60000)
+    hists = metrics.snapshot()["histograms"]
+    assert hists["container_add_toast_seconds"]["count"] == 5
+    assert hists["container_adjust_height_seconds"]["count"] >= 5
+    metrics.enabled = False
+    manager.show_toast("x", "m", duration=60000)
+    assert metrics.histogram("container_add_toast_seconds").count == 5
+    assert metrics.counter("toasts_created_total").value == 6
+
+
+def test_lifecycle_counters_and_stats_command(qapp, metrics):
+    """创建 / 原地更新 / 丢弃 / 淘汰 / 到期 / 关闭计数；stats 命令带回瞬时值"""
+    clock = SimulatedClock()
+    m = ToastManager(headless=True, max_visible=2, clock=clock)
+    m.handle_payload({"id": "a", "title": "a", "duration": 1000, "priority": "high"})
+    m.handle_payload({"id": "a", "message": "again"})
+    m.handle_payload({"title": "b", "duration": 60000, "priority": "high"})
+    m.handle_payload({"title": "c", "priority": "low"})           # 低于全部可见：丢弃
+    m.handle_payload({"title": "d", "priority": "critical"})      # 淘汰一条 high
+    reply = m.handle_payload({"cmd": "stats", "req": 1})
+    counters = reply["metrics"]["counters"]
+    assert reply["status"] == "ok"
+    assert (counters["toasts_created_total"], counters["toasts_updated_total"],
+            counters["toasts_dropped_total"], counters["toasts_evicted_total"]) == (3, 1, 1, 1)
+    assert reply["metrics"]["gauges"]["toasts_live"] == 3  # 被淘汰者在下一次处理时才关闭
+    clock.advance(120)
+    counters = m.stats()["counters"]
+    assert counters["toasts_closed_total"] == 3 and counters["toasts_expired_total"] >= 1
+    assert m.stats()["gauges"]["toasts_live"] == 0
+
+
+def test_ipc_frames_and_latency(metrics):
+    """每个已分发的帧记录一次 IPC 延迟；无效帧单独计数"""
+    srv = LocalServer(name="toast_test_metrics", handler=lambda p: None)
+    try:
+        sock = MagicMock()
+        sock.readAll.return_value.data.return_value = b'{"title": "a"}\nnot json\n{"title": "b"}\n'
+        srv.read_data(sock)
+    finally:
+        srv.close()
+    snap = metrics.snapshot()
+    assert snap["counters"]["ipc_frames_total"] == 3
+    assert snap["counters"]["ipc_invalid_total"] == 1
+    assert snap["histograms"]["ipc_latency_seconds"]["count"] == 2
+    assert snap["histograms"]["ipc_read_seconds"]["count"] == 1
+
+
+def test_dump_writes_json(tmp_path, metrics):
+    """dump 以 JSON 写出快照（--metrics-file 在退出时调用）"""
+    path = tmp_path / "metrics.json"
+    metrics.counter("toasts_created_total").inc(2)
+    metrics.dump(str(path))
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert data["counters"]["toasts_created_total"] == 2
+    assert set(data) == {"counters", "gauges", "histograms"}
+
+
+def test_prometheus_text_format(metrics):
+    """计数 / 瞬时值 / 直方图按 Prometheus 文本格式导出；le 桶累计且 +Inf 等于总数"""
+    metrics.counter("ipc_frames_total").inc(4)
+    metrics.counter("ipc_frames_read_total").inc(7)
+    hist = metrics.histogram("loop_lag_seconds")
+    for seconds in (0.0001, 0.003, 0.04, 2.0):
+        hist.observe(seconds)
+    lines = metrics.prometheus().decode().splitlines()
+    assert "# TYPE toast_ipc_frames_total counter" in lines and "toast_ipc_frames_total 4" in lines
+    assert "# TYPE toast_ipc_queue_depth gauge" in lines and "toast_ipc_queue_depth 3" in lines
+    buckets = {line.split('"')[1]: int(line.rsplit(" ", 1)[1])
+               for line in lines if line.startswith("toast_loop_lag_seconds_bucket")}
+    assert (buckets["0.001"], buckets["0.005"], buckets["0.05"], buckets["1"], buckets["+Inf"]) == (1, 2, 3, 3, 4)
+    assert "toast_loop_lag_seconds_count 4" in lines
+
+
+def test_scrape_served_off_gui_thread(qapp, metrics):
+    """抓取端点在 IPC worker 线程响应：GUI 线程阻塞在请求上时仍能拿到结果"""
+    srv = LocalServer(name="toast_test_prometheus", threaded=True, metrics_port=0)
+    try:
+        metrics.gauge("toasts_live").set(5)
+        url = f"http://127.0.0.1:{srv.exporter.port}"
+        with urllib.request.urlopen(url + "/metrics", timeout=5) as resp:
+            assert resp.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert "toast_toasts_live 5" in resp.read().decode().splitlines()
+        with pytest.raises(urllib.error.HTTPError) as e:
+            urllib.request.urlopen(url + "/other", timeout=5)
+        assert e.value.code == 404
+    finally:
+        srv.close()
+
+
+def test_live_gauges_follow_lifecycle(qapp, metrics):
+    """存活数 / 待触发调度 / 历史条数随变化即时更新，抓取无需调用 stats()"""
+    clock = SimulatedClock()
+    m = ToastManager(headless=True, clock=clock)
+    m.handle_payload({"title": "a", "duration": 1000, "show_countdown": True})
+    m.handle_payload({"title": "b", "every": "1h"})
+    gauges = metrics.snapshot()["gauges"]
+    assert gauges["toasts_live"] == 1 and gauges["schedules_pending"] == 1
+    clock.advance(10)
+    gauges = metrics.snapshot()["gauges"]
+    assert gauges["toasts_live"] == 0 and gauges["expired_history_records"] == 1
@@ -0,0 +1,101 @@
+"""payload 校验与大小上限：字段类型、服务端截断、超长帧丢弃、正文折叠展开"""
+import pytest
+from unittest.mock import MagicMock
+from PySide6 import QtCore
+import toast as toast_mod
+from toast import LocalServer, PayloadSchema, Toast, send_message
+
+
+def test_schema_rejects_bad_types():
+    """已知字段类型不符/取值非法时抛 ValueError；未知字段原样保留"""
+    schema = PayloadSchema()
+    for bad in ({"title": 1}, {"duration": "3000"}, {"duration": True},
+                {"priority": "urgent"}, {"duration": -1}, {"show_countdown": "yes"}):
+        with pytest.raises(ValueError):
+            schema.validate(bad)
+    ok = schema.validate({"title": "t", "duration": 2.5, "id": 7, "extra": [1, 2]})
+    assert ok == {"title": "t", "duration": 2.5, "id": 7, "extra": [1, 2]}
+
+
+def test_schema_truncates_long_fields():
+    """超长标题/正文截断并加省略号；不修改原 dict"""
+    schema = PayloadSchema(max_title_chars=5, max_message_chars=10)
+    p = {"title": "x" * 50, "message": "y" * 1000}
+    out = schema.validate(p)
+    assert out["title"] == "xxxxx…"
+    assert out["message"] == "y" * 10 + "…"
+    assert len(p["message"]) == 1000
+
+
+def test_oversized_frame_discarded_without_buffering(qtbot):
+    """超长帧跨多次读取：边读边丢弃，缓冲不超过上限，后续帧正常解析"""
+    srv = LocalServer(name="toast_test_oversize", schema=PayloadSchema(max_frame_bytes=100))
+    received = []
+    srv.message.connect(received.append)
+    try:
+        sock = MagicMock()
+        for chunk in (b'{"title": "' + b"a" * 80, b"a" * 500, b"a" * 500, b'"}\n{"title": "ok"}\n'):
+            sock.readAll.return_value.data.return_value = chunk
+            srv.read_data(sock)
+            assert len(srv.ingest._buffers[sock]) <= 100
+        assert received == [{"title": "ok"}]
+    finally:
+        srv.close()
+
+
+def test_oversized_and_invalid_lines_in_one_read(qtbot):
+    """同一次读取中的超长行/校验失败行被跳过，不影响其余帧"""
+    srv = LocalServer(name="toast_test_oversize_line", schema=PayloadSchema(max_frame_bytes=100))
+    received = []
+    srv.message.connect(received.append)
+    try:
+        sock = MagicMock()
+        sock.readAll.return_value.data.return_value = (
+            b'{"message": "' + b"m" * 200 + b'"}\n{"duration": "x"}\n{"n": 1}\n')
+        srv.read_data(sock)
+        assert received == [{"n": 1}]
+    finally:
+        srv.close()
+
+
+def test_large_frame_over_socket_dropped(qtbot):
+    """真实连接：数 MB 的帧被丢弃，之后的正常消息照常到达"""
+    srv = LocalServer(name="toast_test_big_frame", threaded=True,
+                      schema=PayloadSchema(max_frame_bytes=64 * 1024))
+    received = []
+    srv.message.connect(received.append)
+    try:
+        assert send_message({"message": "z" * (3 * 1024 * 1024)}, name="toast_test_big_frame")
+        assert send_message({"title": "after"}, name="toast_test_big_frame")
+        qtbot.waitUntil(lambda: len(received) == 1, timeout=5000)
+        assert received == [{"title": "after"}]
+    finally:
+        srv.close()
+
+
+def test_long_message_elided_and_expands_on_click(qtbot, frozen_time):
+    """长正文只显示折叠预览，完整内容保留；单击展开、再次单击收起"""
+    text = "\n".join(f"line {i}" for i in range(5000))
+    t = Toast("t", text, duration=60000)
+    qtbot.addWidget(t)
+    assert t.message == text
+    assert t.message_elided
+    preview = t.msg_lbl.text()
+    assert len(preview) <= toast_mod.MESSAGE_PREVIEW_CHARS + 2
+    assert preview.count("\n") < toast_mod.MESSAGE_PREVIEW_LINES
+    changed = []
+    t.content_changed.connect(changed.append)
+    qtbot.mouseClick(t, QtCore.Qt.MouseButton.LeftButton)
+    assert t.msg_lbl.text() == text
+    assert changed == [t]
+    qtbot.mouseClick(t, QtCore.Qt.MouseButton.LeftButton)
+    assert t.msg_lbl.text() == preview
+
+
+def test_short_message_not_elided(qtbot, frozen_time):
+    """短正文原样显示，单击不触发展开"""
+    t = Toast("t", "short", duration=60000)
+    qtbot.addWidget(t)
+    assert not t.message_elided
+    assert not t.toggle_message_expanded()
+    assert t.msg_lbl.text() == "short"
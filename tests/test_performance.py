@@ -45,6 +45,29 @@ def test_perf_batch_insert_100_toasts_under_5s(qtbot, manager, frozen_time):
     assert elapsed < 5.0, f"插入 100 个 toast 耗时 {elapsed:.3f}s 超过 5s"
 
 
+
+@pytest.mark.stress
+def test_perf_no_frame_over_50ms_inserting_100_toasts(qtbot, manager):
+    """逐条插入 100 个 toast（每条之间回到事件循环，模拟 IPC 到达）：
+    容器动画帧间隔与事件循环延迟的 p99 都在 50ms 以内，超过 50ms 的卡顿至多 1 次。
+    不断言单帧最大值：墙钟下偶发的调度抖动（如 51ms）不代表回归"""
+    watchdog = toast_mod.LoopWatchdog(stall_ms=50)
+    manager.container.frame_monitor = watchdog
+    watchdog.start()
+    try:
+        for i in range(100):
+            manager.show_toast(f"t{i}", "m", duration=60000, show_countdown=True)
+            qtbot.wait(1)
+        qtbot.wait(300)
+    finally:
+        watchdog.stop()
+    report = watchdog.report()
+    assert report["frame_interval"]["count"] > 0
+    assert report["frame_interval"]["p99"] < 0.05, f"帧间隔 p99 {report['frame_interval']['p99'] * 1000:.0f}ms"
+    assert report["loop_lag"]["p99"] < 0.05, f"事件循环延迟 p99 {report['loop_lag']['p99'] * 1000:.0f}ms"
+    assert report["stalls"] <= 1, f"{report['stalls']} 次超过 50ms 的卡顿"
+
+
 # ========== 数据结构性能 ==========
 
 def test_perf_expired_history_add_1000_records_under_50ms():
@@ -70,6 +93,21 @@ def test_perf_expired_overlay_render_100_records_under_100ms(qtbot, mock_screen)
     assert elapsed < 0.1, f"渲染 100 条记录耗时 {elapsed:.3f}s 超过 100ms"
 
 
+@pytest.mark.slow
+def test_perf_theme_switch_200_toasts_under_1s(qtbot, mock_screen):
+    """200 个存活 toast 运行时切换主题（含随后的重绘事件）<1s"""
+    m = ToastManager(no_expired_history=False, motion="off")
+    qtbot.addWidget(m.container)
+    for i in range(200):
+        m.show_toast(f"t{i}", "m", duration=600000, show_countdown=i % 2 == 0)
+    qtbot.wait(10)
+    start = time.perf_counter()
+    assert m.set_theme("light") == 200
+    qtbot.wait(0)
+    elapsed = time.perf_counter() - start
+    assert elapsed < 1.0, f"200 个 toast 切换主题耗时 {elapsed:.3f}s 超过 1s"
+
+
 def test_perf_sort_100_toasts_under_20ms(qtbot, mock_screen):
     """_sort_toasts 100 条 <20ms"""
     c = ToastContainer(theme="dark", no_expired_history=True)
@@ -82,6 +120,7 @@ def test_perf_sort_100_toasts_under_20ms(qtbot, mock_screen):
         t.show_countdown = True
         t.expired_time = None
         t._insert_order = i
+        t.priority = "normal"
         toasts.append(t)
     start = time.perf_counter()
     c._sort_toasts(toasts)
@@ -89,6 +128,41 @@ def test_perf_sort_100_toasts_under_20ms(qtbot, mock_screen):
     assert elapsed < 0.02, f"排序 100 条耗时 {elapsed:.3f}s 超过 20ms"
 
 
+
+@pytest.mark.slow
+def test_perf_metrics_overhead_under_3_percent(qtbot, manager):
+    """指标开销 <3%：插入 100 个 toast 期间的计时/计数次数 × 单次开销，占插入总耗时的比例。
+    按次数估算而非两次运行相减，不受计时抖动影响"""
+    metrics = toast_mod.METRICS
+    metrics.reset()
+    start = time.perf_counter()
+    for i in range(100):
+        manager.show_toast(f"t{i}", "m", duration=60000, show_countdown=True)
+    elapsed = time.perf_counter() - start
+    snap = metrics.snapshot()
+    timed_calls = sum(h["count"] for h in snap["histograms"].values())
+    counter_incs = sum(snap["counters"].values())
+
+    n = 20000
+    bare = lambda: None  # noqa: E731
+    wrapped = toast_mod.timed("perf_probe_seconds")(bare)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        bare()
+    t1 = time.perf_counter()
+    for _ in range(n):
+        wrapped()
+    t2 = time.perf_counter()
+    for _ in range(n):
+        metrics.counter("perf_probe_total").inc()
+    t3 = time.perf_counter()
+    per_timed = max(0.0, (t2 - t1) - (t1 - t0)) / n
+    per_inc = (t3 - t2) / n
+    overhead = timed_calls * per_timed + counter_incs * per_inc
+    assert overhead / elapsed < 0.03, \
+        f"指标开销 {overhead * 1000:.2f}ms / 插入 {elapsed * 1000:.0f}ms 超过 3%"
+
+
 # ========== 内存 ==========
 
 @pytest.mark.slow
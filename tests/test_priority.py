@@ -0,0 +1,98 @@
+"""优先级：排序、显示上限淘汰、critical 跳过错峰与限流"""
+import pytest
+from unittest.mock import MagicMock
+from toast import ToastContainer, ToastManager, Toast
+
+
+def _vbox_titles(container):
+    return [container.vbox.itemAt(i).widget().title for i in range(container.vbox.count() - 1)]
+
+
+def _mock(priority, phase="active", remaining=10, order=0):
+    t = MagicMock()
+    t.priority, t.phase, t.show_countdown = priority, phase, True
+    t.remaining, t.expired_time, t._insert_order = remaining, None, order
+    return t
+
+
+def test_sort_priority_before_phase(qtbot, mock_screen):
+    """优先级高于阶段：high 的 active 排在 normal 的 expired 之前"""
+    c = ToastContainer(theme="dark", no_expired_history=True)
+    qtbot.addWidget(c)
+    normal_expired = _mock("normal", phase="expired")
+    normal_expired.expired_time = 1.0
+    high_active = _mock("high", remaining=100)
+    low = _mock("low", remaining=1)
+    assert c._sort_toasts([low, normal_expired, high_active]) == [high_active, normal_expired, low]
+
+
+def test_insert_keeps_vbox_ordered(qtbot, manager, frozen_time):
+    """插入时二分定位：critical 置顶，同优先级倒计时按 remaining 升序"""
+    manager.show_toast("n60", "m", duration=60000, show_countdown=True)
+    manager.show_toast("n10", "m", duration=10000, show_countdown=True)
+    manager.show_toast("crit", "m", duration=90000, show_countdown=True, priority="critical")
+    manager.show_toast("low", "m", duration=5000, show_countdown=True, priority="low")
+    assert _vbox_titles(manager.container) == ["crit", "n10", "n60", "low"]
+
+
+def test_tick_does_not_reorder(qtbot, manager, frozen_time, monkeypatch):
+    """倒计时 tick 不触发任何重排；进入过期阶段只重排该 toast"""
+    for d in (30000, 20000, 10000):
+        manager.show_toast(f"t{d}", "m", duration=d, show_countdown=True)
+    calls = []
+    monkeypatch.setattr(manager.container, "reorder_toasts", lambda: calls.append("full"))
+    for t in manager.toasts:
+        t._tick()
+    assert calls == []
+    slow = manager.toasts[0]
+    slow.remaining = 1
+    slow._tick()
+    assert calls == []
+    assert _vbox_titles(manager.container)[0] == "t30000"  # 过期 → 同优先级最上
+
+
+def test_priority_update_repositions(qtbot, manager, frozen_time):
+    """原地更新优先级后重新定位"""
+    manager.handle_payload({"id": "a", "title": "a", "message": "m", "duration": 60000})
+    manager.handle_payload({"id": "b", "title": "b", "message": "m", "duration": 60000})
+    assert _vbox_titles(manager.container) == ["b", "a"]
+    a, b = manager.toasts
+    qtbot.waitUntil(lambda: not a._entering and not b._entering, timeout=2000)
+    manager.handle_payload({"id": "a", "priority": "high"})
+    assert _vbox_titles(manager.container) == ["a", "b"]
+    # 新几何同步排版得出（不转事件循环），移动的 toast 从旧位置滑向新位置
+    assert manager.container.animator.is_animating(a, "geometry")
+
+
+def test_max_visible_evicts_lowest_priority(qtbot, manager, frozen_time):
+    """超出显示上限时淘汰优先级最低者；新 toast 优先级最低时直接丢弃"""
+    manager.max_visible = 2
+    low = manager.show_toast("low", "m", duration=60000, priority="low")
+    high = manager.show_toast("high", "m", duration=60000, priority="high")
+    normal = manager.show_toast("normal", "m", duration=60000)
+    assert low._exiting is True
+    assert normal is not None and not high._exiting
+    assert manager.show_toast("low2", "m", duration=60000, priority="low") is None
+
+
+def test_rate_limit_exempts_critical(qtbot, mock_screen, frozen_time):
+    """限流后普通 toast 被丢弃，critical 仍然显示"""
+    m = ToastManager(theme="dark", no_expired_history=True, rate_limit=2)
+    qtbot.addWidget(m.container)
+    assert m.show_toast("a", "m") is not None
+    assert m.show_toast("b", "m") is not None
+    assert m.show_toast("c", "m") is None
+    assert m.show_toast("alert", "m", priority="critical") is not None
+    frozen_time[0] += 1  # 补充令牌
+    assert m.show_toast("d", "m") is not None
+    m.container.close()
+
+
+def test_critical_skips_stagger(qtbot, manager, frozen_time):
+    """critical 立即入场，不占用错峰名额"""
+    manager.show_toast("a", "m", duration=60000)
+    second = manager.show_toast("b", "m", duration=60000)
+    crit = manager.show_toast("c", "m", duration=60000, priority="critical")
+    assert second._entry_timer.interval() == 60
+    assert crit._entry_timer.interval() == 0
+    assert manager.container._stagger_count == 2
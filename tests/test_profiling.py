@@ -0,0 +1,92 @@
+"""按需剖析：IPC 启停 cProfile / 采样剖析并写出结果；热路径计时关闭后零开销"""
+import os
+import pstats
+import time
+import pytest
+import toast as toast_mod
+from toast import METRICS, PROFILER, IpcIngest, ToastContainer, ToastManager
+
+LOCAL = 1  # 本地 socket 连接 ID（剖析命令只接受本地 socket 来源）
+
+
+@pytest.fixture
+def headless(qapp, tmp_path, monkeypatch):
+    monkeypatch.setattr(toast_mod, "PROFILE_DIR", str(tmp_path / "profiles"))
+    m = ToastManager(headless=True)
+    yield m
+    PROFILER.stop()
+
+
+def _spin(seconds):
+    """在 GUI 线程忙等，供采样剖析抓取"""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_cprofile_over_ipc(tmp_path, headless):
+    path = str(tmp_path / "profiles" / "server.pstats")
+    reply = headless.handle_payload({"cmd": "profile_start", "path": "server.pstats"}, LOCAL)
+    assert reply == {"status": "ok", "path": path, "mode": "cprofile"}
+    for i in range(20):
+        headless.handle_payload({"title": f"t{i}", "duration": 60000})
+    reply = headless.handle_payload({"cmd": "profile_stop"}, LOCAL)
+    assert reply["status"] == "ok" and reply["path"] == path
+    funcs = {name for _, _, name in pstats.Stats(path).stats}
+    assert "show_toast" in funcs
+
+
+def test_sampling_writes_collapsed_stacks(tmp_path, headless):
+    """扩展名为 .folded 时改用采样线程，写出 "根;...;叶 次数" 折叠栈"""
+    path = tmp_path / "profiles" / "server.folded"
+    assert headless.handle_payload({"cmd": "profile_start", "path": "server.folded"}, LOCAL)["mode"] == "sample"
+    _spin(0.2)
+    reply = headless.handle_payload({"cmd": "profile_stop"}, LOCAL)
+    assert reply["samples"] > 0
+    lines = path.read_text(encoding="utf-8").splitlines()
+    stack, count = lines[0].rsplit(" ", 1)
+    assert "_spin" in stack.split(";")[-1] and int(count) > 0
+
+
+def test_profile_command_errors(tmp_path, headless):
+    assert headless.handle_payload({"cmd": "profile_stop"}, LOCAL) == {"status": "not_running"}
+    assert headless.handle_payload({"cmd": "profile_start"}, LOCAL)["status"] == "invalid"
+    assert headless.handle_payload({"cmd": "profile_start", "path": "a.pstats",
+                                    "mode": "bogus"}, LOCAL)["status"] == "invalid"
+    headless.handle_payload({"cmd": "profile_start", "path": "a.folded"}, LOCAL)
+    again = headless.handle_payload({"cmd": "profile_start", "path": "b.folded"}, LOCAL)
+    assert again["status"] == "invalid" and "already" in again["error"]
+
+
+def test_profile_commands_cannot_overwrite_files(tmp_path, headless):
+    """非本地 socket 来源（HTTP 为 None）拒绝；只能写 PROFILE_DIR 下不存在的文件名"""
+    victim = tmp_path / "victim"
+    victim.write_text("keep", encoding="utf-8")
+    for origin, path in ((None, "x.folded"), (LOCAL, str(victim)), (LOCAL, "../victim"), (LOCAL, "..")):
+        reply = headless.handle_payload({"cmd": "profile_start", "path": path, "mode": "sample"}, origin)
+        assert reply["status"] == "invalid" and not PROFILER.active
+    assert headless.handle_payload({"cmd": "profile_stop"})["status"] == "invalid"
+    profiles = tmp_path / "profiles"
+    profiles.mkdir()
+    (profiles / "taken.folded").write_text("keep", encoding="utf-8")
+    reply = headless.handle_payload({"cmd": "profile_start", "path": "taken.folded"}, LOCAL)
+    assert reply["status"] == "invalid" and "exists" in reply["error"]
+    # start 之后被抢先创建（如符号链接）：stop 拒绝写出
+    headless.handle_payload({"cmd": "profile_start", "path": "late.folded"}, LOCAL)
+    os.symlink(victim, profiles / "late.folded")
+    reply = headless.handle_payload({"cmd": "profile_stop"}, LOCAL)
+    assert reply["status"] == "invalid" and not PROFILER.active
+    assert victim.read_text(encoding="utf-8") == "keep"
+
+
+def test_disabled_spans_are_original_methods():
+    """关闭计时后类属性换回原方法（没有包装层），重新开启后恢复计时包装"""
+    try:
+        METRICS.enabled = False
+        for cls, name in ((ToastContainer, "add_toast"), (IpcIngest, "read_data")):
+            assert not hasattr(getattr(cls, name), "__wrapped__")
+        METRICS.enabled = True
+        assert ToastContainer.add_toast.__wrapped__.__name__ == "add_toast"
+        assert IpcIngest.read_data.__wrapped__.__name__ == "read_data"
+    finally:
+        METRICS.enabled = True
@@ -0,0 +1,59 @@
+"""进度 toast：确定进度条、按帧合并、完成后进入过期阶段"""
+import pytest
+import toast as toast_mod
+from toast import Toast
+
+
+def test_progress_bar_only_for_progress_toast(qtbot, frozen_time):
+    """progress=None 不创建进度条；给出 progress 时创建并设置初值"""
+    plain = Toast("t", "m", duration=3000)
+    bar = Toast("t", "m", duration=3000, progress=40)
+    qtbot.addWidget(plain)
+    qtbot.addWidget(bar)
+    assert plain.progress_bar is None
+    assert bar.progress_bar is not None
+    assert bar.progress_bar.value() == 40
+
+
+def test_progress_values_clamped(qtbot, frozen_time):
+    """超出 0~100 的值被截断，非数字按 0 处理"""
+    t = Toast("t", "m", duration=60000, progress=-5)
+    qtbot.addWidget(t)
+    assert t.progress == 0
+    assert Toast._clamp_progress(250) == 100
+    assert Toast._clamp_progress("abc") == 0
+
+
+def test_progress_updates_coalesced_per_frame(qtbot, frozen_time):
+    """一帧内多次 set_progress 只写一次进度条"""
+    t = Toast("t", "m", duration=60000, progress=0)
+    qtbot.addWidget(t)
+    values = []
+    t.progress_bar.valueChanged.connect(values.append)
+    for i in range(1, 80):
+        t.set_progress(i)
+    qtbot.waitUntil(lambda: t.progress == 79, timeout=1000)
+    assert values == [79]
+
+
+def test_progress_completion_enters_expired(qtbot, manager_with_history, frozen_time):
+    """进度到 100 后进入过期阶段，并写入 ExpiredHistory"""
+    m = manager_with_history
+    m.handle_payload({"id": "job", "title": "Build", "message": "m", "progress": 10})
+    toast = m.toasts[0]
+    m.handle_payload({"id": "job", "progress": 100})
+    qtbot.waitUntil(lambda: toast.phase == "expired", timeout=1000)
+    assert toast.countdown_lbl.text() == toast_mod.tr("progress_done")
+    assert m.expired_history.count() == 1
+    assert m.expired_history.all()[0].title == "Build"
+
+
+def test_progress_restart_after_completion(qtbot, frozen_time):
+    """完成后再收到 <100 的进度，toast 回到 ACTIVE"""
+    t = Toast("t", "m", duration=60000, progress=100)
+    qtbot.addWidget(t)
+    qtbot.waitUntil(lambda: t.phase == "expired", timeout=1000)
+    t.set_progress(5)
+    t._apply_pending_update()
+    assert t.phase == "active"
+    assert t.progress_bar.value() == 5
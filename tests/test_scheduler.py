@@ -0,0 +1,148 @@
+"""定时/周期通知：最小堆调度器 + IPC 命令 + 持久化"""
+import json
+import time
+import pytest
+from unittest.mock import MagicMock
+import toast as toast_mod
+from toast import ToastScheduler, LocalServer, parse_at, parse_interval
+
+
+def test_parse_interval_units():
+    """数字按秒；支持 s/m/h/d 单位"""
+    assert parse_interval(90) == 90
+    assert parse_interval("30m") == 1800
+    assert parse_interval("2h") == 7200
+    with pytest.raises(ValueError):
+        parse_interval("0s")
+
+
+def test_parse_at_clock_time_rolls_to_tomorrow():
+    """HH:MM 已过则顺延到明天"""
+    now = time.mktime((2024, 5, 1, 15, 0, 0, 0, 0, -1))
+    assert parse_at("16:30", now) == time.mktime((2024, 5, 1, 16, 30, 0, 0, 0, -1))
+    assert parse_at("14:00", now) == time.mktime((2024, 5, 2, 14, 0, 0, 0, 0, -1))
+    assert parse_at(now + 5, now) == now + 5
+
+
+def test_scheduler_single_timer_batches_due_items(qtbot, frozen_time):
+    """同时到期的多项合并为一次 due 信号，按到期时间顺序"""
+    s = ToastScheduler()
+    now = frozen_time[0]
+    s.schedule({"title": "b"}, now + 2)
+    s.schedule({"title": "a"}, now + 1)
+    s.schedule({"title": "later"}, now + 100)
+    batches = []
+    s.due.connect(batches.append)
+    frozen_time[0] += 5
+    s._on_timeout()
+    assert batches == [[{"title": "a"}, {"title": "b"}]]
+    assert s.count() == 1
+    assert s._timer.isActive()  # 已为下一项重新布置
+
+
+def test_scheduler_recurring_and_cancel(qtbot, frozen_time):
+    """周期项触发后推进到下一周期；取消后不再触发"""
+    s = ToastScheduler()
+    now = frozen_time[0]
+    sid = s.schedule({"title": "r"}, now + 10, every=30)
+    frozen_time[0] += 75  # 错过两个周期，只补发一次
+    fired = []
+    s.due.connect(fired.append)
+    s._on_timeout()
+    assert len(fired) == 1
+    assert s.list()[0]["due"] == now + 100
+    assert s.cancel(sid) is True
+    assert s.cancel(sid) is False
+    frozen_time[0] += 1000
+    s._on_timeout()
+    assert len(fired) == 1
+
+
+def test_scheduler_10000_inserts_fast(qtbot, frozen_time):
+    """一万项插入 + 列出前 10 项 <1s（O(log n) 插入）"""
+    s = ToastScheduler()
+    now = frozen_time[0]
+    start = time.perf_counter()
+    for i in range(10000):
+        s.schedule({"title": f"t{i}"}, now + 10000 - i)
+    items = s.list(limit=10)
+    elapsed = time.perf_counter() - start
+    assert s.count() == 10000
+    assert items[0]["payload"]["title"] == "t9999"
+    assert elapsed < 1.0
+
+
+def test_scheduler_persistence_round_trip(qtbot, frozen_time, tmp_path):
+    """持久化后重启恢复待触发项，schedule_id 不复用"""
+    path = str(tmp_path / "schedules.json")
+    s1 = ToastScheduler(persist_path=path)
+    now = frozen_time[0]
+    sid = s1.schedule({"title": "keep"}, now + 60, every=3600)
+    s1.flush()
+    s2 = ToastScheduler(persist_path=path)
+    assert s2.list() == [{"schedule_id": sid, "payload": {"title": "keep"},
+                          "due": now + 60, "every": 3600}]
+    assert s2.schedule({"title": "new"}, now + 1) != sid
+
+
+def test_non_finite_and_too_short_schedules_rejected(qtbot, manager, frozen_time):
+    """inf / nan / 过短周期返回 invalid，不进入堆；之后的正常定时不受影响"""
+    for bad in ({"in": "inf"}, {"in": float("nan")}, {"at": float("inf")}, {"at": "-inf"},
+                {"every": "inf"}, {"every": 0.001}, {"every": "0.5s"}):
+        reply = manager.handle_payload({"title": "x", **bad})
+        assert reply["status"] == "invalid", bad
+    assert manager.scheduler.count() == 0
+    assert manager.handle_payload({"title": "ok", "in": 60})["status"] == "ok"
+    with pytest.raises(ValueError):
+        manager.scheduler.schedule({"title": "x"}, float("inf"))
+
+
+def test_poisoned_schedule_file_skipped_on_load(qtbot, frozen_time, tmp_path):
+    """持久化文件中的 Infinity / NaN / 过短周期逐条跳过，管理器照常启动"""
+    path = tmp_path / "schedules.json"
+    now = frozen_time[0]
+    path.write_text('{"next_id": Infinity, "items": ['
+                    '{"schedule_id": "s1", "payload": {"title": "inf"}, "due": Infinity, "every": null},'
+                    '{"schedule_id": "s2", "payload": {"title": "nan"}, "due": NaN, "every": null},'
+                    '{"schedule_id": "s3", "payload": {"title": "spin"}, "due": %r, "every": 0.001},'
+                    '{"schedule_id": "s4", "payload": {"title": "keep"}, "due": %r, "every": 3600}]}'
+                    % (now + 5, now + 60), encoding="utf-8")
+    m = toast_mod.ToastManager(schedule_file=str(path), headless=True)
+    assert [i["schedule_id"] for i in m.scheduler.list()] == ["s4"]
+    assert m.handle_payload({"title": "new", "in": 10})["status"] == "ok"
+
+
+def test_manager_schedule_commands(qtbot, manager, frozen_time):
+    """IPC 命令：show 带 at/in/every 即登记定时；list / cancel 返回回复"""
+    reply = manager.handle_payload({"title": "Stand-up", "message": "m", "in": 60})
+    assert reply["status"] == "ok"
+    assert manager.toasts == []
+    listed = manager.handle_payload({"cmd": "schedule_list"})
+    assert listed["total"] == 1
+    assert listed["items"][0]["payload"] == {"title": "Stand-up", "message": "m"}
+    assert manager.handle_payload({"cmd": "schedule_cancel",
+                                   "schedule_id": reply["schedule_id"]}) == {"status": "ok"}
+    assert manager.handle_payload({"cmd": "schedule", "title": "x"})["status"] == "invalid"
+
+
+def test_manager_shows_due_toast(qtbot, manager, frozen_time):
+    """到期后 payload 走正常 show 流程"""
+    manager.handle_payload({"title": "due", "message": "m", "in": 1, "duration": 60000})
+    frozen_time[0] += 2
+    manager.scheduler._on_timeout()
+    assert len(manager.toasts) == 1
+    assert manager.toasts[0].title == "due"
+
+
+def test_server_writes_handler_reply(qtbot):
+    """handler 返回 dict 时按行回复给发送方连接"""
+    srv = LocalServer(name="toast_test_reply", handler=lambda p: {"echo": p["n"]} if p["n"] else None)
+    try:
+        sock = MagicMock()
+        sock.readAll.return_value.data.return_value = b'{"n": 1}\n{"n": 0}\n{"n": 2'
+        srv.read_data(sock)
+        written = [c.args[0] for c in sock.write.call_args_list]
+        assert [json.loads(w) for w in written] == [{"echo": 1}]
+        assert srv.ingest._buffers[sock] == b'{"n": 2'  # 未成帧部分保留到下次读取
+    finally:
+        srv.server.close()
@@ -0,0 +1,56 @@
+"""多屏幕：按 payload 的 screen 字段路由到各屏幕容器，屏幕几何变化与移除时保留 toast"""
+import pytest
+from unittest.mock import MagicMock
+from PySide6 import QtCore, QtWidgets
+from toast import ToastManager
+
+
+@pytest.fixture
+def second_screen(qapp, monkeypatch):
+    """在真实（offscreen）屏幕右侧注入一块伪副屏"""
+    screen = MagicMock()
+    screen.name.return_value = "HDMI-1"
+    screen.availableGeometry.return_value = QtCore.QRect(1920, 0, 1920, 1080)
+    screens = [QtWidgets.QApplication.primaryScreen(), screen]
+    monkeypatch.setattr(QtWidgets.QApplication, "screens", staticmethod(lambda: screens))
+    return screen
+
+
+@pytest.fixture
+def multi(qtbot, second_screen):
+    m = ToastManager(no_expired_history=True, motion="off")
+    qtbot.addWidget(m.container)
+    yield m
+    for c in m.containers.values():
+        c.close()
+
+
+def test_screen_field_routes_to_per_screen_container(multi, second_screen):
+    """screen 按名称或序号选择屏幕，容器首次使用时创建并锚定该屏幕右上角；找不到的屏幕回落到主屏幕"""
+    m = multi
+    m.handle_payload({"id": "a", "title": "a", "duration": 60000, "screen": "HDMI-1"})
+    m.handle_payload({"id": "b", "title": "b", "duration": 60000, "screen": 1})
+    m.handle_payload({"id": "c", "title": "c", "duration": 60000, "screen": "DP-9"})
+    m.handle_payload({"id": "d", "title": "d", "duration": 60000})
+    a, b, c, d = (m._toasts_by_id[k] for k in "abcd")
+    other = m.containers[second_screen]
+    assert len(m.containers) == 2 and other is not m.container
+    assert a.host is other and b.host is other
+    assert c.host is m.container and d.host is m.container
+    assert other.geometry().topLeft() == QtCore.QPoint(3839 - other.width - other.margin, other.margin)
+    assert other.vbox.count() - 1 == 2 and m.container.vbox.count() - 1 == 2
+
+
+def test_screen_resize_and_removal_keep_toasts(qtbot, multi, second_screen):
+    """可用区域变化只重算锚点；屏幕移除时 toast 原样并入主屏幕容器"""
+    m = multi
+    toast = m.show_toast("a", "m", duration=60000, screen="HDMI-1")
+    other = toast.host
+    second_screen.availableGeometryChanged.connect.assert_called_once_with(other._on_screen_geometry_changed)
+    other._on_screen_geometry_changed(QtCore.QRect(1000, 200, 800, 600))
+    assert other.geometry().topLeft() == QtCore.QPoint(1799 - other.width - other.margin, 250)
+    assert other.max_height == 600 - 2 * other.margin
+    m._on_screen_removed(second_screen)
+    assert second_screen not in m.containers and toast.host is m.container
+    assert m.toasts == [toast] and m.container.vbox.indexOf(toast) >= 0
+    qtbot.waitUntil(toast.isVisible, timeout=1000)
@@ -0,0 +1,65 @@
+"""标准输入流模式：逐行解析、有界读取、单连接流式发送"""
+import io
+import os
+import subprocess
+import sys
+import toast as toast_mod
+from toast import LocalServer, parse_stream_line, start_line_reader, take_batch
+
+
+def test_parse_stream_line_formats():
+    """JSON 对象 / title<TAB>message / 纯文本；缺省字段取自 defaults，空行与坏 JSON 忽略"""
+    defaults = {"title": "T", "duration": 5000}
+    assert parse_stream_line('{"message": "j", "duration": 1}\n', defaults) == {
+        "title": "T", "message": "j", "duration": 1}
+    assert parse_stream_line("build\tpassed\n", defaults) == {
+        "title": "build", "message": "passed", "duration": 5000}
+    assert parse_stream_line("plain text\r\n", defaults) == {
+        "title": "T", "message": "plain text", "duration": 5000}
+    assert parse_stream_line("   \n", defaults) is None
+    assert parse_stream_line("{broken\n", defaults) is None
+
+
+def test_line_reader_drops_oversized_and_batches():
+    """超长行读到换行为止后丢弃；take_batch 一次取出已到达的多行并报告 EOF"""
+    data = b"a\n" + b"x" * 5000 + b"\nb\n"
+    lines = start_line_reader(io.BytesIO(data), max_bytes=100)
+    collected, eof = [], False
+    while not eof:
+        batch, eof = take_batch(lines)
+        collected += batch
+    assert collected == ["a\n", "b\n"]
+
+
+def test_take_batch_caps_batch_size(monkeypatch):
+    """单批最多 STDIN_BATCH_LINES 行，剩余留给下一批"""
+    monkeypatch.setattr(toast_mod, "STDIN_BATCH_LINES", 3)
+    lines = start_line_reader(io.BytesIO(b"".join(b"%d\n" % i for i in range(5))), max_bytes=100)
+    first, eof = take_batch(lines)
+    assert len(first) == 3 and not eof
+
+
+def test_cli_stdin_streams_over_one_connection(qtbot):
+    """toast --stdin：子进程把多种格式的输入经同一连接发送给已运行的 server；
+    该连接不读回传，每条都带 events=false"""
+    received, origins = [], set()
+
+    def handler(payload, origin):
+        received.append(payload)
+        origins.add(origin)
+    srv = LocalServer(name="toast_server", threaded=True, pass_origin=True, handler=handler)
+    try:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, PYTHONPATH=root, QT_QPA_PLATFORM="offscreen")
+        proc = subprocess.Popen([sys.executable, os.path.join(root, "toast.py"), "Log", "--stdin"],
+                                stdin=subprocess.PIPE, env=env)
+        proc.stdin.write(b'{"title": "j", "message": "m"}\nci\tok\nhello\n\n')
+        proc.stdin.close()
+        qtbot.waitUntil(lambda: proc.poll() is not None and len(received) == 3, timeout=10000)
+        assert proc.returncode == 0
+        assert [(p["title"], p["message"]) for p in received] == [("j", "m"), ("ci", "ok"),
+                                                                  ("Log", "hello")]
+        assert len(origins) == 1
+        assert all(p["events"] is False for p in received)
+    finally:
+        srv.close()
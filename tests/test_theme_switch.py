@@ -0,0 +1,44 @@
+"""运行时切换主题：存活 toast、摘要行与浮层原地重设样式，不重建控件"""
+import pytest
+from toast import TOAST_STYLES, ToastManager
+
+
+def test_theme_command_restyles_live_widgets_in_place(qtbot, manager_with_history):
+    """theme 命令重设存活 toast（含已过期）、工具栏按钮、摘要行与浮层；控件对象不变，新 toast 沿用新主题"""
+    m = manager_with_history
+    a = m.show_toast("a", "m", duration=60000, actions=["ok"])
+    b = m.show_toast("b", "m", duration=60000, progress=10)
+    b.set_progress(100)
+    qtbot.waitUntil(lambda: b.phase == "expired", timeout=1000)
+    c = m.container
+    summary, overlay, buttons = c.summary_row, c.overlay, list(a.action_buttons)
+    reply = m.handle_payload({"cmd": "theme", "theme": "light", "req": 1})
+    assert reply == {"status": "ok", "theme": "light", "restyled": 2}
+    assert a.styleSheet() == TOAST_STYLES["light"][0] and b.styleSheet() == TOAST_STYLES["light"][1]
+    assert a.close_btn.theme == c.pin_btn.theme == c.close_all_btn.theme == "light"
+    assert c.summary_row is summary and summary.theme == "light" and summary._color_has == "#333"
+    assert c.overlay is overlay and overlay.theme == "light" and overlay._text_color == "#333"
+    assert a.action_buttons == buttons and m.toasts == [a, b]
+    assert m.show_toast("d", "m", duration=60000).theme == "light"
+    assert m.handle_payload({"cmd": "theme", "theme": "light"})["restyled"] == 0
+    assert m.handle_payload({"cmd": "theme", "theme": "blue"})["status"] == "invalid"
+    assert m.stats()["histograms"]["theme_switch_seconds"]["count"] == 3
+
+
+def test_theme_switch_per_channel(qtbot, mock_screen):
+    """带 channel 时只切换该频道；全局切换覆盖频道单独配置的主题"""
+    m = ToastManager(no_expired_history=True, channels={"ci": {"theme": "light"}, "ops": {"theme": "light"}})
+    qtbot.addWidget(m.container)
+    d = m.show_toast("d", "m", duration=60000)
+    ci = m.show_toast("c", "m", duration=60000, channel="ci")
+    qtbot.addWidget(ci.host)
+    assert m.set_theme("dark", channel="ci") == 1
+    assert ci.theme == "dark" and d.theme == "dark" and m.channels["ci"].theme == "dark"
+    assert m.set_theme("light") == 2
+    assert d.theme == ci.theme == "light"
+    m.set_theme("dark")
+    ops = m.show_toast("o", "m", duration=60000, channel="ops")
+    qtbot.addWidget(ops.host)
+    assert ops.theme == "dark"
+    with pytest.raises(ValueError):
+        m.set_theme("blue")
@@ -0,0 +1,61 @@
+"""按通知 ID 原地更新 / 取消"""
+import pytest
+from PySide6 import QtCore
+import toast as toast_mod
+from toast import Toast
+
+
+def test_update_in_place_reuses_toast(qtbot, manager, frozen_time):
+    """相同 id 的第二条消息不新建 toast，而是更新原 toast"""
+    manager.handle_payload({"id": "deploy", "title": "Deploy", "message": "40%"})
+    assert len(manager.toasts) == 1
+    toast = manager.toasts[0]
+    manager.handle_payload({"id": "deploy", "message": "60%"})
+    assert len(manager.toasts) == 1
+    qtbot.waitUntil(lambda: toast.msg_lbl.text() == "60%", timeout=1000)
+    assert toast.title == "Deploy"  # 未给出的字段保持不变
+
+
+def test_update_coalesced_to_one_apply_per_frame(qtbot, frozen_time):
+    """同一帧内 100 次更新只触发一次 setText，且保留最后值"""
+    t = Toast("t", "m", duration=60000, show_countdown=True, toast_id="x")
+    qtbot.addWidget(t)
+    calls = []
+    original = t.msg_lbl.setText
+    t.msg_lbl.setText = lambda text: (calls.append(text), original(text))
+    for i in range(100):
+        t.update_content(message=f"{i}%")
+    qtbot.waitUntil(lambda: len(calls) >= 1, timeout=1000)
+    qtbot.wait(3 * toast_mod.FRAME_INTERVAL_MS)
+    assert calls == ["99%"]
+
+
+def test_update_duration_revives_expired_toast(qtbot, frozen_time):
+    """过期缓冲中的 toast 收到新 duration 后回到 ACTIVE 并重新计时"""
+    t = Toast("t", "m", duration=3000, show_countdown=True, toast_id="x")
+    qtbot.addWidget(t)
+    t._enter_expired_phase()
+    assert t.phase == "expired"
+    t.update_content(duration=10000)
+    t._apply_pending_update()
+    assert t.phase == "active"
+    assert t.remaining == 10
+    assert not t._expired_exit_timer.isActive()
+
+
+def test_cancel_by_id(qtbot, manager, frozen_time):
+    """cancel 命令让对应 toast 进入出场动画，出场后 id 可被复用"""
+    manager.handle_payload({"id": 7, "title": "t", "message": "m", "duration": 60000})
+    toast = manager.toasts[0]
+    manager.handle_payload({"cmd": "cancel", "id": 7})
+    assert toast._exiting is True
+    assert manager.update_toast("7", message="late") is False
+    toast.closed.emit(toast)
+    assert "7" not in manager._toasts_by_id
+
+
+def test_cancel_unknown_id_is_noop(qtbot, manager, frozen_time):
+    """取消不存在的 id 不报错"""
+    assert manager.cancel_toast("missing") is False
+    manager.handle_payload({"cmd": "cancel", "id": "missing"})
+    assert manager.toasts == []
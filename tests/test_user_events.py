@@ -0,0 +1,169 @@
+"""用户事件回传：动作按钮、dismissed/swiped/clicked/expired/closed 事件、有界发送缓冲"""
+import json
+import os
+import subprocess
+import sys
+import pytest
+from unittest.mock import MagicMock
+from PySide6 import QtCore, QtGui
+from toast import LocalServer, PayloadSchema, Toast, normalize_actions
+
+
+@pytest.fixture
+def events(manager):
+    got = []
+    manager.toast_event.connect(lambda origin, e: got.append((origin, e)))
+    return got
+
+
+def test_action_buttons_emit_clicked_and_close(qtbot, frozen_time):
+    """payload 定义的动作按钮：点击回传 clicked（带动作 ID）并关闭 toast"""
+    t = Toast("t", "m", duration=60000, actions=["retry", {"id": "open", "label": "Open log"}])
+    qtbot.addWidget(t)
+    assert [b.text() for b in t.action_buttons] == ["retry", "Open log"]
+    got = []
+    t.user_event.connect(lambda toast, kind, action: got.append((kind, action)))
+    qtbot.mouseClick(t.action_buttons[1], QtCore.Qt.MouseButton.LeftButton)
+    assert got == [("clicked", "open")]
+    assert t._exiting
+
+
+def test_dismiss_and_closed_routed_to_origin(qtbot, manager, events):
+    """IPC 来源的 toast：关闭按钮回传 dismissed，出场结束后回传 closed；自动分配 id"""
+    manager.handle_payload({"title": "a", "duration": 60000}, origin=7)
+    toast = manager.toasts[0]
+    assert toast.toast_id.startswith("auto-")
+    toast._manual_close()
+    toast._manual_close()  # 出场中重复点击不重复回传
+    toast.closed.emit(toast)  # 模拟出场动画结束（offscreen 下动画时序不稳定）
+    assert [(o, e["event"], e["id"]) for o, e in events] == [
+        (7, "dismissed", toast.toast_id), (7, "closed", toast.toast_id)]
+    assert all(isinstance(e["ts"], float) for _, e in events)
+
+
+def test_events_opt_out_not_routed(manager, events):
+    """events=false 的来源（如 --stdin 流）不绑定到 toast，不向其推送事件"""
+    manager.handle_payload({"title": "a", "duration": 60000, "events": False}, origin=3)
+    toast = manager.toasts[0]
+    assert toast.origin is None and toast.toast_id is None
+    toast._manual_close()
+    assert [(o, e["event"]) for o, e in events] == [(None, "dismissed")]
+
+
+def test_expired_events(manager, events):
+    """非倒计时 toast 时长到期、倒计时 toast 进入过期阶段都回传 expired"""
+    manager.handle_payload({"title": "a", "duration": 60000}, origin=1)
+    manager.handle_payload({"title": "b", "duration": 60000, "show_countdown": True}, origin=2)
+    plain, countdown = manager.toasts
+    plain._on_duration_elapsed()
+    countdown._enter_expired_phase()
+    assert [(o, e["event"]) for o, e in events] == [(1, "expired"), (2, "expired")]
+
+
+def _drag(toast, kind, x, ms):
+    """在 (x, 20) 处合成带设备时间戳（毫秒）的鼠标事件并直接交给 toast"""
+    types = {"press": QtCore.QEvent.Type.MouseButtonPress, "move": QtCore.QEvent.Type.MouseMove,
+             "release": QtCore.QEvent.Type.MouseButtonRelease}
+    left = QtCore.Qt.MouseButton.LeftButton
+    pos = QtCore.QPointF(x, 20)
+    event = QtGui.QMouseEvent(types[kind], pos, pos, left if kind != "move" else QtCore.Qt.MouseButton.NoButton,
+                              left, QtCore.Qt.KeyboardModifier.NoModifier)
+    event.setTimestamp(ms)
+    getattr(toast, {"press": "mousePressEvent", "move": "mouseMoveEvent",
+                    "release": "mouseReleaseEvent"}[kind])(event)
+
+
+def test_swipe_moves_once_per_frame_and_flings(qtbot, manager, events):
+    """拖动按帧合并为一次 move（尺寸不变）；松手速度取自最近采样：快甩关闭，慢拖后停住则回弹"""
+    manager.handle_payload({"title": "a", "duration": 60000}, origin=5)
+    toast = manager.toasts[0]
+    qtbot.waitUntil(lambda: manager.container.animator.pending() == 0, timeout=2000)
+    origin = toast.geometry()
+    moves = []
+    toast.moveEvent = lambda e: moves.append(e.pos())
+
+    _drag(toast, "press", 0, 1000)
+    for i in range(1, 21):
+        _drag(toast, "move", i * 3, 1000 + i)          # 1ms 一次的高频触摸
+    assert toast.geometry() == origin                  # 尚未到帧
+    qtbot.wait(40)
+    assert moves == [origin.topLeft() + QtCore.QPoint(60, 0)]
+    assert toast.size() == origin.size()
+    _drag(toast, "move", 64, 2000)                     # 停住 1 秒后再动一点：速度很小
+    _drag(toast, "release", 64, 2010)
+    assert events == [] and not toast._exiting         # 未过半宽、速度小：回弹
+
+    qtbot.waitUntil(lambda: manager.container.animator.pending() == 0, timeout=2000)
+    assert toast.geometry() == origin
+    _drag(toast, "press", 0, 3000)
+    for i in range(1, 6):
+        _drag(toast, "move", i * 10, 3000 + i * 5)     # 50px / 25ms = 2000px/s
+    _drag(toast, "release", 50, 3026)
+    assert [(o, e["event"]) for o, e in events] == [(5, "swiped")]
+
+
+def test_body_click_emits_clicked(qtbot, manager, events):
+    """单击卡片（无拖动）回传不带 action 的 clicked"""
+    manager.handle_payload({"title": "a", "duration": 60000}, origin=3)
+    qtbot.mouseClick(manager.toasts[0], QtCore.Qt.MouseButton.LeftButton)
+    assert [(o, e["event"], "action" in e) for o, e in events] == [(3, "clicked", False)]
+
+
+def test_schema_validates_actions():
+    """动作按钮：字符串/对象统一为 dict，数量与类型受限；Toast 与 HeadlessToast 使用同一规则"""
+    schema = PayloadSchema()
+    actions = ["a", {"id": 2, "label": "Two" * 20}]
+    out = schema.validate({"actions": actions})
+    assert out["actions"] == [{"id": "a", "label": "a"}, {"id": "2", "label": ("Two" * 20)[:40]}]
+    assert normalize_actions(actions) == [(a["id"], a["label"]) for a in out["actions"]]
+    for bad in (["a", "b", "c", "d"], [{"label": "x"}], [3], [{"id": "x", "label": 1}], [""]):
+        with pytest.raises(ValueError):
+            schema.validate({"actions": bad})
+        with pytest.raises(ValueError):
+            normalize_actions(bad)
+
+
+def test_event_outbound_buffer_bounded(qtbot):
+    """发送缓冲超过上限时丢弃事件，缓冲回落后先补发 overflow 计数"""
+    srv = LocalServer(name="toast_test_event_bound")
+    try:
+        sock = MagicMock()
+        conn_id = srv.ingest._register(sock)
+        sock.bytesToWrite.return_value = srv.ingest.MAX_OUTBOUND_BYTES
+        srv.send_event(conn_id, {"event": "clicked"})
+        srv.send_event(conn_id, {"event": "closed"})
+        sock.write.assert_not_called()
+        sock.bytesToWrite.return_value = 0
+        srv.send_event(conn_id, {"event": "expired"})
+        lines = [json.loads(c.args[0]) for c in sock.write.call_args_list]
+        assert lines == [{"event": "overflow", "dropped": 2}, {"event": "expired"}]
+        srv.send_event(99, {"event": "closed"})  # 已断开的连接：直接丢弃
+    finally:
+        srv.close()
+
+
+def test_watch_events_over_socket(qtbot, manager):
+    """端到端：子进程 watch_events 发送带动作的 toast，GUI 侧点击按钮后收到 ack、clicked、closed"""
+    srv = LocalServer(name="toast_test_events", threaded=True,
+                      handler=manager.handle_payload, pass_origin=True)
+    manager.toast_event.connect(srv.send_event)
+    code = ("import json, toast\n"
+            "for e in toast.watch_events({'title': 't', 'duration': 60000, 'actions': ['ok']},\n"
+            "                            name='toast_test_events', timeout=5000):\n"
+            "    print(json.dumps(e), flush=True)\n")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root, QT_QPA_PLATFORM="offscreen")
+    proc = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE, env=env)
+    try:
+        qtbot.waitUntil(lambda: len(manager.toasts) == 1, timeout=5000)
+        toast = manager.toasts[0]
+        qtbot.mouseClick(toast.action_buttons[0], QtCore.Qt.MouseButton.LeftButton)
+        toast.closed.emit(toast)  # 模拟出场动画结束
+        qtbot.waitUntil(lambda: proc.poll() is not None, timeout=5000)
+        lines = [json.loads(line) for line in proc.stdout.read().splitlines()]
+        assert lines[0]["status"] == "accepted"
+        assert [(e["event"], e.get("action")) for e in lines[1:]] == [("clicked", "ok"), ("closed", None)]
+    finally:
+        proc.kill()
+        proc.stdout.close()
+        srv.close()
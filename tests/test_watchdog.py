@@ -0,0 +1,47 @@
+"""卡顿监测：事件循环延迟、动画帧间隔与卡顿调用点"""
+import time
+import pytest
+from toast import LoopWatchdog
+
+
+@pytest.fixture
+def watchdog(qapp):
+    wd = LoopWatchdog(stall_ms=50, interval_ms=10)
+    wd.start()
+    yield wd
+    wd.stop()
+
+
+def _busy_block(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_loop_lag_recorded(qtbot, watchdog):
+    qtbot.wait(100)
+    report = watchdog.report()
+    assert report["loop_lag"]["count"] >= 3
+    assert report["stalls"] == 0
+
+
+def test_stall_logs_offending_call_site(qtbot, watchdog, capsys):
+    """GUI 线程阻塞超过阈值：记录一次卡顿，调用点指向阻塞的函数"""
+    qtbot.wait(30)
+    _busy_block(0.2)
+    qtbot.wait(50)
+    assert len(watchdog.stalls) == 1
+    seconds, sites = watchdog.stalls[0]
+    assert seconds >= 0.15
+    assert sites and "_busy_block" in sites[0][0]
+    assert "_busy_block" in capsys.readouterr().err
+
+
+def test_container_animation_frames_tracked(qtbot, manager, watchdog):
+    """登记到容器的入场 / 高度动画逐帧记录间隔"""
+    manager.container.frame_monitor = watchdog
+    manager.show_toast("a", "m", duration=60000)
+    qtbot.wait(400)
+    frames = watchdog.report()["frame_interval"]
+    assert frames["count"] >= 5
+    assert 0 < frames["p50"] < 0.05
@@ -1,8 +1,17 @@
 import argparse
+import cProfile
+import heapq
 import json
+import marshal
+import math
+import os
+import queue
 import sys
+import threading
 import time
-from functools import cmp_to_key
+import weakref
+from collections import deque
+from functools import update_wrapper, wraps
 
 try:
     import ctypes
@@ -14,6 +23,7 @@ except (ImportError, AttributeError):
 
 from PySide6 import QtCore, QtWidgets, QtGui, QtNetwork
 from PySide6.QtCore import QLocale
+import shiboken6
 
 # 新建项目环境改用：
 # uv venv --seed
@@ -24,6 +34,15 @@ from PySide6.QtCore import QLocale
 
 # ========== 全局配置 ==========
 TOAST_OPACITY = 0.88  # 统一透明度控制（0.85 ~ 0.9）
+FRAME_INTERVAL_MS = 16  # 一帧（约 60Hz），高频内容更新合并到帧边界
+MESSAGE_PREVIEW_CHARS = 300  # 正文折叠显示的最大字符数，超出部分点击展开
+MESSAGE_PREVIEW_LINES = 6    # 正文折叠显示的最大行数
+MAX_ACTIONS = 3              # 每个 toast 最多的动作按钮数
+MAX_ACTION_LABEL_CHARS = 40  # 动作按钮文字的最大字符数（超出截断）
+
+# 通知优先级（低 → 高）；critical 跳过错峰延迟与限流
+PRIORITIES = ("low", "normal", "high", "critical")
+PRIORITY_RANK = {p: i for i, p in enumerate(PRIORITIES)}
 
 # 支持的语言
 LANG = "en"
@@ -46,6 +65,8 @@ STRINGS = {
     "minutes": {"en": "m ", "zh": "分钟"},
     "seconds": {"en": "s", "zh": "秒钟"},
     "expired_label": {"en": "Expired", "zh": "已过期"},
+    "progress_done": {"en": "Completed", "zh": "已完成"},
+    "expand_tooltip": {"en": "Click to show the full message", "zh": "点击展开完整内容"},
     "expired_history_tooltip": {"en": "Expired history", "zh": "已过期记录"},
     "expired_history_empty": {"en": "No expired records", "zh": "暂无过期记录"},
     "expired_summary": {"en": "Expired: {n}", "zh": "已过期：{n} 条"},
@@ -56,6 +77,813 @@ def tr(key: str) -> str:
     return STRINGS.get(key, {}).get(LANG, key)
 
 
+# ========== 时钟 ==========
+class SystemClock:
+    """真实时钟：截止时间、过期与调度统一经此取时间、建 timer。
+    time() 为墙钟（记录/调度用），monotonic() 为单调时钟（限流等间隔计算用）"""
+    realtime = True  # 动画按真实时间运行；虚拟时钟下跳过动画
+
+    def time(self):
+        return time.time()
+
+    def monotonic(self):
+        return time.perf_counter()
+
+    def timer(self, parent, callback, single_shot=False, precise=False):
+        """创建父子化 QTimer（parent 删除时自动停止）"""
+        t = QtCore.QTimer(parent)
+        t.setSingleShot(single_shot)
+        if precise:
+            t.setTimerType(QtCore.Qt.TimerType.PreciseTimer)
+        t.timeout.connect(callback)
+        return t
+
+    def single_shot(self, parent, ms, callback):
+        QtCore.QTimer.singleShot(ms, parent, callback)
+
+
+class SimTimer(QtCore.QObject):
+    """SimulatedClock 的 timer：接口与所用到的 QTimer 子集一致（start/stop/isActive/timeout）。
+    与 QTimer 一样是 parent 的子对象、回调经信号连接，parent 删除时随之删除，不形成 Python 引用环"""
+    timeout = QtCore.Signal()
+
+    def __init__(self, clock, parent, single_shot):
+        super().__init__(parent)
+        self._clock = clock
+        self._single_shot = single_shot
+        self._interval = 0
+        self._seq = None  # 当前布置的堆条目序号；None 表示未激活
+
+    def setSingleShot(self, single_shot):
+        self._single_shot = single_shot
+
+    def interval(self):
+        return self._interval
+
+    def start(self, ms=None):
+        if ms is not None:
+            self._interval = max(0, int(ms))
+        self._clock._arm(self)
+
+    def stop(self):
+        self._seq = None
+
+    def isActive(self):
+        return self._seq is not None
+
+    def _fire(self):
+        if self._single_shot:
+            self._seq = None
+        else:
+            self._clock._arm(self)
+        self.timeout.emit()
+
+
+class SimulatedClock:
+    """虚拟时钟：时间只在 advance() 时前进，期间到期的 timer 按到期顺序依次回调。
+    与 ToastManager(clock=...) 配合，可在毫秒级耗时内快进数小时的生命周期"""
+    realtime = False
+
+    def __init__(self, start=1700000000.0):
+        self._start = float(start)
+        self._now = float(start)
+        self._heap = []   # (due, seq, timer)；惰性删除，同 ToastScheduler
+        self._seq = 0
+
+    def time(self):
+        return self._now
+
+    def monotonic(self):
+        return self._now - self._start
+
+    def timer(self, parent, callback, single_shot=False, precise=False):
+        t = SimTimer(self, parent, single_shot)
+        t.timeout.connect(callback)
+        return t
+
+    def single_shot(self, parent, ms, callback):
+        t = self.timer(parent, callback, single_shot=True)
+        t.timeout.connect(t.deleteLater)
+        t.start(ms)
+
+    def _arm(self, t):
+        self._seq += 1
+        t._seq = self._seq
+        heapq.heappush(self._heap, (self._now + t._interval / 1000, self._seq, t))
+
+    def pending(self):
+        """激活中的 timer 数"""
+        return sum(1 for _, seq, t in self._heap if shiboken6.isValid(t) and t._seq == seq)
+
+    def next_due(self):
+        """最近一个 timer 的到期时间（无则 None）"""
+        heap = self._heap
+        while heap and not self._live(heap[0]):
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    @staticmethod
+    def _live(entry):
+        # parent 删除时 timer 随之删除（同 QTimer），其堆条目作废
+        _, seq, t = entry
+        return shiboken6.isValid(t) and t._seq == seq
+
+    def advance(self, seconds):
+        """快进 seconds 秒：区间内到期的 timer（含回调中新布置的）按时间顺序触发，返回触发次数"""
+        end = self._now + seconds
+        heap = self._heap
+        fired = 0
+        while heap and heap[0][0] <= end:
+            entry = heapq.heappop(heap)
+            if not self._live(entry):
+                continue
+            due, _, t = entry
+            self._now = max(self._now, due)
+            t._fire()
+            fired += 1
+        self._now = max(self._now, end)
+        return fired
+
+
+DEFAULT_CLOCK = SystemClock()
+
+
+# ========== 指标 ==========
+class Counter:
+    """单调递增计数"""
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, n=1):
+        self.value += n
+
+
+class Gauge:
+    """瞬时值（存活 toast 数等）"""
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+
+class Histogram:
+    """HDR 风格直方图：按 2 的幂分段、每段再等分 SUB_BUCKETS 份，相对误差 ≤ 1/SUB_BUCKETS。
+    以整数微秒记录，observe 为 O(1)，不保存原始样本，内存固定"""
+    __slots__ = ("count", "total", "min", "max", "_buckets")
+    SUB_BITS = 4
+    SUB_BUCKETS = 1 << SUB_BITS
+    MAX_SHIFT = 40  # 覆盖到约 2^45 微秒（一年量级），更大的值记入最后一个桶
+
+    def __init__(self):
+        self._buckets = [0] * ((self.MAX_SHIFT + 2) * self.SUB_BUCKETS)
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+        for i in range(len(self._buckets)):
+            self._buckets[i] = 0
+
+    @classmethod
+    def _index(cls, us):
+        shift = us.bit_length() - cls.SUB_BITS - 1
+        if shift <= 0:
+            return us
+        if shift > cls.MAX_SHIFT:
+            return (cls.MAX_SHIFT + 2) * cls.SUB_BUCKETS - 1
+        return (shift << cls.SUB_BITS) + (us >> shift)
+
+    @classmethod
+    def _upper(cls, index):
+        """桶内最大值（微秒）"""
+        if index < 2 * cls.SUB_BUCKETS:
+            return index
+        shift = (index >> cls.SUB_BITS) - 1
+        return ((index - (shift << cls.SUB_BITS) + 1) << shift) - 1
+
+    def observe(self, seconds):
+        us = int(seconds * 1e6)
+        if us < 0:
+            us = 0
+        self.count += 1
+        self.total += us
+        if us > self.max:
+            self.max = us
+        if self.min is None or us < self.min:
+            self.min = us
+        self._buckets[self._index(us)] += 1
+
+    def percentile(self, q):
+        """q 分位数（秒），取所在桶的上界且不超过最大值"""
+        if not self.count:
+            return 0.0
+        target = max(1, int(q * self.count + 0.5))
+        seen = 0
+        for i, n in enumerate(self._buckets):
+            seen += n
+            if seen >= target:
+                return min(self._upper(i), self.max) / 1e6
+        return self.max / 1e6
+
+    def cumulative_counts(self, cutoffs):
+        """逐个产出前 cutoffs[i] 个桶的累计数（Prometheus 的 le 桶），只遍历一次桶数组"""
+        seen = i = 0
+        buckets = self._buckets
+        for cut in cutoffs:
+            while i < cut:
+                seen += buckets[i]
+                i += 1
+            yield seen
+
+    def snapshot(self):
+        return {"count": self.count, "sum": self.total / 1e6,
+                "min": (self.min or 0) / 1e6, "max": self.max / 1e6,
+                "p50": self.percentile(0.5), "p90": self.percentile(0.9),
+                "p99": self.percentile(0.99)}
+
+
+class MetricsRegistry:
+    """进程内指标注册表：按名称取得（不存在则创建）计数 / 瞬时值 / 直方图。
+    enabled=False 时 timed 包装的热路径换回原方法，不再计时（计数照常）。
+    collectors 中的函数在每次导出前调用，用于刷新由其他指标推导出的瞬时值"""
+    # Prometheus 直方图的 le 边界（秒）；落在边界所在桶内的样本计入下一档
+    PROMETHEUS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                          1.0, 2.5, 5.0, 10.0)
+    _PROM_LE = tuple(b'%g' % le for le in PROMETHEUS_BUCKETS)
+    _PROM_CUTOFFS = tuple(sum(1 for i in range(len(Histogram()._buckets))
+                              if Histogram._upper(i) <= le * 1e6) for le in PROMETHEUS_BUCKETS)
+
+    def __init__(self, prefix="toast_"):
+        self._enabled = True
+        self._spans = []  # [(类, 属性名, 原方法, 计时包装)]
+        self.prefix = prefix
+        self.collectors = []
+        self._metrics = {}  # name → Counter | Gauge | Histogram
+        self._prom_names = {}  # name → 带前缀的已编码名称（导出时复用）
+
+    def _get(self, name, kind):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = kind()
+        elif not isinstance(metric, kind):
+            raise TypeError(f"metric {name!r} is a {type(metric).__name__}")
+        return metric
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, value):
+        self._enabled = bool(value)
+        for owner, attr, fn, wrapper in self._spans:
+            setattr(owner, attr, wrapper if self._enabled else fn)
+
+    def register_span(self, owner, attr, fn, wrapper):
+        """登记类上的一个计时方法，按当前开关装上包装或原方法"""
+        self._spans.append((owner, attr, fn, wrapper))
+        setattr(owner, attr, wrapper if self._enabled else fn)
+
+    def counter(self, name):
+        return self._get(name, Counter)
+
+    def gauge(self, name):
+        return self._get(name, Gauge)
+
+    def histogram(self, name):
+        return self._get(name, Histogram)
+
+    def reset(self):
+        """原地清零（已取得的指标对象保持有效）"""
+        for metric in self._metrics.values():
+            if isinstance(metric, Histogram):
+                metric.reset()
+            else:
+                metric.value = 0
+
+    def collect(self):
+        for collector in self.collectors:
+            collector()
+
+    def snapshot(self):
+        self.collect()
+        result = {"counters": {}, "gauges": {}, "histograms": {}}
+        for name, metric in sorted(self._metrics.items()):
+            if isinstance(metric, Counter):
+                result["counters"][name] = metric.value
+            elif isinstance(metric, Gauge):
+                result["gauges"][name] = metric.value
+            else:
+                result["histograms"][name] = metric.snapshot()
+        return result
+
+    def prometheus(self):
+        """Prometheus 文本格式（0.0.4）。只读取计数，可在其他线程调用；
+        直接写入一个 bytearray，不经过 snapshot 的中间结构与分位数计算"""
+        self.collect()
+        out = bytearray()
+        for name, metric in list(self._metrics.items()):
+            key = self._prom_names.get(name)
+            if key is None:
+                key = self._prom_names[name] = (self.prefix + name).encode("ascii")
+            if isinstance(metric, Histogram):
+                out += b"# TYPE %s histogram\n" % key
+                counts = metric.cumulative_counts(self._PROM_CUTOFFS)
+                for le, n in zip(self._PROM_LE, counts):
+                    out += b'%s_bucket{le="%s"} %d\n' % (key, le, n)
+                count = metric.count
+                out += b'%s_bucket{le="+Inf"} %d\n%s_sum %.6f\n%s_count %d\n' % (
+                    key, count, key, metric.total / 1e6, key, count)
+            else:
+                kind = b"counter" if isinstance(metric, Counter) else b"gauge"
+                out += b"# TYPE %s %s\n%s %r\n" % (key, kind, key, metric.value)
+        return out
+
+    def dump(self, path):
+        """以 JSON 写出快照；path 为 "-" 时写到标准错误"""
+        text = json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+        if path == "-":
+            print(text, file=sys.stderr)
+            return
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        except OSError as e:
+            print("写出指标失败:", e)
+
+
+METRICS = MetricsRegistry()
+
+
+def _ipc_queue_depth():
+    """已由 worker 读出、尚未被 GUI 线程分发的帧数（两端各自只写自己的计数，无需加锁）"""
+    read = METRICS.counter("ipc_frames_read_total").value
+    done = METRICS.counter("ipc_frames_total").value + METRICS.counter("http_frames_total").value
+    METRICS.gauge("ipc_queue_depth").set(max(0, read - done))
+
+
+METRICS.collectors.append(_ipc_queue_depth)
+
+
+class _Span:
+    """timed 的返回值。作为方法定义在类中时（__set_name__），类属性直接替换为计时包装或原方法：
+    关闭计时后调用的就是原方法，没有任何额外开销。当作普通可调用对象使用时每次调用检查开关"""
+
+    def __init__(self, fn, name):
+        self.fn = fn
+        hist = METRICS.histogram(name)
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                hist.observe(time.perf_counter() - start)
+        self.wrapper = wrapper
+        update_wrapper(self, fn)
+
+    def __set_name__(self, owner, attr):
+        METRICS.register_span(owner, attr, self.fn, self.wrapper)
+
+    def __call__(self, *args, **kwargs):
+        return (self.wrapper if METRICS.enabled else self.fn)(*args, **kwargs)
+
+
+def timed(name):
+    """热路径计时：把每次调用耗时记入直方图 name（METRICS.enabled=False 时零开销）"""
+    def decorate(fn):
+        return _Span(fn, name)
+    return decorate
+
+
+# ========== 性能剖析 ==========
+# IPC 启动的剖析只写入该目录（TOAST_PROFILE_DIR 可覆盖），且只新建文件，不覆盖已有文件
+PROFILE_DIR = os.environ.get("TOAST_PROFILE_DIR") or os.path.join(os.path.expanduser("~"), ".toast_profiles")
+
+
+def profile_path(name, directory=None):
+    """IPC 给出的剖析文件名 → PROFILE_DIR 下的路径；只接受不含目录的文件名，否则抛出 ValueError"""
+    if not isinstance(name, str) or not name or name in (".", "..") \
+            or os.path.basename(name) != name or (os.altsep and os.altsep in name):
+        raise ValueError(f"profile path must be a plain file name: {name!r}")
+    return os.path.join(directory or PROFILE_DIR, name)
+
+
+class Profiler:
+    """常驻进程内按需剖析，须在 GUI 线程调用 start / stop
+    - mode="cprofile"：cProfile 确定性剖析 GUI 线程，stop 时写出 .pstats（pstats / snakeviz 可读）
+    - mode="sample"：采样线程每 interval_ms 抓取一次 GUI 线程调用栈，stop 时写出折叠栈文件
+      （每行 "根;...;叶 次数"，flamegraph.pl / speedscope 可读），对被剖析代码几乎没有影响
+    - 未指定 mode 时按扩展名推断：.folded / .collapsed / .txt 为采样，其余为 cProfile
+    - 结果文件只新建（O_EXCL）：目标已存在时 start 即拒绝，stop 时被抢先创建则写出失败"""
+    SAMPLE_SUFFIXES = (".folded", ".collapsed", ".txt")
+    MAX_DEPTH = 64
+
+    def __init__(self):
+        self.path = None
+        self.mode = None
+        self._profile = None
+        self._stacks = {}  # 折叠栈 → 采样数（采样线程写入）
+        self._stop = threading.Event()
+        self._sampler = None
+        self._started_at = 0.0
+
+    @property
+    def active(self):
+        return self.path is not None
+
+    def start(self, path, mode=None, interval_ms=5):
+        """开始剖析；已在剖析或 mode 无效时抛出 ValueError"""
+        if self.active:
+            raise ValueError(f"already profiling to {self.path}")
+        if os.path.lexists(path):
+            raise ValueError(f"profile file already exists: {path}")
+        if mode is None:
+            mode = "sample" if path.endswith(self.SAMPLE_SUFFIXES) else "cprofile"
+        if mode == "cprofile":
+            profile = cProfile.Profile()
+            profile.enable()  # 其他剖析器已启用时抛出 ValueError
+            self._profile = profile
+        elif mode == "sample":
+            self._stacks = {}
+            self._stop.clear()
+            self._sampler = threading.Thread(target=self._sample_loop, name="toast-profiler",
+                                             args=(threading.get_ident(), interval_ms / 1000),
+                                             daemon=True)
+            self._sampler.start()
+        else:
+            raise ValueError(f"unknown profile mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self._started_at = time.perf_counter()
+
+    def stop(self):
+        """停止并写出结果，返回摘要；未在剖析时返回 None。写出失败抛出 OSError"""
+        if not self.active:
+            return None
+        path, mode = self.path, self.mode
+        self.path = self.mode = None
+        result = {"path": path, "mode": mode, "seconds": round(time.perf_counter() - self._started_at, 3)}
+        if mode == "cprofile":
+            profile, self._profile = self._profile, None
+            profile.disable()
+            profile.create_stats()
+            with self._create(path, "wb") as f:
+                marshal.dump(profile.stats, f)  # 与 dump_stats 相同的格式
+        else:
+            self._stop.set()
+            self._sampler.join()
+            self._sampler = None
+            with self._create(path, "w", encoding="utf-8") as f:
+                for stack, n in sorted(self._stacks.items(), key=lambda kv: -kv[1]):
+                    f.write(f"{stack} {n}\n")
+            result["samples"] = sum(self._stacks.values())
+        return result
+
+    @staticmethod
+    def _create(path, mode, encoding=None):
+        """只新建文件（O_EXCL，不跟随已有文件或符号链接）；目录不存在时以 0700 创建"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o600)
+        return os.fdopen(fd, mode, encoding=encoding)
+
+    def _sample_loop(self, ident, interval):
+        while not self._stop.wait(interval):
+            frame = sys._current_frames().get(ident)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None and len(names) < self.MAX_DEPTH:
+                code = frame.f_code
+                name = getattr(code, "co_qualname", code.co_name)
+                names.append(f"{name} ({os.path.basename(code.co_filename)})")
+                frame = frame.f_back
+            stack = ";".join(reversed(names))
+            self._stacks[stack] = self._stacks.get(stack, 0) + 1
+
+
+PROFILER = Profiler()
+
+
+# ========== 卡顿监测 ==========
+class LoopWatchdog(QtCore.QObject):
+    """可选的事件循环 / 动画帧监测（真实时间，不受 SimulatedClock 影响）
+    - 事件循环延迟：单次 PreciseTimer 每 interval_ms 布置一次，实际触发与计划时刻之差记入 loop_lag_seconds
+    - 动画帧间隔：track(anim) 登记的 QPropertyAnimation 相邻两次 valueChanged 之差、
+      以及 AnimationDriver 相邻两帧之差（observe_frame）记入 frame_interval_seconds
+    - 卡顿调用点：采样线程发现 GUI 线程超过 stall_ms 没有心跳时抓取其 Python 调用栈，
+      卡顿结束后打印出现最多的调用点，并保存在 stalls 中"""
+    TOP_SITES = 3
+
+    def __init__(self, stall_ms=100, interval_ms=20, sample_ms=5):
+        super().__init__()
+        self.stall_s = stall_ms / 1000
+        self.interval_ms = interval_ms
+        self.sample_s = sample_ms / 1000
+        self.loop_lag = METRICS.histogram("loop_lag_seconds")
+        self.frames = METRICS.histogram("frame_interval_seconds")
+        self.stalls = []        # [(卡顿秒数, [(调用点, 采样数), ...]), ...]
+        self._samples = []      # 采样线程写入，GUI 线程在卡顿结束时取走
+        self._gui_ident = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._expected = None
+        self._stop = threading.Event()
+        self._sampler = None
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(QtCore.Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self._on_tick)
+
+    def start(self):
+        self.loop_lag.reset()
+        self.frames.reset()
+        self.stalls = []
+        self._stop.clear()
+        self._last_beat = time.perf_counter()
+        self._arm()
+        self._sampler = threading.Thread(target=self._sample_loop, name="toast-watchdog", daemon=True)
+        self._sampler.start()
+
+    def stop(self):
+        self._timer.stop()
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+
+    def track(self, anim):
+        """登记一个动画：逐帧记录与上一帧的间隔"""
+        last = [None]
+
+        def on_frame(_value):
+            now = time.perf_counter()
+            if last[0] is not None:
+                self.observe_frame(now - last[0])
+            last[0] = now
+            self._last_beat = now
+        anim.valueChanged.connect(on_frame)
+
+    def observe_frame(self, interval):
+        """记录一帧与上一帧的间隔（同时作为 GUI 线程心跳）"""
+        self.frames.observe(interval)
+        self._last_beat = time.perf_counter()
+
+    def report(self):
+        return {"loop_lag": self.loop_lag.snapshot(), "frame_interval": self.frames.snapshot(),
+                "stalls": len(self.stalls)}
+
+    def _arm(self):
+        self._expected = time.perf_counter() + self.interval_ms / 1000
+        self._timer.start(self.interval_ms)
+
+    def _on_tick(self):
+        now = time.perf_counter()
+        lag = max(0.0, now - self._expected)
+        self.loop_lag.observe(lag)
+        self._last_beat = now
+        if lag > self.stall_s:
+            self._report_stall(lag)
+        elif self._samples:
+            self._samples = []
+        self._arm()
+
+    def _report_stall(self, seconds):
+        samples, self._samples = self._samples, []
+        sites = {}
+        for site in samples:
+            sites[site] = sites.get(site, 0) + 1
+        top = sorted(sites.items(), key=lambda kv: -kv[1])[:self.TOP_SITES]
+        self.stalls.append((seconds, top))
+        METRICS.counter("loop_stalls_total").inc()
+        print(f"事件循环卡顿 {seconds * 1000:.0f}ms，主要调用点:", file=sys.stderr)
+        for site, n in top:
+            print(f"    {n:>3} × {site}", file=sys.stderr)
+
+    def _sample_loop(self):
+        """采样线程：GUI 线程心跳超时期间，每 sample_ms 抓取一次其最内层调用点"""
+        while not self._stop.wait(self.sample_s):
+            if time.perf_counter() - self._last_beat <= self.stall_s:
+                continue
+            frame = sys._current_frames().get(self._gui_ident)
+            if frame is not None:
+                self._samples.append(self._call_site(frame))
+
+    @staticmethod
+    def _call_site(frame):
+        """最内层帧及其调用者：func (file:line) ← caller (file:line)"""
+        parts = []
+        while frame is not None and len(parts) < 2:
+            code = frame.f_code
+            parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        return " ← ".join(parts)
+
+
+# ========== 动画驱动 ==========
+class _Transition:
+    """一个进行中的属性过渡"""
+    __slots__ = ("start", "end", "t0", "duration", "easing", "callbacks")
+
+
+class MotionGovernor:
+    """按负载降级动画：full（滑动 + 淡入淡出）→ fade（仅淡入淡出）→ off（立即完成）
+    - 帧间隔的滑动平均或同时在动画中的控件数超过阈值时立即降级
+    - 两者回落到阈值的 3/4 以下并持续 RECOVER_S 秒后逐级恢复；驱动器空闲超过 RECOVER_S 直接恢复
+    - mode 不为 "auto" 时固定在该档位（--motion，低配 VDI 会话可直接关闭动画）"""
+    LEVELS = ("full", "fade", "off")
+    FRAME_S = (0.025, 0.05)   # 帧间隔平均超过：降到 fade / off
+    ANIMATING = (8, 24)       # 同时动画的控件数超过：降到 fade / off
+    RECOVER_S = 1.0
+    SMOOTHING = 0.2
+
+    def __init__(self, mode="auto", now=time.monotonic):
+        if mode != "auto" and mode not in self.LEVELS:
+            raise ValueError(f"unknown motion mode: {mode}")
+        self.mode = mode
+        self._now = now
+        self._rank = 0
+        self._frame = 0.0         # 帧间隔滑动平均（秒）
+        self._animating = 0
+        self._last = None         # 上次观测时刻
+        self._calm_since = None   # 负载回落的起始时刻
+        self._gauge = METRICS.gauge("motion_level")
+        self._gauge.set(0 if mode == "auto" else self.LEVELS.index(mode))
+
+    def observe(self, interval, animating):
+        """驱动器每帧调用：本帧与上一帧的间隔、在动画中的控件数"""
+        self._frame += self.SMOOTHING * (interval - self._frame)
+        self._animating = animating
+        self._last = self._now()
+        self._update()
+
+    def level(self, animating=None):
+        """当前档位；animating 给定时先按即时的动画控件数更新（新动画开始前调用）"""
+        if self.mode != "auto":
+            return self.mode
+        if self._last is not None and self._now() - self._last > self.RECOVER_S:
+            self._frame, self._animating, self._last = 0.0, 0, None
+            self._set_rank(0)
+        if animating is not None:
+            self._animating = animating
+            self._update()
+        return self.LEVELS[self._rank]
+
+    def _demand(self, scale=1.0):
+        rank = 0
+        for i in (0, 1):
+            if self._frame > self.FRAME_S[i] * scale or self._animating > self.ANIMATING[i] * scale:
+                rank = i + 1
+        return rank
+
+    def _update(self):
+        demand = self._demand()
+        if demand > self._rank:
+            METRICS.counter("motion_degraded_total").inc()
+            self._set_rank(demand)
+        elif self._demand(0.75) < self._rank:
+            now = self._now()
+            if self._calm_since is None:
+                self._calm_since = now
+            elif now - self._calm_since >= self.RECOVER_S:
+                self._set_rank(self._rank - 1)
+                self._calm_since = now
+        else:
+            self._calm_since = None
+
+    def _set_rank(self, rank):
+        self._rank = rank
+        self._calm_since = None
+        self._gauge.set(rank)
+
+
+class AnimationDriver(QtCore.QObject):
+    """容器级动画驱动：一个帧定时器推进全部进行中的过渡（取代每个动画各自的 QPropertyAnimation）
+    - 过渡按 (控件, 属性) 登记，属性为 "geometry"（QRect）或 "opacity"（windowOpacity）
+    - 每帧先算出全部插值，再一次性写回；与控件当前值相同的不写，避免无谓的重排
+    - 对同一 (控件, 属性) 再次 animate 即原地改目标：以当前值为起点重新计时，
+      尚未触发的完成回调保留到新过渡结束时一并触发
+    - 按真实时间推进（不受 SimulatedClock 影响）；控件被删除后其过渡自动丢弃
+    - 每帧把帧间隔与动画中的控件数报给 MotionGovernor，调用方按 motion_level() 选择动画档位"""
+
+    def __init__(self, parent=None, motion="auto"):
+        super().__init__(parent)
+        self.frame_monitor = None   # LoopWatchdog：开启时逐帧统计间隔
+        self._transitions = {}      # (控件, 属性) → _Transition
+        self._last_frame = None
+        self._elapsed = QtCore.QElapsedTimer()  # 同 QPropertyAnimation，不受 time 模块打桩影响
+        self._elapsed.start()
+        elapsed = self._elapsed
+        # 不传绑定方法：governor 持有 self 会形成引用环，驱动器只能等 GC 回收
+        self.governor = MotionGovernor(motion, now=lambda: elapsed.nsecsElapsed() / 1e9)
+        self._timer = QtCore.QTimer(self)
+        self._timer.setTimerType(QtCore.Qt.TimerType.PreciseTimer)
+        self._timer.setInterval(FRAME_INTERVAL_MS)
+        self._timer.timeout.connect(self._tick)
+        # 过渡持有控件与完成回调（常引用容器本身）：随 parent 删除时清空，不留待 GC
+        self.destroyed.connect(self._transitions.clear)
+
+    def animate(self, widget, prop, end, duration, easing=QtCore.QEasingCurve.Type.OutCubic,
+                on_finished=None, start=None):
+        """过渡 widget 的 prop 到 end（毫秒时长）；start 给定时立即写入作为起点，否则取当前值"""
+        if start is not None:
+            self._write(widget, prop, start)
+        tr = self._transitions.get((widget, prop))
+        if tr is None:
+            tr = self._transitions[(widget, prop)] = _Transition()
+            tr.callbacks = []
+        tr.start = self._read(widget, prop)
+        tr.end = QtCore.QRect(end) if prop == "geometry" else float(end)
+        tr.t0 = self._now()
+        tr.duration = duration / 1000
+        tr.easing = QtCore.QEasingCurve(easing)
+        if on_finished is not None and on_finished not in tr.callbacks:
+            tr.callbacks.append(on_finished)
+        if not self._timer.isActive():
+            self._last_frame = None
+            self._timer.start()
+
+    def cancel(self, widget, prop=None):
+        """丢弃 widget 的过渡（prop 为 None 时全部属性），不触发完成回调"""
+        for key in [k for k in self._transitions if k[0] is widget and prop in (None, k[1])]:
+            del self._transitions[key]
+        if not self._transitions:
+            self._timer.stop()
+
+    def is_animating(self, widget, prop=None):
+        return any(k[0] is widget and prop in (None, k[1]) for k in self._transitions)
+
+    def pending(self):
+        """进行中的过渡数"""
+        return len(self._transitions)
+
+    def animating(self):
+        """在动画中的控件数"""
+        return len({k[0] for k in self._transitions})
+
+    def motion_level(self):
+        """新动画开始前查询档位："full" / "fade" / "off"（见 MotionGovernor）"""
+        return self.governor.level(self.animating())
+
+    def _now(self):
+        return self._elapsed.nsecsElapsed() / 1e9
+
+    def _tick(self):
+        now = self._now()
+        updates, done = [], []
+        for key, tr in list(self._transitions.items()):
+            if not shiboken6.isValid(key[0]):
+                del self._transitions[key]
+                continue
+            progress = min(1.0, (now - tr.t0) / tr.duration) if tr.duration > 0 else 1.0
+            k = tr.easing.valueForProgress(progress)
+            updates.append((key[0], key[1], self._lerp(tr.start, tr.end, k)))
+            if progress >= 1.0:
+                del self._transitions[key]
+                done.extend(tr.callbacks)
+        # 批量写回：本帧全部几何 / 透明度在同一次回调内应用
+        for widget, prop, value in updates:
+            self._write(widget, prop, value)
+        if self._last_frame is not None:
+            self.governor.observe(now - self._last_frame, len({w for w, _, _ in updates}))
+            if self.frame_monitor is not None:
+                self.frame_monitor.observe_frame(now - self._last_frame)
+        self._last_frame = now
+        if not self._transitions:
+            self._timer.stop()
+        for callback in done:
+            callback()
+
+    @staticmethod
+    def _lerp(a, b, k):
+        if isinstance(a, QtCore.QRect):
+            return QtCore.QRect(round(a.x() + (b.x() - a.x()) * k), round(a.y() + (b.y() - a.y()) * k),
+                                round(a.width() + (b.width() - a.width()) * k),
+                                round(a.height() + (b.height() - a.height()) * k))
+        return a + (b - a) * k
+
+    @staticmethod
+    def _read(widget, prop):
+        return QtCore.QRect(widget.geometry()) if prop == "geometry" else widget.windowOpacity()
+
+    @staticmethod
+    def _write(widget, prop, value):
+        if prop == "geometry":
+            if widget.geometry() != value:
+                widget.setGeometry(value)
+        elif widget.windowOpacity() != value:
+            widget.setWindowOpacity(value)
+
+
 # ========== 到期历史数据结构 ==========
 class ExpiredRecord:
     """单条过期记录（内存维护，不持久化）"""
@@ -69,16 +897,17 @@ class ExpiredRecord:
 
 
 class ExpiredHistory:
-    """FIFO 过期记录集合，最大 100 条"""
+    """FIFO 过期记录集合，默认最多 100 条（频道可单独设置容量）"""
     MAX_RECORDS = 100
 
-    def __init__(self):
+    def __init__(self, max_records=MAX_RECORDS):
+        self.max_records = max_records
         self._records = []
 
     def add(self, record: ExpiredRecord):
         self._records.append(record)
         # FIFO 淘汰
-        if len(self._records) > self.MAX_RECORDS:
+        if len(self._records) > self.max_records:
             self._records.pop(0)
 
     def all(self):
@@ -261,6 +1090,10 @@ class ExpiredSummaryRow(QtWidgets.QWidget):
             self._bg_hover = QtGui.QColor(45, 45, 45, 220)       # hover 加深
         self.update()
 
+    def set_theme(self, theme):
+        self.theme = theme
+        self._apply_style()
+
     def set_count(self, count: int):
         self._count = count
         self.update()
@@ -442,6 +1275,17 @@ class ExpiredOverlay(QtWidgets.QWidget):
         self._text_color = text_color
         self._separator = separator
 
+    def set_theme(self, theme):
+        """切换主题：滚动条样式立即生效；记录行按新配色重建（不可见时推迟到下次显示）"""
+        self.theme = theme
+        self._apply_theme_style()
+        if self.isVisible():
+            self.set_records(self._pending_records)
+        else:
+            self._dirty = True
+        self.update()
+
+    @timed("overlay_set_records_seconds")
     def set_records(self, records):
         """刷新记录列表（最新过期在最上方，倒序）"""
         # 清空旧条目（保留末尾 stretch）
@@ -612,24 +1456,102 @@ class ExpiredOverlay(QtWidgets.QWidget):
         return QtCore.QSize(w, h)
 
 
+# ========== Toast 主题样式 ==========
+# 卡片、倒计时、进度条与动作按钮写在同一份样式表里：切换主题 / 进入过期只需 setStyleSheet 一次，
+# Qt 对整张卡片只做一次 repolish（字体 12pt → 10pt，圆角 12px → 10px）
+THEMES = ("light", "dark")
+_TOAST_PALETTES = {
+    "light": {"bg0": "rgba(255,255,255,220)", "bg1": "rgba(240,240,240,180)", "fg": "black",
+              "border": "rgba(0,0,0,40)", "expired_border": "rgba(255,140,0,200)", "countdown": "blue",
+              "progress_bg": "rgba(0,0,0,30)", "progress_chunk": "#0078d7",
+              "action_bg": "rgba(0,0,0,20)", "action_hover": "rgba(0,0,0,45)"},
+    "dark": {"bg0": "rgba(40,40,40,220)", "bg1": "rgba(20,20,20,180)", "fg": "white",
+             "border": "rgba(255,255,255,40)", "expired_border": "rgba(255,165,0,180)", "countdown": "yellow",
+             "progress_bg": "rgba(255,255,255,40)", "progress_chunk": "#3daee9",
+             "action_bg": "rgba(255,255,255,30)", "action_hover": "rgba(255,255,255,60)"},
+}
+_TOAST_STYLE = """
+    #toast {{
+        background: qlineargradient(x1:0,y1:0,x2:1,y2:1, stop:0 {bg0}, stop:1 {bg1});
+        border-radius: 10px;
+        border: 1px solid {border};
+    }}
+    QLabel {{ color: {fg}; font-size: 10pt; background: transparent; }}
+    QLabel#countdown {{ color: {countdown}; font-weight: bold; font-size: 9pt; }}
+    QProgressBar {{ background: {progress_bg}; border: none; border-radius: 3px; }}
+    QProgressBar::chunk {{ background: {progress_chunk}; border-radius: 3px; }}
+    QPushButton#action {{ color: {fg}; background: {action_bg}; border: none;
+                          border-radius: 4px; padding: 2px 10px; font-size: 9pt; }}
+    QPushButton#action:hover {{ background: {action_hover}; }}
+"""
+# 主题 → (常规样式, 过期样式)；预先格式化，所有 toast 共用同一组字符串
+TOAST_STYLES = {
+    name: (_TOAST_STYLE.format(**p), _TOAST_STYLE.format(**dict(p, border=p["expired_border"])))
+    for name, p in _TOAST_PALETTES.items()
+}
+
+
+def toast_styles(theme):
+    """theme 对应的 (常规, 过期) 样式表；未知主题按 dark"""
+    return TOAST_STYLES.get(theme, TOAST_STYLES["dark"])
+
+
+def normalize_actions(actions):
+    """动作按钮的唯一规则（PayloadSchema 与 Toast / HeadlessToast 共用）：
+    字符串或 {"id", "label"}，最多 MAX_ACTIONS 个，label 缺省为 id 并截断到 MAX_ACTION_LABEL_CHARS；
+    返回 [(id, label), ...]，不合法时抛 ValueError"""
+    actions = actions or ()
+    if len(actions) > MAX_ACTIONS:
+        raise ValueError(f"at most {MAX_ACTIONS} actions are allowed")
+    result = []
+    for a in actions:
+        if isinstance(a, str):
+            a = {"id": a}
+        if not isinstance(a, dict) or not isinstance(a.get("id"), (str, int)) \
+                or isinstance(a.get("id"), bool) or a["id"] == "":
+            raise ValueError("action must be a string or an object with 'id'")
+        label = a.get("label", str(a["id"]))
+        if not isinstance(label, str):
+            raise ValueError("action label must be a string")
+        result.append((str(a["id"]), label[:MAX_ACTION_LABEL_CHARS]))
+    return result
+
+
 # ========== 单个通知 ==========
 class Toast(QtWidgets.QFrame):
     closed = QtCore.Signal(object)
     remaining_changed = QtCore.Signal()
     expired = QtCore.Signal(object)  # 进入 EXPIRED 阶段时发射（携带 self）
+    content_changed = QtCore.Signal(object)  # 原地更新生效后发射（尺寸可能变化）
+    order_changed = QtCore.Signal(object)    # 排序键变化（阶段/时长/优先级）时发射
+    user_event = QtCore.Signal(object, str, object)  # (self, dismissed|swiped|clicked|expired, 动作 ID)
+
+    SWIPE_SAMPLES = 8       # 甩动速度环形缓冲的采样数
+    SWIPE_WINDOW_S = 0.1    # 只用松手前这段时间内的采样估算速度
 
-    def __init__(self, title, message, duration=3000, show_countdown=False, theme="dark"):
+    def __init__(self, title, message, duration=3000, show_countdown=False, theme="dark",
+                 toast_id=None, progress=None, priority="normal", actions=None, clock=None):
         super().__init__()
         self.setObjectName("toast")
+        self.clock = clock or DEFAULT_CLOCK  # 计时与取时间（虚拟时钟下可快进）
+        self.toast_id = toast_id       # 调用方指定的通知 ID（用于原地更新/取消）
+        self.origin = None             # 来源连接 ID（用户事件回传给发送方）
+        self.actions = normalize_actions(actions)  # [(动作 ID, 按钮文字), ...]
+        self.priority = priority if priority in PRIORITY_RANK else "normal"
+        # 进度 toast：progress 非 None 时显示确定进度条（0~100），到 100 进入过期阶段
+        self.is_progress = progress is not None
+        self.progress = self._clamp_progress(progress) if self.is_progress else None
         self.title = title or tr("default_title")
         self.message = message or tr("default_message")
-        self.created_at = time.time()
+        self.created_at = self.clock.time()
         self.duration = duration
         self.remaining = max(1, duration // 1000)
         self.show_countdown = show_countdown
         self.theme = theme
-        self._fade_anim = None
-        self._exit_anim = None
+        self.animator = None  # 动画驱动（加入容器后共用容器的驱动器）
+        self.host = None      # 所在容器
+        self.channel = None   # 所属频道（ToastChannel）
+        self._layout_h = None  # 缓存的排版高度（sizeHint，内容变化时重新测量）
 
         # 到期缓冲：两阶段生命周期
         self.phase = "active"          # "active" | "expired"
@@ -639,57 +1561,21 @@ class Toast(QtWidgets.QFrame):
         # 右滑关闭手势状态（Windows 平板触摸适配）
         self._drag = None
         self._drag_direction = None    # None | "horizontal" | "vertical" 方向锁
-        self._slide_back_anim = None
         self._swipe_threshold = 0.5
         self._fling_velocity = 600.0
         self._direction_lock_threshold = 10  # 锁定方向的距离阈值
+        self._drag_timer = None  # 拖动帧合并定时器（首次拖动时创建）
 
         # 动画状态标记
         self._exiting = False
         self._entering = False
 
-        # 主题样式搭配（字体 12pt → 10pt，圆角 12px → 10px）
-        if theme == "light":
-            self._base_style = """
-                #toast {
-                    background: qlineargradient(x1:0,y1:0,x2:1,y2:1,
-                        stop:0 rgba(255,255,255,220), stop:1 rgba(240,240,240,180));
-                    border-radius: 10px;
-                    border: 1px solid rgba(0,0,0,40);
-                }
-                QLabel { color: black; font-size: 10pt; background: transparent; }
-            """
-            self._expired_style = """
-                #toast {
-                    background: qlineargradient(x1:0,y1:0,x2:1,y2:1,
-                        stop:0 rgba(255,255,255,220), stop:1 rgba(240,240,240,180));
-                    border-radius: 10px;
-                    border: 1px solid rgba(255,140,0,200);
-                }
-                QLabel { color: black; font-size: 10pt; background: transparent; }
-            """
-            countdown_color = "blue"
-        else:
-            self._base_style = """
-                #toast {
-                    background: qlineargradient(x1:0,y1:0,x2:1,y2:1,
-                        stop:0 rgba(40,40,40,220), stop:1 rgba(20,20,20,180));
-                    border-radius: 10px;
-                    border: 1px solid rgba(255,255,255,40);
-                }
-                QLabel { color: white; font-size: 10pt; background: transparent; }
-            """
-            self._expired_style = """
-                #toast {
-                    background: qlineargradient(x1:0,y1:0,x2:1,y2:1,
-                        stop:0 rgba(40,40,40,220), stop:1 rgba(20,20,20,180));
-                    border-radius: 10px;
-                    border: 1px solid rgba(255,165,0,180);
-                }
-                QLabel { color: white; font-size: 10pt; background: transparent; }
-            """
-            countdown_color = "yellow"
+        # 原地更新：同一帧内的多次更新合并为一次 setText
+        self._pending_update = {}
+        self._update_timer = None
 
+        # 主题样式：卡片与子控件共用一份样式表（见 TOAST_STYLES）
+        self._base_style, self._expired_style = toast_styles(theme)
         self.setStyleSheet(self._base_style)
 
         # 阴影
@@ -707,46 +1593,73 @@ class Toast(QtWidgets.QFrame):
         # 标题 + 关闭
         top_layout = QtWidgets.QHBoxLayout()
         top_layout.setSpacing(4)
-        title_lbl = QtWidgets.QLabel(f"<b>{title or tr('default_title')}</b>")
-        close_btn = CloseButton(theme=theme)
-        close_btn.clicked.connect(self._manual_close)
-        top_layout.addWidget(title_lbl)
+        self.title_lbl = QtWidgets.QLabel(f"<b>{self.title}</b>")
+        self.close_btn = CloseButton(theme=theme)
+        self.close_btn.clicked.connect(self._manual_close)
+        top_layout.addWidget(self.title_lbl)
         top_layout.addStretch()
-        top_layout.addWidget(close_btn)
+        top_layout.addWidget(self.close_btn)
         layout.addLayout(top_layout)
 
         # 文本
-        msg_lbl = QtWidgets.QLabel(message or tr("default_message"))
-        msg_lbl.setWordWrap(True)
-        layout.addWidget(msg_lbl)
+        self._message_expanded = False
+        self.msg_lbl = QtWidgets.QLabel()
+        self.msg_lbl.setWordWrap(True)
+        self._set_message_text()
+        layout.addWidget(self.msg_lbl)
 
         # 倒计时
         self.countdown_lbl = QtWidgets.QLabel("")
-        self.countdown_lbl.setStyleSheet(
-            f"color: {countdown_color}; font-weight: bold; font-size: 9pt; background: transparent;"
-        )
+        self.countdown_lbl.setObjectName("countdown")
         layout.addWidget(self.countdown_lbl)
 
+        # 进度条（仅进度 toast 创建）
+        self.progress_bar = None
+        if self.is_progress:
+            self.progress_bar = QtWidgets.QProgressBar()
+            self.progress_bar.setRange(0, 100)
+            self.progress_bar.setTextVisible(False)
+            self.progress_bar.setFixedHeight(6)
+            self.progress_bar.setValue(int(self.progress))
+            self.progress_bar.setAttribute(QtCore.Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+            layout.addWidget(self.progress_bar)
+
+        # 动作按钮（payload 中 actions 定义；点击后回传 clicked 事件并关闭）
+        self.action_buttons = []
+        if self.actions:
+            action_layout = QtWidgets.QHBoxLayout()
+            action_layout.setSpacing(6)
+            action_layout.addStretch()
+            for action_id, label in self.actions:
+                btn = QtWidgets.QPushButton(label)
+                btn.setObjectName("action")
+                btn.setCursor(QtCore.Qt.CursorShape.PointingHandCursor)
+                btn.clicked.connect(lambda _=False, a=action_id: self._on_action(a))
+                action_layout.addWidget(btn)
+                self.action_buttons.append(btn)
+            layout.addLayout(action_layout)
+
         # 让标题/正文/倒计时区域鼠标事件穿透，使整张卡片可接收右滑手势
-        title_lbl.setAttribute(QtCore.Qt.WidgetAttribute.WA_TransparentForMouseEvents)
-        msg_lbl.setAttribute(QtCore.Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.title_lbl.setAttribute(QtCore.Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.msg_lbl.setAttribute(QtCore.Qt.WidgetAttribute.WA_TransparentForMouseEvents)
         self.countdown_lbl.setAttribute(QtCore.Qt.WidgetAttribute.WA_TransparentForMouseEvents)
 
         # 生命周期管理
         if self.show_countdown:
             # 倒计时 toast：tick 驱动生命周期
             self._update_countdown()
-            self._timer = QtCore.QTimer(self)
-            self._timer.timeout.connect(self._tick)
+            self._timer = self.clock.timer(self, self._tick)
             self._timer.start(1000)
         else:
             # 非倒计时 toast：duration 到期直接出场
             # 父子化 timer：toast 被删除时自动停止，避免回调访问已删除 C++ 对象
-            self._exit_timer = QtCore.QTimer(self)
-            self._exit_timer.setSingleShot(True)
-            self._exit_timer.timeout.connect(self.start_exit_anim)
+            self._exit_timer = self.clock.timer(self, self._on_duration_elapsed, single_shot=True)
             self._exit_timer.start(self.duration)
 
+        # 创建时即已完成的进度 toast 直接进入过期阶段（延迟到信号连接之后）
+        if self.is_progress and self.progress >= 100:
+            self.clock.single_shot(self, 0, self._complete_progress)
+
     def showEvent(self, event):
         super().showEvent(event)
         # 入场动画由容器 add_toast 驱动，这里仅设置初始透明度
@@ -766,20 +1679,22 @@ class Toast(QtWidgets.QFrame):
     def _enter_expired_phase(self):
         """进入已过期阶段"""
         self.phase = "expired"
-        self.expired_time = time.time()
+        self.expired_time = self.clock.time()
         if hasattr(self, "_timer"):
             self._timer.stop()
+        if hasattr(self, "_exit_timer"):
+            self._exit_timer.stop()
         # 视觉变化
-        self.countdown_lbl.setText(tr("expired_label"))
+        self.countdown_lbl.setText(tr("progress_done") if self.is_progress else tr("expired_label"))
         self.setStyleSheet(self._expired_style)
         # 5 秒后自动出场（父子化 timer，toast 删除时自动停止）
-        self._expired_exit_timer = QtCore.QTimer(self)
-        self._expired_exit_timer.setSingleShot(True)
-        self._expired_exit_timer.timeout.connect(self.start_exit_anim)
+        self._expired_exit_timer = self.clock.timer(self, self.start_exit_anim, single_shot=True)
         self._expired_exit_timer.start(5000)
         # 通知管理器记录过期（phase 切换瞬间）
         self.expired.emit(self)
+        self.user_event.emit(self, "expired", None)
         self.remaining_changed.emit()
+        self.order_changed.emit(self)
 
     def _update_countdown(self):
         sec = max(0, self.remaining)
@@ -796,14 +1711,185 @@ class Toast(QtWidgets.QFrame):
         parts.append(f"{sec}{tr('seconds')}")
         self.countdown_lbl.setText(tr("countdown_prefix") + "".join(parts))
 
+    # ========== 原地更新（按通知 ID） ==========
+    def update_content(self, title=None, message=None, duration=None, progress=None,
+                       priority=None):
+        """登记一次内容更新；同一帧内的多次更新只保留最后值，帧边界统一生效"""
+        if self._exiting:
+            return
+        if priority in PRIORITY_RANK and priority != self.priority:
+            # 优先级影响排序而非布局，立即生效
+            self.priority = priority
+            self.order_changed.emit(self)
+        if title is not None:
+            self._pending_update["title"] = title
+        if message is not None:
+            self._pending_update["message"] = message
+        if duration is not None:
+            self._pending_update["duration"] = duration
+        if progress is not None and self.is_progress:
+            self._pending_update["progress"] = self._clamp_progress(progress)
+        if not self._pending_update:
+            return
+        if self._update_timer is None:
+            # 父子化 timer：toast 被删除时自动停止
+            self._update_timer = self.clock.timer(self, self._apply_pending_update, single_shot=True)
+        if not self._update_timer.isActive():
+            self._update_timer.start(FRAME_INTERVAL_MS)
+
+    def _apply_pending_update(self):
+        """帧边界：把合并后的更新写入标签；仅当自身高度变化时才通知容器重新布局"""
+        pending, self._pending_update = self._pending_update, {}
+        if not pending or self._exiting:
+            return
+        old_h = self.layout_height()
+        if "title" in pending:
+            self.title = pending["title"] or tr("default_title")
+            self.title_lbl.setText(f"<b>{self.title}</b>")
+        if "message" in pending:
+            self.message = pending["message"] or tr("default_message")
+            self._message_expanded = False
+            self._set_message_text()
+        if "duration" in pending:
+            self._restart_lifecycle(pending["duration"])
+        if "progress" in pending:
+            self._apply_progress(pending["progress"])
+        new_h = self._measure_height()
+        if new_h != old_h:
+            self._layout_h = new_h
+            self.updateGeometry()
+            self.content_changed.emit(self)
+
+    def layout_height(self):
+        """排版高度：首次与内容变化时各测量一次 sizeHint（会重新排版换行的正文），其余时候读缓存"""
+        if self._layout_h is None:
+            self._layout_h = self._measure_height()
+        return self._layout_h
+
+    def _measure_height(self):
+        h = self.sizeHint().height()
+        return h if h > 0 else self.height()
+
+    # ========== 正文折叠 ==========
+    @staticmethod
+    def _elide_message(text):
+        """折叠预览：最多 MESSAGE_PREVIEW_LINES 行 / MESSAGE_PREVIEW_CHARS 个字符；返回 (预览, 是否被折叠)"""
+        preview = text[:MESSAGE_PREVIEW_CHARS]
+        lines = preview.split("\n", MESSAGE_PREVIEW_LINES)
+        if len(lines) > MESSAGE_PREVIEW_LINES:
+            preview = "\n".join(lines[:MESSAGE_PREVIEW_LINES])
+        if len(preview) < len(text):
+            return preview.rstrip() + " …", True
+        return text, False
+
+    def _set_message_text(self):
+        """长正文只排版折叠预览，完整内容保留在 self.message 中按需展开"""
+        preview, elided = self._elide_message(self.message)
+        self.message_elided = elided
+        if elided and self._message_expanded:
+            self.msg_lbl.setText(self.message)
+        else:
+            self.msg_lbl.setText(preview)
+        self.setToolTip(tr("expand_tooltip") if elided and not self._message_expanded else "")
+
+    def toggle_message_expanded(self):
+        """展开/收起被折叠的正文；未折叠时返回 False"""
+        if not self.message_elided or self._exiting:
+            return False
+        self._message_expanded = not self._message_expanded
+        self._set_message_text()
+        self._layout_h = self._measure_height()
+        self.updateGeometry()
+        self.content_changed.emit(self)
+        return True
+
+    # ========== 进度 toast ==========
+    @staticmethod
+    def _clamp_progress(value):
+        try:
+            return min(100.0, max(0.0, float(value)))
+        except (TypeError, ValueError):
+            return 0.0
+
+    def set_progress(self, value):
+        """驱动进度条；高频调用按帧合并，每帧最多重绘一次"""
+        self.update_content(progress=value)
+
+    def _apply_progress(self, value):
+        """帧边界写入进度值；到 100 进入过期阶段，完成后回退则重新开始"""
+        if self.phase == "expired":
+            if value >= 100:
+                return
+            self._restart_lifecycle(self.duration)
+        self.progress = value
+        if int(value) != self.progress_bar.value():
+            self.progress_bar.setValue(int(value))
+        if value >= 100:
+            self._complete_progress()
+        elif not self.show_countdown:
+            # 无倒计时的进度 toast：duration 视为空闲超时，每次进度推进重新计时
+            self._exit_timer.start(self.duration)
+
+    def _complete_progress(self):
+        if self.phase == "active" and not self._exiting:
+            self.progress_bar.setValue(100)
+            self._enter_expired_phase()
+
+    def _restart_lifecycle(self, duration):
+        """按新 duration 重新计时；已进入过期缓冲的 toast 恢复为 ACTIVE"""
+        self.duration = duration
+        self.remaining = max(1, duration // 1000)
+        if self.phase == "expired":
+            self.phase = "active"
+            self.expired_time = None
+            if getattr(self, "_expired_exit_timer", None) is not None:
+                self._expired_exit_timer.stop()
+            self.setStyleSheet(self._base_style)
+        if self.show_countdown:
+            self._update_countdown()
+            self._timer.start(1000)
+            self.remaining_changed.emit()
+        else:
+            self._exit_timer.start(self.duration)
+        self.order_changed.emit(self)
+
+    def set_theme(self, theme):
+        """运行时切换主题：替换卡片样式表（子控件随之重绘），不重建控件；主题未变返回 False"""
+        if theme == self.theme:
+            return False
+        self.theme = theme
+        self.close_btn.theme = theme
+        self._base_style, self._expired_style = toast_styles(theme)
+        self.setStyleSheet(self._expired_style if self.phase == "expired" else self._base_style)
+        return True
+
+    # ========== 用户事件 ==========
+    def _on_action(self, action_id):
+        if self._exiting:
+            return
+        self.user_event.emit(self, "clicked", action_id)
+        self.start_exit_anim()
+
+    def _on_duration_elapsed(self):
+        """非倒计时 toast 显示时长到期"""
+        if not self._exiting:
+            self.user_event.emit(self, "expired", None)
+        self.start_exit_anim()
+
     # ========== 统一出场动画（右滑 + 淡出） ==========
     def _manual_close(self):
+        if not self._exiting:
+            self.user_event.emit(self, "dismissed", None)
         self.start_exit_anim()
 
     def start_exit_anim(self):
         if self._exiting:
             return
         self._exiting = True
+        if not self.clock.realtime:
+            # 虚拟时钟：动画按真实时间运行，改为按虚拟时间经过出场时长后关闭
+            self.clock.single_shot(self, 150, self._final_close)
+            return
 
         # 记录当前几何，提到最上层做滑出动画
         # 不在动画前 removeWidget，避免其他 toast 立即重排
@@ -815,25 +1901,25 @@ class Toast(QtWidgets.QFrame):
         exit_geo = QtCore.QRect(current_geo)
         exit_geo.moveLeft(exit_geo.left() + self.width())
 
-        anim_group = QtCore.QParallelAnimationGroup(self)
-
-        fade_anim = QtCore.QPropertyAnimation(self, b"windowOpacity", self)
-        fade_anim.setDuration(150)
-        fade_anim.setStartValue(self.windowOpacity())
-        fade_anim.setEndValue(0)
-        fade_anim.setEasingCurve(QtCore.QEasingCurve.Type.InCubic)
-
-        slide_anim = QtCore.QPropertyAnimation(self, b"geometry", self)
-        slide_anim.setDuration(150)
-        slide_anim.setStartValue(current_geo)
-        slide_anim.setEndValue(exit_geo)
-        slide_anim.setEasingCurve(QtCore.QEasingCurve.Type.InCubic)
+        animator = self._animator()
+        level = animator.motion_level()
+        if level == "off":
+            self.clock.single_shot(self, 0, self._final_close)
+            return
+        if level == "fade":
+            # 降级：只淡出，不滑动（几何不变，不触发重排）
+            animator.animate(self, "opacity", 0.0, 150, QtCore.QEasingCurve.Type.InCubic,
+                             on_finished=self._final_close)
+            return
+        animator.animate(self, "opacity", 0.0, 150, QtCore.QEasingCurve.Type.InCubic)
+        animator.animate(self, "geometry", exit_geo, 150, QtCore.QEasingCurve.Type.InCubic,
+                         on_finished=self._final_close)
 
-        anim_group.addAnimation(fade_anim)
-        anim_group.addAnimation(slide_anim)
-        anim_group.finished.connect(self._final_close)
-        anim_group.start(QtCore.QAbstractAnimation.DeletionPolicy.DeleteWhenStopped)
-        self._exit_anim = anim_group
+    def _animator(self):
+        """加入容器后共用容器的动画驱动；单独使用（或容器已销毁）时按需创建自己的"""
+        if self.animator is None or not shiboken6.isValid(self.animator):
+            self.animator = AnimationDriver(self)
+        return self.animator
 
     def _final_close(self):
         self.closed.emit(self)
@@ -855,11 +1941,12 @@ class Toast(QtWidgets.QFrame):
             self._drag = {
                 "start_global": gp,
                 "origin_geo": self.geometry(),
-                "last_x": gp.x(),
                 "last_y": gp.y(),
                 "init_scroll": self._get_scroll_value(),
-                "last_time": time.perf_counter(),
-                "velocity": 0.0,
+                # 最近几次移动的 (事件时间戳秒, 全局 x)，松手时据此估算甩动速度
+                "samples": deque([(event.timestamp() / 1000, gp.x())], maxlen=self.SWIPE_SAMPLES),
+                "dx": 0,           # 待应用的水平偏移
+                "scroll_dy": 0,    # 待应用的垂直滚动量
                 "moved": False,
             }
             self._drag_direction = None
@@ -880,48 +1967,84 @@ class Toast(QtWidgets.QFrame):
                         self._drag_direction = "horizontal"
 
             if self._drag_direction == "vertical":
-                # 垂直方向 → 交给父 QScrollArea 处理滚动
-                dy = gp.y() - self._drag["last_y"]
-                self._scroll_by(-dy)
+                # 垂直方向 → 交给父 QScrollArea 处理滚动（按帧合并）
+                self._drag["scroll_dy"] += gp.y() - self._drag["last_y"]
                 self._drag["last_y"] = gp.y()
                 self._drag["moved"] = True  # 标记已处理，避免 press 误触发按钮
+                self._schedule_drag_frame()
                 return  # 不调用 super，避免布局/位置干扰
 
             if self._drag_direction == "horizontal":
                 dx = max(0, delta.x())
                 if dx > 2:
                     self._drag["moved"] = True
-                self.setGeometry(self._drag["origin_geo"].translated(dx, 0))
-                now = time.perf_counter()
-                dt = now - self._drag["last_time"]
-                if dt > 0:
-                    inst = (gp.x() - self._drag["last_x"]) / dt
-                    self._drag["velocity"] = 0.6 * inst + 0.4 * self._drag["velocity"]
-                self._drag["last_time"] = now
-                self._drag["last_x"] = gp.x()
+                self._drag["dx"] = dx
+                self._drag["samples"].append((event.timestamp() / 1000, gp.x()))
+                self._schedule_drag_frame()
         super().mouseMoveEvent(event)
 
+    def _schedule_drag_frame(self):
+        """高频触摸事件只记录位置，每帧最多应用一次（真实时间，与手势同步）"""
+        if self._drag_timer is None:
+            self._drag_timer = QtCore.QTimer(self)
+            self._drag_timer.setSingleShot(True)
+            self._drag_timer.timeout.connect(self._apply_drag_frame)
+        if not self._drag_timer.isActive():
+            self._drag_timer.start(FRAME_INTERVAL_MS)
+
+    def _apply_drag_frame(self):
+        """应用本帧累积的拖动：水平跟手只 move（尺寸不变，不使 vbox 布局失效）"""
+        if self._drag is None:
+            return
+        if self._drag["scroll_dy"]:
+            self._scroll_by(-self._drag["scroll_dy"])
+            self._drag["scroll_dy"] = 0
+        if self._drag_direction == "horizontal":
+            pos = self._drag["origin_geo"].topLeft() + QtCore.QPoint(self._drag["dx"], 0)
+            if pos != self.pos():
+                self.move(pos)
+
+    def _fling_velocity_px(self):
+        """甩动速度（像素/秒）：环形缓冲中最近 SWIPE_WINDOW_S 内首尾两个采样的位移 / 时间"""
+        samples = self._drag["samples"]
+        t1, x1 = samples[-1]
+        t0, x0 = t1, x1
+        for t, x in reversed(samples):
+            if t1 - t > self.SWIPE_WINDOW_S:
+                break
+            t0, x0 = t, x
+        return (x1 - x0) / (t1 - t0) if t1 > t0 else 0.0
+
     def mouseReleaseEvent(self, event):
         if self._drag and self._drag.get("moved"):
             # 垂直滚动方向：无需关闭 toast
             if self._drag_direction == "vertical":
+                self._apply_drag_frame()
                 self._drag = None
                 self._drag_direction = None
                 return
-            # 水平方向：根据阈值/速度判定是否关闭
+            # 水平方向：先应用尚未到帧的位置，再根据阈值/速度判定是否关闭
+            self._apply_drag_frame()
             origin_x = self._drag["origin_geo"].x()
-            offset = self.geometry().x() - origin_x
-            velocity = self._drag["velocity"]
+            offset = self.x() - origin_x
+            velocity = self._fling_velocity_px()
             width = self.width() or 1
             if offset >= width * self._swipe_threshold or velocity >= self._fling_velocity:
                 self._drag = None
                 self._drag_direction = None
+                if not self._exiting:
+                    self.user_event.emit(self, "swiped", None)
                 self.start_exit_anim()
                 return
             self._animate_back_to(self._drag["origin_geo"])
             self._drag = None
             self._drag_direction = None
             return
+        if self._drag is not None and event.button() == QtCore.Qt.MouseButton.LeftButton \
+                and not self._exiting:
+            # 单击（无拖动）：回传 clicked 事件，并展开/收起被折叠的长正文
+            self.user_event.emit(self, "clicked", None)
+            self.toggle_message_expanded()
         self._drag = None
         self._drag_direction = None
         super().mouseReleaseEvent(event)
@@ -940,46 +2063,46 @@ class Toast(QtWidgets.QFrame):
         bar.setValue(bar.value() + int(dy))
 
     def _animate_back_to(self, geo):
-        self._slide_back_anim = QtCore.QPropertyAnimation(self, b"geometry", self)
-        self._slide_back_anim.setDuration(200)
-        self._slide_back_anim.setStartValue(self.geometry())
-        self._slide_back_anim.setEndValue(geo)
-        self._slide_back_anim.setEasingCurve(QtCore.QEasingCurve.Type.OutCubic)
-        self._slide_back_anim.start(QtCore.QAbstractAnimation.DeletionPolicy.DeleteWhenStopped)
+        self._animator().animate(self, "geometry", geo, 200)
 
 
 # ========== 容器 ==========
 class ToastContainer(QtWidgets.QWidget):
-    def __init__(self, theme="dark", no_expired_history=False):
+    def __init__(self, theme="dark", no_expired_history=False, clock=None, motion="auto", screen=None,
+                 slot=0):
         super().__init__(None, QtCore.Qt.WindowType.Tool | QtCore.Qt.WindowType.FramelessWindowHint |
                          QtCore.Qt.WindowType.WindowStaysOnTopHint)
         self.setAttribute(QtCore.Qt.WidgetAttribute.WA_TranslucentBackground)
         self.theme = theme
         self.no_expired_history = no_expired_history
+        self.clock = clock or DEFAULT_CLOCK
         self.pinned = True
         self.margin = 50
-        self.screen = QtWidgets.QApplication.primaryScreen().availableGeometry()
-        self.max_height = self.screen.height() - 2 * self.margin
         self.width = 300
+        self.slot = slot  # 同一屏幕上多个频道并排：0 在最右，依次向左
+        # 所在屏幕（QScreen）：可用区域与锚点只在屏幕几何变化时重算（见 set_screen）
+        self.qscreen = None
+        self.set_screen(screen or QtWidgets.QApplication.primaryScreen(), relayout=False)
 
         # 批量插入错峰计数
         self._stagger_count = 0
         self._insert_counter = 0
+        # 高度记账：toast → 已计入的排版高度，及其总和（adjust_height 无需遍历 toast）
+        self._toast_heights = {}
+        self._sum_toast_h = 0
+        # toast.host 指回容器：删除时清空记账，残留的 toast 与容器不形成引用环
+        self.destroyed.connect(self._toast_heights.clear)
 
         # 到期列表：摘要行 + 浮层（no_expired_history=True 时不创建）
         self.summary_row = None
         self.overlay = None
-        self._height_anim = None  # 容器高度过渡动画
+        # 入场 / 出场 / 重排 / 高度过渡共用一个帧定时器；motion 为动画档位（"auto" 按负载降级）
+        self.animator = AnimationDriver(self, motion=motion)
         self._outside_click_timer = None  # 浮层外部点击检测定时器
 
         # 初始位置（靠右上）
         init_h = 120
-        self.setGeometry(
-            self.screen.right() - self.width - self.margin,
-            self.screen.top() + self.margin,
-            self.width,
-            init_h
-        )
+        self.setGeometry(self._anchor.x(), self._anchor.y(), self.width, init_h)
 
         # 顶部工具栏
         toolbar = QtWidgets.QHBoxLayout()
@@ -1041,6 +2164,41 @@ class ToastContainer(QtWidgets.QWidget):
         self.show()
         self.setWindowOpacity(TOAST_OPACITY)
 
+    # ========== 屏幕 ==========
+    def set_screen(self, qscreen, relayout=True):
+        """切换所在屏幕并跟随其可用区域变化（分辨率 / 任务栏 / 缩放），toast 原样保留"""
+        if self.qscreen is not None:
+            try:
+                self.qscreen.availableGeometryChanged.disconnect(self._on_screen_geometry_changed)
+            except (RuntimeError, TypeError):
+                pass  # 屏幕已移除
+        self.qscreen = qscreen
+        qscreen.availableGeometryChanged.connect(self._on_screen_geometry_changed)
+        self._place(qscreen.availableGeometry())
+        if relayout:
+            self.adjust_height()
+
+    def _on_screen_geometry_changed(self, rect):
+        self._place(rect)
+        self.adjust_height()
+
+    def _place(self, rect):
+        """按屏幕可用区域计算高度上限与右上角锚点（adjust_height 直接使用）"""
+        self.screen = QtCore.QRect(rect)
+        self.max_height = self.screen.height() - 2 * self.margin
+        # 频道并排：放不下时回绕到最右列，容器始终留在屏幕内
+        columns = max(1, (self.screen.width() - self.margin) // (self.width + self.margin))
+        x = self.screen.right() - self.width - self.margin - self.slot % columns * (self.width + self.margin)
+        self._anchor = QtCore.QPoint(x, self.screen.top() + self.margin)
+
+    def dispose(self):
+        """关闭并销毁容器及其浮层（浮层是独立顶层窗口，不随容器析构）"""
+        if self.overlay is not None:
+            self.overlay.close()
+            self.overlay.deleteLater()
+        self.close()
+        self.deleteLater()
+
     # ========== 到期列表触发逻辑 ==========
     def _on_summary_hover_enter(self):
         """鼠标进入摘要行：若非 click 锁定则显示浮层"""
@@ -1227,8 +2385,26 @@ class ToastContainer(QtWidgets.QWidget):
                 self.overlay._pending_records = list(records)
                 self.overlay._dirty = True
 
+    def set_theme(self, theme):
+        """运行时切换主题：一次批量重设存活 toast、摘要行、浮层与滚动条样式，不重建控件。
+        期间暂停重绘，结束后整窗只重绘一次；返回重设样式的 toast 数"""
+        if theme == self.theme:
+            return 0
+        self.theme = theme
+        self.pin_btn.theme = self.close_all_btn.theme = theme
+        self.setUpdatesEnabled(False)
+        try:
+            restyled = sum(toast.set_theme(theme) for toast in self._toast_heights)
+            if self.summary_row is not None:
+                self.summary_row.set_theme(theme)
+                self.overlay.set_theme(theme)
+            self._apply_scrollbar_style()
+        finally:
+            self.setUpdatesEnabled(True)
+        return restyled
+
     def _apply_scrollbar_style(self):
-        """为主滚动条应用主题样式"""
+        """为主滚动条应用主题样式。样式只设在滚动条上：设在 QScrollArea 上会连带重新 polish 其中全部 toast"""
         if self.scroll is None:
             return
         if self.theme == "light":
@@ -1237,8 +2413,7 @@ class ToastContainer(QtWidgets.QWidget):
         else:
             handle = "#888"
             bg = "rgba(30,30,30,160)"
-        self.scroll.setStyleSheet(f"""
-            QScrollArea {{ background: transparent; border: none; }}
+        self.scroll.verticalScrollBar().setStyleSheet(f"""
             QScrollBar:vertical {{
                 background: {bg};
                 width: 8px;
@@ -1279,162 +2454,176 @@ class ToastContainer(QtWidgets.QWidget):
             self._sync_overlay_geometry()
             self.overlay.raise_()
 
+    @timed("container_add_toast_seconds")
     def add_toast(self, toast):
-        # 设置插入顺序
-        toast._insert_order = self._insert_counter
-        self._insert_counter += 1
-
-        # 智能插入位置：有倒计时 toast 找到第一个 remaining 更大的位置
-        insert_index = self.vbox.count() - 1  # 默认在 stretch 前面（末尾）
-        if toast.show_countdown and toast.phase == "active":
-            for i in range(self.vbox.count() - 1):
-                item = self.vbox.itemAt(i)
-                if item and item.widget():
-                    t = item.widget()
-                    if t.show_countdown and t.phase == "active" and t.remaining > toast.remaining:
-                        insert_index = i
-                        break
-        # 无倒计时 toast 始终插入到有倒计时 toast 之后（末尾）
-
-        self.vbox.insertWidget(insert_index, toast)
-
-        # 错峰延迟
-        self._stagger_count += 1
-        delay = (self._stagger_count - 1) * 60
+        # 插入顺序：经 ToastManager 创建的 toast 已带全局序号（跨频道 / 屏幕可比，迁移容器时保留），
+        # 单独使用容器时按本容器计数
+        if not toast._insert_order:
+            self._insert_counter += 1
+            toast._insert_order = self._insert_counter
+        toast.animator = self.animator
+        toast.host = self
+
+        # 有序插入：vbox 始终按排序键有序，二分查找插入位置（不再整体重排）
+        self.vbox.insertWidget(self._insertion_index(toast), toast)
+        height = self._toast_heights[toast] = toast.layout_height()
+        self._sum_toast_h += height
+
+        # 错峰延迟（critical 立即入场，不占用错峰名额）
+        urgent = toast.priority == "critical"
+        if urgent:
+            delay = 0
+        else:
+            self._stagger_count += 1
+            delay = (self._stagger_count - 1) * 60
 
         def _start_entry_anim():
             # 注：错峰计数在动画完成时递减（见 _on_entry_finished），
             # 不能在启动时递减，否则 processEvents() 提前触发 singleShot(0)
             # 会导致后续 toast 的 delay 计算偏小，错峰失效。
+            if toast not in self._toast_heights:
+                # 入场前已被移出容器：不再显示，只归还错峰名额
+                if not urgent:
+                    self._stagger_count -= 1
+                return
             toast._entering = True
             toast.show()
-            toast.setWindowOpacity(0.0)
-
+            level = self.animator.motion_level()
+            if not self.clock.realtime or level == "off":
+                # 虚拟时钟：跳过入场动画（动画按真实时间运行）；负载过高时同样直接显示
+                toast.setWindowOpacity(TOAST_OPACITY)
+                toast._entering = False
+                if not urgent:
+                    self._stagger_count -= 1
+                return
             end_geo = QtCore.QRect(toast.geometry())
             start_geo = QtCore.QRect(end_geo)
             start_geo.moveLeft(start_geo.left() + toast.width())  # 从右侧滑入
 
-            anim_group = QtCore.QParallelAnimationGroup(toast)
-
-            fade_anim = QtCore.QPropertyAnimation(toast, b"windowOpacity", toast)
-            fade_anim.setDuration(200)
-            fade_anim.setStartValue(0.0)
-            fade_anim.setEndValue(TOAST_OPACITY)
-            fade_anim.setEasingCurve(QtCore.QEasingCurve.Type.OutCubic)
-
-            slide_anim = QtCore.QPropertyAnimation(toast, b"geometry", toast)
-            slide_anim.setDuration(200)
-            slide_anim.setStartValue(start_geo)
-            slide_anim.setEndValue(end_geo)
-            slide_anim.setEasingCurve(QtCore.QEasingCurve.Type.OutCubic)
-
-            anim_group.addAnimation(fade_anim)
-            anim_group.addAnimation(slide_anim)
-
             # 动画完成时：清除入场标记 + 递减错峰计数
             def _on_entry_finished():
                 toast._entering = False
-                self._stagger_count -= 1
-            anim_group.finished.connect(_on_entry_finished)
+                if not urgent:
+                    self._stagger_count -= 1
 
-            anim_group.start(QtCore.QAbstractAnimation.DeletionPolicy.DeleteWhenStopped)
-            toast._fade_anim = anim_group
+            if level == "fade":
+                # 降级：只淡入，不滑动
+                self.animator.animate(toast, "opacity", TOAST_OPACITY, 200, start=0.0,
+                                      on_finished=_on_entry_finished)
+                return
+            self.animator.animate(toast, "opacity", TOAST_OPACITY, 200, start=0.0)
+            self.animator.animate(toast, "geometry", end_geo, 200, start=start_geo,
+                                  on_finished=_on_entry_finished)
 
         self.adjust_height()
         QtWidgets.QApplication.processEvents()
 
         # 父子化 timer：toast 被删除时自动停止，避免回调访问已删除 C++ 对象
-        entry_timer = QtCore.QTimer(toast)
-        entry_timer.setSingleShot(True)
-        entry_timer.timeout.connect(_start_entry_anim)
+        entry_timer = self.clock.timer(toast, _start_entry_anim, single_shot=True)
         entry_timer.start(delay)
         toast._entry_timer = entry_timer
 
-        # 入场后触发排序（延迟到入场动画启动后）
-        reorder_timer = QtCore.QTimer(toast)
-        reorder_timer.setSingleShot(True)
-        reorder_timer.timeout.connect(self.reorder_toasts)
-        reorder_timer.start(delay + 50)
-        toast._reorder_timer = reorder_timer
-
     def remove_toast(self, toast):
         self.vbox.removeWidget(toast)
         toast.setParent(None)
+        self._sum_toast_h -= self._toast_heights.pop(toast, 0)
         self.adjust_height()
 
-    # ========== 倒计时动态排序 ==========
-    def reorder_toasts(self):
-        # 收集非退出、非入场中的 toast（跳过 stretch）
-        toasts = []
-        for i in range(self.vbox.count() - 1):
-            item = self.vbox.itemAt(i)
-            if item and item.widget():
-                t = item.widget()
-                if not getattr(t, '_exiting', False) and not getattr(t, '_entering', False):
-                    toasts.append(t)
-
-        if len(toasts) <= 1:
+    def update_toast_height(self, toast):
+        """toast 内容变化后：按新旧高度之差更新总和，高度确有变化时才调整容器"""
+        old = self._toast_heights.get(toast)
+        if old is None:
             return
+        new = toast.layout_height()
+        if new != old:
+            self._toast_heights[toast] = new
+            self._sum_toast_h += new - old
+            self.adjust_height()
+
+    # ========== 有序索引 ==========
+    def _order_key(self, t):
+        """排序键（同一时刻可比较）：优先级降序 → EXPIRED → ACTIVE 倒计时 → ACTIVE 无倒计时
+        倒计时 toast 同速递减，相对顺序不随 tick 改变，因此 tick 无需重排"""
+        rank = PRIORITY_RANK.get(getattr(t, "priority", "normal"), 1)
+        if t.phase == "expired":
+            return (-rank, 0, t.expired_time or 0)
+        if t.show_countdown:
+            return (-rank, 1, t.remaining)
+        return (-rank, 2, -getattr(t, "_insert_order", 0))
+
+    def _insertion_index(self, toast):
+        """在 vbox（始终有序）中二分查找插入位置，O(log n) 次比较；
+        键相同时排在已有 toast 之后（保持到达顺序）"""
+        key = self._order_key(toast)
+        lo, hi = 0, self.vbox.count() - 1  # 跳过末尾 stretch
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if key < self._order_key(self.vbox.itemAt(mid).widget()):
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+    @timed("container_reposition_seconds")
+    def reposition_toast(self, toast):
+        """单个 toast 排序键变化：取出后二分插回，仅对位置变化的 toast 做过渡动画"""
+        old_index = self.vbox.indexOf(toast)
+        if old_index < 0 or toast._exiting:
+            return
+        # removeWidget 只标记布局失效，几何在下一次布局前保持不变
+        self.vbox.removeWidget(toast)
+        new_index = self._insertion_index(toast)
+        if new_index == old_index:
+            self.vbox.insertWidget(old_index, toast)
+            return
+        lo, hi = min(old_index, new_index), max(old_index, new_index)
+        affected = [toast] + [self.vbox.itemAt(i).widget() for i in range(lo, hi)]
+        affected = [t for t in affected if not t._entering and not t._exiting]
+        old_geos = {id(t): QtCore.QRect(t.geometry()) for t in affected}
+        self.vbox.insertWidget(new_index, toast)
+        self.vbox.activate()  # 同步排版取新几何；不转事件循环，避免其他 toast 的更新在此嵌套重入
+        self._animate_moves(affected, old_geos)
+
+    def _animate_moves(self, toasts, old_geos):
+        """对位置变化的 toast 做滑动过渡（仍在移动中的 toast 从当前位置改目标）。
+        动画降级（fade / off）时直接落位：移动没有更省的淡入淡出版本"""
+        if self.animator.motion_level() != "full":
+            for t in toasts:
+                self.animator.cancel(t, "geometry")
+            return
+        for t in toasts:
+            old = old_geos.get(id(t))
+            new = QtCore.QRect(t.geometry())
+            if old and old != new:
+                self.animator.animate(t, "geometry", new, 200, start=old)  # 先回到旧位置
 
-        # 记录重排前的几何
-        old_geos = {id(t): QtCore.QRect(t.geometry()) for t in toasts}
-
-        # 排序
+    # ========== 整体重排（仅用于全量校正；日常变化走 reposition_toast） ==========
+    @timed("container_reorder_seconds")
+    def reorder_toasts(self):
+        """按 _order_key 重排 vbox 中全部 toast（含入场 / 出场中的，保持二分插入所依赖的有序性），
+        只对位置变化且不在入场 / 出场中的 toast 做过渡"""
+        toasts = [self.vbox.itemAt(i).widget() for i in range(self.vbox.count() - 1)]
         sorted_toasts = self._sort_toasts(toasts)
-
-        # 检查顺序是否变化
         if sorted_toasts == toasts:
             return
-
-        # 从布局中移除并重新插入
-        for t in sorted_toasts:
+        moving = [t for t in toasts if not t._entering and not t._exiting]
+        old_geos = {id(t): QtCore.QRect(t.geometry()) for t in moving}
+        for t in toasts:
             self.vbox.removeWidget(t)
-        for t in sorted_toasts:
-            self.vbox.insertWidget(self.vbox.count() - 1, t)
-
+        for i, t in enumerate(sorted_toasts):
+            self.vbox.insertWidget(i, t)
         QtWidgets.QApplication.processEvents()
-
-        # 对位置变化的 toast 做滑动过渡动画
-        for t in sorted_toasts:
-            old = old_geos.get(id(t))
-            new = t.geometry()
-            if old and old != new:
-                t.setGeometry(old)  # 先回到旧位置
-                anim = QtCore.QPropertyAnimation(t, b"geometry", t)
-                anim.setDuration(200)
-                anim.setStartValue(old)
-                anim.setEndValue(QtCore.QRect(new))
-                anim.setEasingCurve(QtCore.QEasingCurve.Type.OutCubic)
-                anim.start(QtCore.QAbstractAnimation.DeletionPolicy.DeleteWhenStopped)
-                t._reorder_anim = anim
+        self._animate_moves(moving, old_geos)
 
     def _sort_toasts(self, toasts):
-        """排序规则：EXPIRED 最上 → ACTIVE 有倒计时(remaining升序) → ACTIVE 无倒计时(插入倒序)"""
-        expired = [t for t in toasts if t.phase == "expired"]
-        active_cd = [t for t in toasts if t.phase == "active" and t.show_countdown]
-        active_no = [t for t in toasts if t.phase == "active" and not t.show_countdown]
-
-        # 已过期：按进入过期阶段的时间升序（最早过期在最上）
-        expired.sort(key=lambda t: t.expired_time or 0)
-
-        # 有倒计时：按 remaining 升序，5 秒防抖（差值 < 5 秒保持原序）
-        active_cd.sort(key=cmp_to_key(self._compare_countdown))
-
-        # 无倒计时：按插入时间倒序（最新在上）
-        active_no.sort(key=lambda t: -getattr(t, '_insert_order', 0))
-
-        return expired + active_cd + active_no
-
-    def _compare_countdown(self, a, b):
-        """比较两个有倒计时的 toast，差值 < 5 秒则保持原序"""
-        diff = a.remaining - b.remaining
-        if abs(diff) >= 5:
-            return diff  # remaining 小的排前面
-        return 0  # 保持原有相对顺序（stable sort）
+        """与二分插入相同的顺序（_order_key）：优先级降序，同优先级内 EXPIRED 最上
+        → ACTIVE 有倒计时（remaining 升序）→ ACTIVE 无倒计时（插入倒序）；键相同保持原序"""
+        return sorted(toasts, key=self._order_key)
 
+    @timed("container_adjust_height_seconds")
     def adjust_height(self):
         """容器高度自适应内容：高度 = min(toolbar + summary + sum_toast_h, 屏幕可用高度)
-        高度变化用 150ms QPropertyAnimation 平滑过渡。浮层尺寸同步覆盖 container。"""
+        高度变化经容器动画驱动 150ms 平滑过渡。浮层尺寸同步覆盖 container。"""
         # 1) 懒初始化 QScrollArea
         if not self.scroll:
             self.root.removeWidget(self.container)
@@ -1451,6 +2640,7 @@ class ToastContainer(QtWidgets.QWidget):
             scrollbar_w = self.scroll.verticalScrollBar().sizeHint().width()
             self.scroll.setFixedWidth(self.width + scrollbar_w)
             self.container.setFixedWidth(self.width)
+            self.scroll.setStyleSheet("QScrollArea { background: transparent; border: none; }")
             self._apply_scrollbar_style()
 
         # 2) 计算各部分高度
@@ -1459,19 +2649,9 @@ class ToastContainer(QtWidgets.QWidget):
         summary_h = self.summary_row.sizeHint().height() if self.summary_row is not None else 0
         margins_h = 4 + 4 + 3  # root 上下边距 + spacing
 
-        # toast 内容高度之和
-        sum_toast_h = 0
-        for i in range(self.vbox.count() - 1):  # 跳过末尾 stretch
-            item = self.vbox.itemAt(i)
-            w = item.widget() if item else None
-            if w is not None:
-                hint = w.sizeHint().height()
-                if hint <= 0:
-                    hint = w.height()
-                sum_toast_h += hint
-        # 加上 vbox 间距
-        n_toasts = max(0, self.vbox.count() - 1)
-        sum_toast_h += 4 + 6 + n_toasts * 6  # vbox 上下边距 + 间距
+        # toast 内容高度之和（增删与内容变化时增量维护，O(1)）
+        n_toasts = len(self._toast_heights)
+        sum_toast_h = self._sum_toast_h + 4 + 6 + n_toasts * 6  # vbox 上下边距 + 间距
 
         # 3) 容器目标高度 = toolbar + summary + scroll内容 + margins
         target_h = toolbar_h + summary_h + sum_toast_h + margins_h
@@ -1485,135 +2665,1656 @@ class ToastContainer(QtWidgets.QWidget):
         self.scroll.setMinimumHeight(scroll_h)
         self.scroll.setMaximumHeight(scroll_h)
 
-        # 5) 用 QPropertyAnimation 平滑过渡容器几何（150ms）
-        x = self.screen.right() - self.width - self.margin
-        y = self.screen.top() + self.margin
-        target_geo = QtCore.QRect(x, y, self.width, target_h)
-
-        # 终止正在进行的动画（DeleteWhenStopped 可能已删除 C++ 对象）
-        if self._height_anim is not None:
-            try:
-                self._height_anim.stop()
-            except RuntimeError:
-                pass
-            self._height_anim = None
-
-        anim = QtCore.QPropertyAnimation(self, b"geometry", self)
-        anim.setDuration(150)
-        anim.setStartValue(QtCore.QRect(self.geometry()))
-        anim.setEndValue(target_geo)
-        anim.setEasingCurve(QtCore.QEasingCurve.Type.InOutCubic)
-        # 动画自然结束时清理 Python 引用，避免悬挂指针
-        anim.finished.connect(lambda: self._on_height_anim_finished(anim))
-        anim.start(QtCore.QAbstractAnimation.DeletionPolicy.DeleteWhenStopped)
-        self._height_anim = anim
+        # 5) 平滑过渡容器几何（150ms）；进行中的高度过渡原地改目标
+        target_geo = QtCore.QRect(self._anchor.x(), self._anchor.y(), self.width, target_h)
+        if self.animator.motion_level() == "off":
+            self.animator.cancel(self, "geometry")
+            self.setGeometry(target_geo)
+        else:
+            self.animator.animate(self, "geometry", target_geo, 150, QtCore.QEasingCurve.Type.InOutCubic,
+                                  on_finished=self._on_height_anim_finished)
 
         # 6) 同步浮层尺寸（如果可见）
         if self.overlay is not None and self.overlay.isVisible():
             self._sync_overlay_geometry()
 
-    def _on_height_anim_finished(self, anim):
-        """高度动画结束：清理引用，并追加一次浮层位置同步。
-        防止动画期间被 refresh_expired_history 等路径调用 _sync_overlay_geometry
-        时使用了动画中间值导致浮层位置偏差。"""
-        self._clear_height_anim(anim)
+    def _on_height_anim_finished(self):
+        """高度过渡结束：追加一次浮层位置同步。
+        防止过渡期间被 refresh_expired_history 等路径调用 _sync_overlay_geometry
+        时使用了中间值导致浮层位置偏差。"""
         if self.overlay is not None and self.overlay.isVisible():
             self._sync_overlay_geometry()
 
-    def _clear_height_anim(self, anim):
-        """动画结束时清理引用，避免访问已删除的 C++ 对象"""
-        if self._height_anim is anim:
-            self._height_anim = None
+    @property
+    def frame_monitor(self):
+        """LoopWatchdog：开启时逐帧统计容器动画"""
+        return self.animator.frame_monitor
+
+    @frame_monitor.setter
+    def frame_monitor(self, monitor):
+        self.animator.frame_monitor = monitor
+
+# ========== 定时/周期调度 ==========
+_INTERVAL_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+MIN_INTERVAL_S = 1.0  # 周期下限：更短的周期会让调度 timer 几乎持续触发
+
+
+def parse_interval(value):
+    """解析周期：数字（秒）或带单位字符串（"90s" / "30m" / "2h" / "1d"）"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        seconds = float(value)
+    else:
+        text = str(value).strip().lower()
+        unit = _INTERVAL_UNITS.get(text[-1:], None)
+        seconds = float(text[:-1]) * unit if unit else float(text)
+    check_interval(seconds)
+    return seconds
+
+
+def check_interval(seconds):
+    """周期必须是有限数且不小于 MIN_INTERVAL_S（持久化文件中的周期也按此校验）"""
+    if not math.isfinite(seconds) or seconds < MIN_INTERVAL_S:
+        raise ValueError(f"interval must be a finite number of seconds >= {MIN_INTERVAL_S:g}: {seconds!r}")
+
+
+def check_due(due):
+    """触发时间必须是有限数（inf / nan 会让 timer 布置溢出并卡住整个堆）"""
+    if not math.isfinite(due):
+        raise ValueError(f"schedule time must be finite: {due!r}")
+
+
+def parse_at(value, now):
+    """解析触发时间：epoch 秒、"HH:MM[:SS]"（今天，已过则顺延到明天）或 ISO 日期时间"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    text = str(value).strip()
+    if ":" in text and "-" not in text and "T" not in text:
+        parts = [int(x) for x in text.split(":")]
+        if len(parts) == 2:
+            parts.append(0)
+        hour, minute, second = parts
+        lt = time.localtime(now)
+        due = time.mktime((lt.tm_year, lt.tm_mon, lt.tm_mday, hour, minute, second, 0, 0, -1))
+        if due <= now:
+            due = time.mktime((lt.tm_year, lt.tm_mon, lt.tm_mday + 1, hour, minute, second, 0, 0, -1))
+        return due
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    from datetime import datetime
+    return datetime.fromisoformat(text).timestamp()
+
+
+class ScheduledItem:
+    """单条待触发通知（due 为 epoch 秒，every 为周期秒数或 None）"""
+    __slots__ = ("schedule_id", "payload", "due", "every", "cancelled")
+
+    def __init__(self, schedule_id: str, payload: dict, due: float, every=None):
+        self.schedule_id = schedule_id
+        self.payload = payload
+        self.due = due
+        self.every = every
+        self.cancelled = False
+
+    def to_dict(self):
+        return {"schedule_id": self.schedule_id, "payload": self.payload,
+                "due": self.due, "every": self.every}
+
+
+class ToastScheduler(QtCore.QObject):
+    """最小堆 + 单个 QTimer 的调度器
+    - 插入 O(log n)，取消为惰性删除（出堆时跳过）
+    - timer 只为最近的到期时间布置一次，同一批到期项合并为一次 due 信号
+    - persist_path 非空时，待触发项以 JSON 持久化，重启后恢复"""
+    due = QtCore.Signal(list)  # 一批到期的 payload
+
+    MAX_ARM_MS = 60000  # 最长布置 60s，之后重新检查（兼容系统休眠/时钟跳变）
+    SAVE_DELAY_MS = 500  # 持久化防抖，避免批量插入时反复写盘
+
+    def __init__(self, persist_path=None, clock=None):
+        super().__init__()
+        self.persist_path = persist_path
+        self.clock = clock or DEFAULT_CLOCK
+        self._heap = []      # (due, seq, item)
+        self._items = {}     # schedule_id → item（仅有效项）
+        self._seq = 0
+        self._next_id = 1
+
+        self._timer = self.clock.timer(self, self._on_timeout, single_shot=True, precise=True)
+        self._save_timer = self.clock.timer(self, self.flush, single_shot=True)
+
+        if self.persist_path:
+            self._load()
+
+    def count(self):
+        return len(self._items)
+
+    def schedule(self, payload, due, every=None, schedule_id=None):
+        """登记一条通知；同 schedule_id 已存在时替换。due / every 非有限数或周期过短时抛 ValueError"""
+        due = float(due)
+        check_due(due)
+        if every is not None:
+            check_interval(every)
+        if schedule_id is None:
+            schedule_id = f"s{self._next_id}"
+            self._next_id += 1
+        else:
+            schedule_id = str(schedule_id)
+            self._discard(schedule_id)
+        item = ScheduledItem(schedule_id, payload, due, every)
+        self._push(item)
+        self._mark_dirty()
+        self._arm()
+        return schedule_id
+
+    def cancel(self, schedule_id):
+        if not self._discard(str(schedule_id)):
+            return False
+        self._mark_dirty()
+        self._arm()
+        return True
+
+    def list(self, limit=None):
+        """按到期时间升序列出待触发项"""
+        items = self._items.values()
+        if limit is None:
+            ordered = sorted(items, key=lambda i: i.due)
+        else:
+            ordered = heapq.nsmallest(limit, items, key=lambda i: i.due)
+        return [i.to_dict() for i in ordered]
+
+    def _push(self, item):
+        self._items[item.schedule_id] = item
+        heapq.heappush(self._heap, (item.due, self._seq, item))
+        self._seq += 1
+        METRICS.gauge("schedules_pending").set(len(self._items))
+
+    def _discard(self, schedule_id):
+        item = self._items.pop(schedule_id, None)
+        if item is None:
+            return False
+        item.cancelled = True
+        METRICS.gauge("schedules_pending").set(len(self._items))
+        # 惰性删除的墓碑过多时压缩堆
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._items):
+            self._heap = [e for e in self._heap if not e[2].cancelled]
+            heapq.heapify(self._heap)
+        return True
+
+    def _arm(self):
+        """为最近的到期时间布置唯一的 timer"""
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            self._timer.stop()
+            return
+        delay_ms = int((self._heap[0][0] - self.clock.time()) * 1000)
+        self._timer.start(max(0, min(delay_ms, self.MAX_ARM_MS)))
+
+    def _on_timeout(self):
+        now = self.clock.time()
+        batch = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, item = heapq.heappop(self._heap)
+            if item.cancelled:
+                continue
+            batch.append(dict(item.payload))
+            if item.every:
+                # 周期项：推进到下一个未来时刻（错过的周期只补发一次）
+                missed = int((now - item.due) // item.every) + 1
+                item.due += missed * item.every
+                heapq.heappush(self._heap, (item.due, self._seq, item))
+                self._seq += 1
+            else:
+                del self._items[item.schedule_id]
+        if batch:
+            METRICS.gauge("schedules_pending").set(len(self._items))
+            self._mark_dirty()
+            self.due.emit(batch)
+        self._arm()
+
+    # ========== 持久化 ==========
+    def _mark_dirty(self):
+        if self.persist_path and not self._save_timer.isActive():
+            self._save_timer.start(self.SAVE_DELAY_MS)
+
+    def flush(self):
+        """立即写盘（原子替换）"""
+        self._save_timer.stop()
+        if not self.persist_path:
+            return
+        data = {"next_id": self._next_id, "items": [i.to_dict() for i in self._items.values()]}
+        tmp = self.persist_path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp, self.persist_path)
+        except OSError as e:
+            print("保存定时通知失败:", e)
+
+    def _load(self):
+        try:
+            with open(self.persist_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print("读取定时通知失败:", e)
+            return
+        try:
+            self._next_id = max(self._next_id, int(data.get("next_id", 1)))
+        except (TypeError, ValueError, OverflowError) as e:
+            print("跳过无效的 next_id:", e)
+        for d in data.get("items", []):
+            try:
+                item = ScheduledItem(str(d["schedule_id"]), dict(d["payload"]),
+                                     float(d["due"]), d.get("every"))
+                check_due(item.due)
+                if item.every is not None:
+                    check_interval(item.every)
+            except (KeyError, TypeError, ValueError) as e:
+                print("跳过无效的定时通知:", e)
+                continue
+            self._push(item)
+        self._arm()
+
+
+# ========== 限流 ==========
+class TokenBucket:
+    """令牌桶：每秒补充 rate 个令牌，最多积累 burst 个"""
+    __slots__ = ("rate", "burst", "_tokens", "_last", "_clock")
+
+    def __init__(self, rate: float, burst=None, clock=None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self._clock = clock or DEFAULT_CLOCK
+        self._tokens = self.burst
+        self._last = self._clock.monotonic()
+
+    def allow(self) -> bool:
+        if self.ready():
+            self.take()
+            return True
+        return False
+
+    def ready(self) -> bool:
+        """是否有可用令牌（不消耗）；多个桶须同时放行时先逐个 ready，全部通过再 take"""
+        now = self._clock.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+        return self._tokens >= 1.0
+
+    def take(self):
+        self._tokens -= 1.0
+
+
+# ========== 无界面模式 ==========
+class HeadlessLifecycle(QtCore.QObject):
+    """无界面 toast 的统一计时：截止时间最小堆 + 单个 QTimer（惰性删除，同 ToastScheduler）。
+    process_due(now) 可由调用方传入时间手动推进，便于确定性测试与压测。
+    回调（管理器的绑定方法）以弱引用保存：管理器持有本对象，强引用会形成引用环，只能等 GC 回收；
+    每个 toast 都要回调数次，不用信号（emit 开销约为直接调用的数倍）"""
+    MAX_ARM_MS = 60000
+
+    def __init__(self, on_event, on_expired, on_closed, clock=None, parent=None):
+        super().__init__(parent)
+        self.clock = clock or DEFAULT_CLOCK
+        self._on_event = weakref.WeakMethod(on_event)      # (toast, kind, action_id)
+        self._on_expired = weakref.WeakMethod(on_expired)  # (toast) 进入 EXPIRED 阶段
+        self._on_closed = weakref.WeakMethod(on_closed)    # (toast) 生命周期结束
+        self._heap = []                 # (deadline, seq, toast)
+        self._seq = 0
+        self._armed_at = None
+        self._timer = self.clock.timer(self, self.process_due, single_shot=True, precise=True)
+        # toast 经 _lifecycle 指回本对象：随管理器删除时清空堆，不形成引用环
+        self.destroyed.connect(self._heap.clear)
+
+    def on_event(self, toast, kind, action_id):
+        self._on_event()(toast, kind, action_id)
+
+    def on_expired(self, toast):
+        self._on_expired()(toast)
+
+    def on_closed(self, toast):
+        self._on_closed()(toast)
+
+    def set_deadline(self, toast, when):
+        """设置/替换 toast 的截止时间；旧条目出堆时因 seq 不匹配被跳过"""
+        self._seq += 1
+        toast.deadline = when
+        toast._deadline_seq = self._seq
+        heapq.heappush(self._heap, (when, self._seq, toast))
+        if self._armed_at is None or when < self._armed_at:
+            self._arm()
+
+    def pending(self):
+        return len(self._heap)
+
+    def _arm(self):
+        while self._heap and self._heap[0][2]._deadline_seq != self._heap[0][1]:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            self._timer.stop()
+            self._armed_at = None
+            return
+        self._armed_at = self._heap[0][0]
+        delay_ms = int((self._armed_at - self.clock.time()) * 1000)
+        self._timer.start(max(0, min(delay_ms, self.MAX_ARM_MS)))
+
+    def process_due(self, now=None):
+        """处理截止时间不晚于 now 的全部 toast（缺省为当前时间）"""
+        now = self.clock.time() if now is None else now
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            _, seq, toast = heapq.heappop(heap)
+            if toast._deadline_seq == seq:
+                toast._deadline_seq = None
+                toast._on_deadline(now)
+        self._armed_at = None
+        self._arm()
+
+
+class ToastList:
+    """按插入顺序保存 toast，append/remove/in 均为 O(1)。
+    无界面模式下存活 toast 可达数万条，普通 list 的 remove 会退化为 O(n²)。
+    下标访问走并行的 list 缓存：append 时同步追加，remove 时作废，下次下标访问才重建"""
+    __slots__ = ("_items", "_order")
+
+    def __init__(self):
+        self._items = {}
+        self._order = []  # 按插入顺序的 list 缓存；None 表示已作废
+
+    def append(self, toast):
+        self._items[toast] = None
+        if self._order is not None:
+            self._order.append(toast)
+
+    def remove(self, toast):
+        del self._items[toast]
+        self._order = None
+
+    def __contains__(self, toast):
+        return toast in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __getitem__(self, index):
+        if self._order is None:
+            self._order = list(self._items)
+        return self._order[index]
+
+
+class HeadlessToast:
+    """无界面 toast：与 Toast 相同的数据与两阶段生命周期（active → expired → 关闭），不创建任何控件。
+    计时全部交给 HeadlessLifecycle；出场（start_exit_anim）同样异步，在下一次处理时关闭"""
+    __slots__ = ("toast_id", "origin", "actions", "priority", "is_progress", "progress", "title",
+                 "message", "created_at", "duration", "show_countdown", "phase", "expired_time",
+                 "_insert_order", "_exiting", "deadline", "_deadline_seq", "_lifecycle", "channel")
+    EXPIRED_BUFFER_S = 5.0  # 过期缓冲（同 Toast 的 5 秒）
+
+    def __init__(self, lifecycle, title, message, duration=3000, show_countdown=False,
+                 toast_id=None, progress=None, priority="normal", actions=None, now=None):
+        self._lifecycle = lifecycle
+        self.toast_id = toast_id
+        self.origin = None
+        self.actions = normalize_actions(actions)
+        self.priority = priority if priority in PRIORITY_RANK else "normal"
+        self.is_progress = progress is not None
+        self.progress = Toast._clamp_progress(progress) if self.is_progress else None
+        self.title = title or tr("default_title")
+        self.message = message or tr("default_message")
+        self.created_at = lifecycle.clock.time() if now is None else now
+        self.duration = duration
+        self.show_countdown = show_countdown
+        self.phase = "active"
+        self.expired_time = None
+        self._insert_order = 0
+        self._exiting = False
+        self.channel = None
+        self.deadline = None
+        self._deadline_seq = None
+        if self.is_progress and self.progress >= 100:
+            lifecycle.set_deadline(self, self.created_at)  # 创建即完成：下一次处理时进入过期阶段
+        else:
+            self._restart_lifecycle(duration, self.created_at)
+
+    @property
+    def remaining(self):
+        """倒计时剩余秒数（与 Toast.remaining 对应）"""
+        if self.phase != "active" or self.deadline is None:
+            return 0
+        return max(0, int(self.deadline - self._lifecycle.clock.time() + 0.999))
+
+    def _restart_lifecycle(self, duration, now=None):
+        now = self._lifecycle.clock.time() if now is None else now
+        self.duration = duration
+        if self.phase == "expired":
+            self.phase = "active"
+            self.expired_time = None
+        span = max(1, duration // 1000) if self.show_countdown else duration / 1000
+        self._lifecycle.set_deadline(self, now + span)
+
+    def update_content(self, title=None, message=None, duration=None, progress=None, priority=None):
+        """原地更新（无界面无需按帧合并，直接生效）"""
+        if self._exiting:
+            return
+        if priority is not None and priority in PRIORITY_RANK:
+            self.priority = priority
+        if title is not None:
+            self.title = title or tr("default_title")
+        if message is not None:
+            self.message = message or tr("default_message")
+        if duration is not None:
+            self._restart_lifecycle(duration)
+        if progress is not None and self.is_progress:
+            value = Toast._clamp_progress(progress)
+            if self.phase == "expired":
+                if value >= 100:
+                    return
+                self._restart_lifecycle(self.duration)
+            self.progress = value
+            if value >= 100:
+                self._enter_expired_phase(self._lifecycle.clock.time())
+            elif not self.show_countdown:
+                self._restart_lifecycle(self.duration)
+
+    def set_progress(self, value):
+        self.update_content(progress=value)
+
+    def _enter_expired_phase(self, now):
+        self.phase = "expired"
+        self.expired_time = now
+        if self.is_progress:
+            self.progress = 100.0
+        self._lifecycle.set_deadline(self, now + self.EXPIRED_BUFFER_S)
+        self._lifecycle.on_expired(self)
+        self._lifecycle.on_event(self, "expired", None)
+
+    def _on_deadline(self, now):
+        if self._exiting:
+            self._lifecycle.on_closed(self)
+        elif self.phase == "expired":
+            self.start_exit_anim(now)
+        elif self.show_countdown or (self.is_progress and self.progress >= 100):
+            self._enter_expired_phase(now)
+        else:
+            # 非倒计时：时长到期直接出场（同 Toast._on_duration_elapsed）
+            self._lifecycle.on_event(self, "expired", None)
+            self.start_exit_anim(now)
+
+    def start_exit_anim(self, now=None):
+        """标记出场，下一次处理时关闭（与控件出场动画一样是异步的）"""
+        if self._exiting:
+            return
+        self._exiting = True
+        self._lifecycle.set_deadline(self, self._lifecycle.clock.time() if now is None else now)
+
+    def _manual_close(self):
+        if not self._exiting:
+            self._lifecycle.on_event(self, "dismissed", None)
+        self.start_exit_anim()
+
+
+# ========== 频道 ==========
+class ToastChannel:
+    """通知频道：独立的容器（每屏幕一个）与排序、显示上限、限流、主题和到期历史。
+    ToastManager 在首次收到该频道的通知时创建，未使用的频道只占一份配置"""
+    OPTIONS = {"theme": str, "max_visible": int, "rate_limit": float, "history": int}
+
+    def __init__(self, name, slot=0, theme="dark", max_visible=None, rate_limit=None,
+                 history=ExpiredHistory.MAX_RECORDS, clock=None):
+        self.name = name
+        self.slot = slot  # 容器在屏幕上的并排位置
+        self.theme = theme
+        # 同时显示上限（None 不限制）：超出时按优先级淘汰
+        self.max_visible = max_visible
+        # 新建 toast 的限流（每秒条数，None 不限制）；critical 不受限
+        self.rate_limiter = TokenBucket(rate_limit, clock=clock) if rate_limit else None
+        # 到期历史（仅内存维护，不持久化；容量为 0 时不记录）
+        self.expired_history = ExpiredHistory(history) if history else None
+        self.container = None  # 主屏幕容器
+        self.containers = {}   # QScreen → 容器：主屏幕之外的按 payload 的 screen 字段按需创建
+
+
+def parse_channel_spec(spec):
+    """解析 --channel-config："NAME[:key=value,...]"，key 为 theme / max_visible / rate_limit / history"""
+    name, _, rest = spec.partition(":")
+    if not name:
+        raise ValueError(f"missing channel name: {spec!r}")
+    options = {}
+    for item in filter(None, rest.split(",")):
+        key, sep, value = item.partition("=")
+        key = key.strip().replace("-", "_")
+        if not sep or key not in ToastChannel.OPTIONS:
+            raise ValueError(f"unknown channel option: {item!r}")
+        options[key] = ToastChannel.OPTIONS[key](value.strip())
+    if options.get("theme", "dark") not in THEMES:
+        raise ValueError(f"unknown theme: {options['theme']}")
+    return name, options
 
 
 # ========== 管理器 ==========
 class ToastManager(QtCore.QObject):
     all_closed = QtCore.Signal()
+    # 用户事件：(来源连接 ID 或 None, {"event", "id", "ts", ["action"]})
+    toast_event = QtCore.Signal(object, dict)
 
-    def __init__(self, theme="dark", no_expired_history=False):
+    # 调度相关字段（不属于通知内容）
+    SCHEDULE_KEYS = ("cmd", "at", "in", "every", "schedule_id", "req")
+    DEFAULT_CHANNEL = "default"
+
+    def __init__(self, theme="dark", no_expired_history=False, schedule_file=None,
+                 max_visible=None, rate_limit=None, headless=False, clock=None, motion="auto",
+                 channels=None):
         super().__init__()
+        # 时钟：截止时间、过期与调度统一取自这里（SimulatedClock 可快进）
+        self.clock = clock or DEFAULT_CLOCK
         self.toasts = []
+        # 无界面模式：不创建任何控件，生命周期/历史/调度/IPC 照常运行
+        self.headless = headless
+        if headless:
+            self.toasts = ToastList()
         self.theme = theme
         self.no_expired_history = no_expired_history
-        # 到期历史记录集合（仅内存维护，不持久化）
-        self.expired_history = None if no_expired_history else ExpiredHistory()
-        self.container = ToastContainer(theme=theme, no_expired_history=no_expired_history)
+        self.motion = motion
+        # 全局显示上限与限流：作用于全部频道合计，频道自身的上限 / 限流在此之上另行生效
+        self.max_visible = max_visible
+        self.rate_limiter = TokenBucket(rate_limit, clock=self.clock) if rate_limit else None
+        # 频道：名称 → ToastChannel，只有默认频道与 channel_config 中的频道会被创建（首次使用时）；
+        # 未单独配置的主题与历史容量沿用这里的默认值
+        self._channel_defaults = {"theme": theme,
+                                  "history": 0 if no_expired_history else ExpiredHistory.MAX_RECORDS}
+        self.channel_config = dict(channels or {})
+        self.channels = {}
+        self._insert_seq = 0  # 全局插入序号：显示上限跨频道比较“最早插入”时使用
+        self.lifecycle = None
+        if headless:
+            self.lifecycle = HeadlessLifecycle(self._on_user_event, self._on_toast_expired,
+                                               self._on_closed, clock=self.clock, parent=self)
+        self.default_channel = self.channel(self.DEFAULT_CHANNEL)
+        if not headless:
+            app = QtWidgets.QApplication.instance()
+            app.screenRemoved.connect(self._on_screen_removed)
+            app.primaryScreenChanged.connect(self._on_primary_screen_changed)
+        # 通知 ID → 存活 toast（出场动画开始后视为不再存活）
+        self._toasts_by_id = {}
+        self._next_auto_id = 0
+        # 定时/周期通知（schedule_file 非空时持久化）
+        self.scheduler = ToastScheduler(persist_path=schedule_file, clock=self.clock)
+        self.scheduler.due.connect(self._on_schedule_due)
+
+    # 默认频道的容器与策略（单频道使用时即管理器本身的）
+    @property
+    def container(self):
+        """默认频道的主屏幕容器（无界面模式为 None）"""
+        return self.default_channel.container
 
-    def show_toast(self, title, message, duration=3000, show_countdown=False):
+    @property
+    def containers(self):
+        return self.default_channel.containers
+
+    @property
+    def expired_history(self):
+        return self.default_channel.expired_history
+
+    def channel(self, name=None):
+        """name 对应的频道，首次使用时创建。未在 channel_config 中配置的名称归入默认频道：
+        payload 里任意的 channel 值不会无限创建频道（及其容器、显示上限与限流）"""
+        if name not in self.channel_config:
+            name = self.DEFAULT_CHANNEL
+        ch = self.channels.get(name)
+        if ch is None:
+            options = dict(self._channel_defaults, **self.channel_config.get(name, {}))
+            ch = ToastChannel(name, slot=len(self.channels), clock=self.clock, **options)
+            self.channels[name] = ch
+            if not self.headless:
+                self._primary_container(ch)
+        return ch
+
+    def _primary_container(self, ch):
+        """频道的主屏幕容器；空闲时已销毁的在此重新创建"""
+        if ch.container is None:
+            ch.container = self._new_container(ch, QtWidgets.QApplication.primaryScreen())
+            ch.containers[ch.container.qscreen] = ch.container
+        return ch.container
+
+    def _release_container(self, container, ch):
+        """容器里已没有 toast 时销毁（默认频道的主屏幕容器常驻），下次使用时重新创建"""
+        if container._toast_heights or container is self.default_channel.container:
+            return
+        for qscreen, c in list(ch.containers.items()):
+            if c is container:
+                del ch.containers[qscreen]
+        if ch.container is container:
+            ch.container = None
+        container.dispose()
+
+    def _new_container(self, ch, qscreen):
+        container = ToastContainer(theme=ch.theme, no_expired_history=ch.expired_history is None,
+                                   clock=self.clock, motion=self.motion, screen=qscreen, slot=ch.slot)
+        default = self.channels.get(self.DEFAULT_CHANNEL)
+        if default is not None and default.container is not None:
+            container.frame_monitor = default.container.frame_monitor
+        if ch.expired_history is not None and ch.expired_history.count():
+            container.refresh_expired_history(ch.expired_history.all())
+        return container
+
+    def show_toast(self, title, message, duration=3000, show_countdown=False, toast_id=None,
+                   progress=None, priority="normal", actions=None, screen=None, channel=None):
+        """显示通知；toast_id 对应的 toast 仍存活时改为原地更新。
+        screen 为目标屏幕（名称或序号，缺省为主屏幕），channel 为频道名（缺省为默认频道）。
+        被（全局或频道的）限流，或在显示上限下优先级最低时丢弃，返回 None。
+        先判定显示上限、再查看令牌（不消耗），toast 创建成功后才消耗令牌并淘汰，丢弃的 toast 不占限流额度"""
+        if toast_id is not None and self.update_toast(toast_id, title, message, duration, progress,
+                                                      priority):
+            return self._toasts_by_id.get(toast_id)
+        if priority not in PRIORITY_RANK:
+            priority = "normal"
+        ch = self.channel(channel)
+        victims = self._room_victims(priority, ch)
+        limiters = [] if priority == "critical" else \
+            [limiter for limiter in (ch.rate_limiter, self.rate_limiter) if limiter is not None]
+        if victims is None or not all(limiter.ready() for limiter in limiters):
+            METRICS.counter("toasts_dropped_total").inc()
+            return None
+        if self.headless:
+            try:
+                toast = HeadlessToast(self.lifecycle, title, message, duration, show_countdown,
+                                      toast_id=toast_id, progress=progress, priority=priority,
+                                      actions=actions)
+            except Exception as e:  # 同控件模式：未经 PayloadSchema 的输入（如持久化的定时通知）不抛出
+                print("创建 Toast 出错:", e)
+                return None
+            toast.channel = ch
+            self._admit(toast, limiters, victims)
+            self.toasts.append(toast)
+            if toast_id is not None:
+                self._toasts_by_id[toast_id] = toast
+            METRICS.counter("toasts_created_total").inc()
+            METRICS.gauge("toasts_live").set(len(self.toasts))
+            return toast
         try:
-            toast = Toast(title, message, duration, show_countdown, theme=self.theme)
+            toast = Toast(title, message, duration, show_countdown, theme=ch.theme,
+                          toast_id=toast_id, progress=progress, priority=priority, actions=actions,
+                          clock=self.clock)
+            toast.channel = ch
             toast.closed.connect(self._on_closed)
-            toast.remaining_changed.connect(self._on_remaining_changed)
-            if not self.no_expired_history:
+            toast.user_event.connect(self._on_user_event)
+            toast.order_changed.connect(self._on_order_changed)
+            toast.content_changed.connect(self._on_content_changed)
+            if ch.expired_history is not None:
                 toast.expired.connect(self._on_toast_expired)
+            self._admit(toast, limiters, victims)
             self.toasts.append(toast)
-            self.container.add_toast(toast)
+            if toast_id is not None:
+                self._toasts_by_id[toast_id] = toast
+            self.container_for(screen, ch).add_toast(toast)
+            METRICS.counter("toasts_created_total").inc()
+            METRICS.gauge("toasts_live").set(len(self.toasts))
+            return toast
         except Exception as e:
             print("创建 Toast 出错:", e)
+            return None
+
+    # ========== 多屏幕 ==========
+    def container_for(self, screen=None, channel=None):
+        """频道在 screen（屏幕名称或序号）上的容器，首次使用时创建；未指定或找不到时为主屏幕容器"""
+        ch = channel if isinstance(channel, ToastChannel) else self.channel(channel)
+        target = self._resolve_screen(screen)
+        if target is None:
+            return self._primary_container(ch)
+        container = ch.containers.get(target)
+        if container is None:
+            container = ch.containers[target] = self._new_container(ch, target)
+        return container
+
+    @staticmethod
+    def _resolve_screen(screen):
+        if screen is None:
+            return None
+        screens = QtWidgets.QApplication.screens()
+        for s in screens:
+            if s.name() == str(screen):
+                return s
+        index = screen if isinstance(screen, int) else int(screen) if str(screen).isdigit() else None
+        if index is not None and 0 <= index < len(screens):
+            return screens[index]
+        return None
+
+    def _on_primary_screen_changed(self, qscreen):
+        """主屏幕变化：各频道的主屏幕容器迁到新主屏幕；原先在新主屏幕上的容器并入其中"""
+        for ch in self.channels.values():
+            if ch.container is None:
+                continue
+            old = ch.container.qscreen
+            if qscreen is old:
+                continue
+            other = ch.containers.pop(qscreen, None)
+            ch.containers.pop(old, None)
+            ch.container.set_screen(qscreen)
+            ch.containers[qscreen] = ch.container
+            if other is not None:
+                self._merge_container(other, ch.container)
+
+    def _on_screen_removed(self, qscreen):
+        """屏幕移除：各频道在该屏幕的容器中的 toast 原样移到主屏幕容器（不重建），容器随后销毁"""
+        for ch in self.channels.values():
+            container = ch.containers.pop(qscreen, None)
+            if container is None:
+                continue
+            if container is ch.container:
+                # 主屏幕变化信号尚未到达：先迁到当前主屏幕
+                ch.container.set_screen(QtWidgets.QApplication.primaryScreen())
+                ch.containers[ch.container.qscreen] = ch.container
+                continue
+            self._merge_container(container, ch.container)
+
+    def _merge_container(self, source, target):
+        for toast in [t for t in self.toasts if t.host is source]:
+            if toast._exiting:
+                toast._final_close()  # 出场过渡属于将销毁的容器：直接完成
+                continue
+            source.remove_toast(toast)
+            target.add_toast(toast)
+        source.dispose()
+
+    def _on_order_changed(self, toast):
+        if toast.host is not None:
+            toast.host.reposition_toast(toast)
+
+    def _alive_toast(self, toast_id):
+        """按 ID 查找仍存活（未开始出场）的 toast"""
+        toast = self._toasts_by_id.get(toast_id)
+        if toast is None or toast._exiting:
+            return None
+        return toast
+
+    def update_toast(self, toast_id, title=None, message=None, duration=None, progress=None,
+                     priority=None):
+        """原地更新 toast_id 对应的 toast；不存在或已在出场时返回 False"""
+        toast = self._alive_toast(toast_id)
+        if toast is None:
+            return False
+        toast.update_content(title, message, duration, progress, priority)
+        METRICS.counter("toasts_updated_total").inc()
+        return True
+
+    def _room_victims(self, priority, ch):
+        """在频道显示上限与全局显示上限下为新 toast 选出需淘汰的 toast：各淘汰范围内优先级最低者
+        （同级先淘汰已过期、再淘汰最早插入）。新 toast 自身优先级最低时返回 None（直接丢弃）；
+        只选不淘汰，由 _admit 在 toast 创建成功后执行"""
+        victims = []
+        for cap, scope in ((ch.max_visible, ch), (self.max_visible, None)):
+            if cap is None:
+                continue
+            live = [t for t in self.toasts
+                    if not t._exiting and t not in victims and (scope is None or t.channel is scope)]
+            if len(live) < cap:
+                continue
+            victim = min(live, key=lambda t: (PRIORITY_RANK[t.priority],
+                                              0 if t.phase == "expired" else 1,
+                                              t._insert_order))
+            if PRIORITY_RANK[victim.priority] > PRIORITY_RANK[priority]:
+                return None
+            victims.append(victim)
+        return victims
+
+    def _admit(self, toast, limiters, victims):
+        """新 toast 已创建：分配全局插入序号，消耗限流令牌，淘汰 _room_victims 选出的 toast"""
+        self._insert_seq += 1
+        toast._insert_order = self._insert_seq
+        for limiter in limiters:
+            limiter.take()
+        for victim in victims:
+            victim.start_exit_anim()
+            METRICS.counter("toasts_evicted_total").inc()
+
+    def cancel_toast(self, toast_id):
+        """按 ID 关闭 toast（走正常出场动画）"""
+        toast = self._alive_toast(toast_id)
+        if toast is None:
+            return False
+        toast.start_exit_anim()
+        return True
+
+    @timed("theme_switch_seconds")
+    def set_theme(self, theme, channel=None):
+        """运行时切换主题（存活 toast 原地重设样式，之后新建的 toast 沿用新主题）。
+        channel 缺省时切换全部频道并作为新频道的默认主题；返回重设样式的 toast 数"""
+        if theme not in THEMES:
+            raise ValueError(f"unknown theme: {theme}")
+        if channel is None:
+            self.theme = self._channel_defaults["theme"] = theme
+            # 全局切换覆盖各频道单独配置的主题（含尚未创建的频道）
+            self.channel_config = {name: {k: v for k, v in config.items() if k != "theme"}
+                                   for name, config in self.channel_config.items()}
+            channels = list(self.channels.values())
+        else:
+            if channel != self.DEFAULT_CHANNEL and channel not in self.channel_config:
+                raise ValueError(f"unknown channel: {channel}")
+            channels = [self.channel(channel)]
+            self.channel_config[channel] = dict(self.channel_config.get(channel, {}), theme=theme)
+        restyled = 0
+        for ch in channels:
+            ch.theme = theme
+            for container in ch.containers.values():
+                restyled += container.set_theme(theme)
+        return restyled
+
+    def handle_payload(self, p, origin=None):
+        """IPC 消息分发：cmd 缺省为 show；cancel 按 id 关闭；schedule* 管理定时通知；
+        theme 运行时切换主题（可带 channel 只切换该频道）。
+        返回需回复给客户端的 dict（无需回复时返回 None）。
+        带 req 的 show/cancel 回复投递状态：show 为 accepted / deduped（同 ID 原地更新）/
+        dropped（限流或显示上限），并带上 toast id（未指定时自动分配）。
+        origin 为来源连接 ID：该 toast 的用户事件经 toast_event 回传给它；
+        "events": false 表示发送方不读事件（如 --stdin 流），toast 不绑定来源"""
+        cmd = p.get("cmd", "show")
+        if cmd == "show" and any(k in p for k in ("at", "in", "every")):
+            cmd = "schedule"
+        if cmd == "schedule":
+            return self._schedule_payload(p)
+        if cmd == "schedule_list":
+            limit = p.get("limit")
+            items = self.scheduler.list(limit=int(limit) if limit is not None else None)
+            return {"status": "ok", "total": self.scheduler.count(), "items": items}
+        if cmd == "schedule_cancel":
+            ok = self.scheduler.cancel(p.get("schedule_id"))
+            return {"status": "ok" if ok else "not_found"}
+        if cmd == "stats":
+            return {"status": "ok", "metrics": self.stats()}
+        if cmd == "theme":
+            try:
+                restyled = self.set_theme(p.get("theme"), p.get("channel"))
+            except ValueError as e:
+                return {"status": "invalid", "error": str(e)}
+            return {"status": "ok", "theme": p["theme"], "restyled": restyled}
+        if cmd in ("profile_start", "profile_stop"):
+            return self._profile_command(cmd, p, origin)
+        if p.get("events") is False:
+            origin = None
+        toast_id = p.get("id")
+        if toast_id is not None:
+            toast_id = str(toast_id)
+        ack = "req" in p
+        if cmd == "cancel":
+            ok = toast_id is not None and self.cancel_toast(toast_id)
+            return {"status": "ok" if ok else "not_found", "id": toast_id} if ack else None
+        if cmd != "show":
+            if not ack:
+                METRICS.counter("ipc_invalid_total").inc()
+                return None
+            return {"status": "invalid", "error": f"unknown cmd: {cmd}"}
+        if toast_id is not None and self._alive_toast(toast_id) is not None:
+            # 原地更新：只更新 payload 中显式给出的字段
+            self.update_toast(toast_id, p.get("title"), p.get("message"), p.get("duration"),
+                              p.get("progress"), p.get("priority"))
+            return {"status": "deduped", "id": toast_id} if ack else None
+        if toast_id is None and (ack or origin is not None):
+            toast_id = self._auto_toast_id()
+        toast = self.show_toast(
+            p.get("title", "Notification"),
+            p.get("message", ""),
+            p.get("duration", 3000),
+            p.get("show_countdown", False),
+            toast_id=toast_id,
+            progress=p.get("progress"),
+            priority=p.get("priority", "normal"),
+            actions=p.get("actions"),
+            screen=p.get("screen"),
+            channel=p.get("channel"),
+        )
+        if toast is not None:
+            toast.origin = origin
+        if not ack:
+            return None
+        if toast is None:
+            return {"status": "dropped", "id": None}
+        return {"status": "accepted", "id": toast_id}
+
+    def _auto_toast_id(self):
+        """为未指定 id 的确认请求分配 toast id"""
+        while True:
+            self._next_auto_id += 1
+            toast_id = f"auto-{self._next_auto_id}"
+            if toast_id not in self._toasts_by_id:
+                return toast_id
+
+    def _schedule_payload(self, p):
+        """登记定时通知：at（绝对时间）/ in（相对秒数）/ every（周期）"""
+        now = self.clock.time()
+        try:
+            every = parse_interval(p["every"]) if p.get("every") is not None else None
+            if p.get("at") is not None:
+                due = parse_at(p["at"], now)
+            elif p.get("in") is not None:
+                due = now + float(p["in"])
+            elif every is not None:
+                due = now + every
+            else:
+                raise ValueError("schedule requires 'at', 'in' or 'every'")
+            check_due(due)
+        except (TypeError, ValueError, OverflowError) as e:
+            print("定时通知参数无效:", e)
+            return {"status": "invalid", "error": str(e)}
+        payload = {k: v for k, v in p.items() if k not in self.SCHEDULE_KEYS}
+        sid = self.scheduler.schedule(payload, due, every=every, schedule_id=p.get("schedule_id"))
+        return {"status": "ok", "schedule_id": sid, "due": due}
+
+    def _on_schedule_due(self, batch):
+        for payload in batch:
+            self.handle_payload(payload)
+
+    def _profile_command(self, cmd, p, origin):
+        """profile_start（path 必填，mode 可选）/ profile_stop：控制进程内剖析。
+        只接受本地 socket 来源（origin 非 None）：HTTP 等来源可被浏览器跨站触发，一律拒绝；
+        path 只能是文件名，结果写入 PROFILE_DIR 下的新文件"""
+        if origin is None:
+            return {"status": "invalid", "error": "profile commands are only accepted over the local socket"}
+        try:
+            if cmd == "profile_stop":
+                result = PROFILER.stop()
+                return {"status": "ok", **result} if result else {"status": "not_running"}
+            if not p.get("path"):
+                return {"status": "invalid", "error": "profile_start requires path"}
+            PROFILER.start(profile_path(p["path"]), p.get("mode"))
+            return {"status": "ok", "path": PROFILER.path, "mode": PROFILER.mode}
+        except (ValueError, OSError) as e:
+            return {"status": "invalid", "error": str(e)}
+
+    def stats(self):
+        """刷新瞬时值后返回全部指标快照（IPC stats 命令与退出时导出）"""
+        METRICS.gauge("toasts_live").set(len(self.toasts))
+        METRICS.gauge("schedules_pending").set(self.scheduler.count())
+        self._update_history_gauge()
+        return METRICS.snapshot()
+
+    def _update_history_gauge(self):
+        METRICS.gauge("expired_history_records").set(
+            sum(ch.expired_history.count() for ch in self.channels.values() if ch.expired_history is not None))
+
+    def _on_user_event(self, toast, kind, action_id):
+        if kind == "expired":
+            METRICS.counter("toasts_expired_total").inc()
+        event = {"event": kind, "id": toast.toast_id, "ts": self.clock.time()}
+        if action_id is not None:
+            event["action"] = action_id
+        self.toast_event.emit(toast.origin, event)
 
     def _on_closed(self, toast):
+        if toast.toast_id is not None and self._toasts_by_id.get(toast.toast_id) is toast:
+            del self._toasts_by_id[toast.toast_id]
         if toast in self.toasts:
+            METRICS.counter("toasts_closed_total").inc()
+            self.toast_event.emit(toast.origin, {"event": "closed", "id": toast.toast_id,
+                                                 "ts": self.clock.time()})
             self.toasts.remove(toast)
-            self.container.remove_toast(toast)
+            METRICS.gauge("toasts_live").set(len(self.toasts))
+            if self.container is not None and toast.host is not None:
+                toast.host.remove_toast(toast)
+                self._release_container(toast.host, toast.channel)
             if not self.toasts:
                 self.all_closed.emit()
 
-    def _on_remaining_changed(self):
-        self.container.reorder_toasts()
+    def _on_content_changed(self, toast):
+        """原地更新导致该 toast 高度变化：更新容器的高度记账"""
+        if toast in self.toasts:
+            toast.host.update_toast_height(toast)
 
     def _on_toast_expired(self, toast):
         """Toast 进入 EXPIRED 阶段时记录到历史"""
-        if self.no_expired_history or self.expired_history is None:
+        history = toast.channel.expired_history
+        if history is None:
             return
         rec = ExpiredRecord(
             title=toast.title,
             message=toast.message,
             created_at=toast.created_at,
-            expired_at=toast.expired_time or time.time(),
+            expired_at=toast.expired_time or self.clock.time(),
         )
-        self.expired_history.add(rec)
+        history.add(rec)
+        self._update_history_gauge()
         # 刷新面板（如已展开）
-        self.container.refresh_expired_history(self.expired_history.all())
+        for container in toast.channel.containers.values():
+            container.refresh_expired_history(history.all())
 
 
 # ========== 本地服务端 ==========
-class LocalServer(QtCore.QObject):
-    message = QtCore.Signal(dict)
+def decode_frame(raw: bytes):
+    """解码一帧（一行）：返回 payload dict；空行返回 None，无效帧抛 ValueError"""
+    line = raw.decode("utf-8", errors="ignore")
+    if not line.strip():
+        return None
+    try:
+        payload = json.loads(line)
+    except ValueError as e:
+        raise ValueError(f"malformed JSON: {e}") from None
+    if not isinstance(payload, dict):
+        raise ValueError("payload must be a JSON object")
+    return payload
+
+
+class PayloadSchema:
+    """IPC payload 校验：字段类型、取值范围与长度上限
+    - 已知字段类型不符直接拒绝（ValueError）；未知字段原样保留，兼容新旧客户端
+    - 超长标题/正文在服务端截断，toast 只排版折叠预览，点击再展开"""
+    NUMBER = (int, float)
+    FIELD_TYPES = {
+        "cmd": str,
+        "title": str,
+        "message": str,
+        "duration": NUMBER,
+        "show_countdown": bool,
+        "theme": str,
+        "id": (str, int),
+        "progress": NUMBER,
+        "priority": str,
+        "at": (str, int, float),
+        "in": (str, int, float),
+        "every": (str, int, float),
+        "schedule_id": (str, int),
+        "limit": int,
+        "path": str,
+        "mode": str,
+        "req": (str, int),
+        "actions": list,
+        "screen": (str, int),
+        "channel": str,
+        "events": bool,
+    }
 
-    def __init__(self, name="toast_server"):
+    def __init__(self, max_title_chars=256, max_message_chars=65536, max_frame_bytes=1024 * 1024):
+        self.max_title_chars = max_title_chars
+        self.max_message_chars = max_message_chars
+        self.max_frame_bytes = max_frame_bytes  # 单行（一帧）字节上限，超出整帧丢弃
+
+    def validate(self, payload: dict) -> dict:
+        """返回规范化后的新 dict；不合法时抛 ValueError"""
+        out = dict(payload)
+        for key, types in self.FIELD_TYPES.items():
+            value = out.get(key)
+            if value is None:
+                continue
+            # bool 是 int 的子类：数值字段不接受 true/false
+            if not isinstance(value, types) or (isinstance(value, bool) and types is not bool):
+                raise ValueError(f"invalid type for '{key}': {type(value).__name__}")
+        if out.get("priority") is not None and out["priority"] not in PRIORITY_RANK:
+            raise ValueError(f"unknown priority: {out['priority']}")
+        for key in ("duration", "limit"):
+            if out.get(key) is not None and out[key] < 0:
+                raise ValueError(f"'{key}' must not be negative")
+        if out.get("actions"):
+            out["actions"] = self._validate_actions(out["actions"])
+        if out.get("title") and len(out["title"]) > self.max_title_chars:
+            out["title"] = out["title"][:self.max_title_chars] + "…"
+        if out.get("message") and len(out["message"]) > self.max_message_chars:
+            out["message"] = out["message"][:self.max_message_chars] + "…"
+        return out
+
+    @staticmethod
+    def _validate_actions(actions):
+        """动作按钮按 normalize_actions 校验，统一为 {"id", "label"}"""
+        return [{"id": action_id, "label": label} for action_id, label in normalize_actions(actions)]
+
+
+class IpcIngest(QtCore.QObject):
+    """IPC 接入层：接受连接、读取、按行分帧、解码与校验。
+    可整体移入 worker 线程运行；每次读取产生的 payload 合并为一批，
+    经 batch_ready 信号（跨线程时自动排队）交给 GUI 线程。
+    超过 schema.max_frame_bytes 的帧边读边丢弃，不会整帧缓冲进内存。
+    无效帧也按原顺序进入批次（error 非 None），以便按序回复 invalid。"""
+    batch_ready = QtCore.Signal(list, float)  # ([(conn_id, payload, error), ...], 读取时刻 perf_counter)
+    READ_BUFFER_BYTES = 64 * 1024  # 单个 socket 的读缓冲上限，超大帧分块读取
+    MAX_OUTBOUND_BYTES = 256 * 1024  # 单连接待发送事件上限，超出后丢弃新事件（慢客户端不拖累服务端）
+
+    def __init__(self, name, schema=None):
         super().__init__()
-        self.buffer = ""
+        self.schema = schema or PayloadSchema()
+        self._buffers = {}   # socket → 未成帧的字节
+        self._discarding = set()  # 正在丢弃超长帧的 socket（直到下一个换行）
+        self._dropped_events = {}  # conn_id → 因发送缓冲已满丢弃的事件数
+        self._conn_ids = {}  # socket → conn_id
+        self._sockets = {}   # conn_id → socket
+        self._next_conn_id = 1
         self.server = QtNetwork.QLocalServer(self)
-        if self.server.isListening():
-            self.server.close()
         QtNetwork.QLocalServer.removeServer(name)
         self.server.listen(name)
         self.server.newConnection.connect(self.handle_connection)
 
     def handle_connection(self):
-        socket = self.server.nextPendingConnection()
-        socket.readyRead.connect(lambda s=socket: self.read_data(s))
-
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            socket.setReadBufferSize(self.READ_BUFFER_BYTES)
+            self._register(socket)
+            # 绑定方法作槽（而非 lambda）：在 worker 线程中连接时不会创建跨线程的接收者对象
+            socket.readyRead.connect(self._on_ready_read)
+            socket.disconnected.connect(self._on_disconnected)
+            if socket.bytesAvailable():
+                self.read_data(socket)
+
+    @QtCore.Slot()
+    def _on_ready_read(self):
+        self.read_data(self.sender())
+
+    @QtCore.Slot()
+    def _on_disconnected(self):
+        self._drop_connection(self.sender())
+
+    def _register(self, socket):
+        conn_id = self._next_conn_id
+        self._next_conn_id += 1
+        self._buffers[socket] = b""
+        self._conn_ids[socket] = conn_id
+        self._sockets[conn_id] = socket
+        return conn_id
+
+    @timed("ipc_read_seconds")
     def read_data(self, socket):
         try:
-            self.buffer += socket.readAll().data().decode("utf-8", errors="ignore")
+            chunk = socket.readAll().data()
         except Exception as e:
             print("读取数据失败:", e)
             return
+        conn_id = self._conn_ids.get(socket) or self._register(socket)
+        max_bytes = self.schema.max_frame_bytes
 
-        while "\n" in self.buffer:
-            line, self.buffer = self.buffer.split("\n", 1)
-            if not line.strip():
+        if socket in self._discarding:
+            # 超长帧的剩余部分：丢弃到下一个换行为止
+            nl = chunk.find(b"\n")
+            if nl < 0:
+                return
+            self._discarding.discard(socket)
+            chunk = chunk[nl + 1:]
+
+        # 按字节分帧后再解码，避免多字节字符被读取边界截断
+        *lines, rest = (self._buffers.get(socket, b"") + chunk).split(b"\n")
+        batch = []
+        for raw in lines:
+            if len(raw) > max_bytes:
+                batch.append((conn_id, None, f"frame exceeds {max_bytes} bytes"))
                 continue
+            payload = None
             try:
-                payload = json.loads(line)
-                self.message.emit(payload)
-            except Exception as e:
-                print(f"解析消息失败: {e}, 内容: {line}")
+                payload = decode_frame(raw)
+                if payload is None:
+                    continue
+                batch.append((conn_id, self.schema.validate(payload), None))
+            except ValueError as e:
+                print(f"消息无效，已忽略: {e}")
+                batch.append((conn_id, payload, str(e)))
+        if len(rest) > max_bytes:
+            print(f"帧超过 {max_bytes} 字节，已丢弃")
+            batch.append((conn_id, None, f"frame exceeds {max_bytes} bytes"))
+            self._discarding.add(socket)
+            rest = b""
+        self._buffers[socket] = rest
+        if batch:
+            METRICS.counter("ipc_frames_read_total").inc(len(batch))
+            self.batch_ready.emit(batch, time.perf_counter())
+
+    def write_reply(self, conn_id, data):
+        """向连接写回一行回复；连接已断开则丢弃"""
+        socket = self._sockets.get(conn_id)
+        if socket is None:
+            return
+        try:
+            socket.write(data)
+        except RuntimeError:
+            pass
 
-        socket.disconnectFromServer()
+    def write_event(self, conn_id, data):
+        """向连接推送一行事件；待发送数据超过上限时丢弃并计数，下一次成功推送前补发 overflow 事件"""
+        socket = self._sockets.get(conn_id)
+        if socket is None:
+            return
+        try:
+            if socket.bytesToWrite() + len(data) > self.MAX_OUTBOUND_BYTES:
+                self._dropped_events[conn_id] = self._dropped_events.get(conn_id, 0) + 1
+                return
+            dropped = self._dropped_events.pop(conn_id, 0)
+            if dropped:
+                socket.write((json.dumps({"event": "overflow", "dropped": dropped}) + "\n").encode("utf-8"))
+            socket.write(data)
+        except RuntimeError:
+            pass
+
+    def _drop_connection(self, socket):
+        """客户端断开：读完残留数据后释放 socket"""
+        try:
+            if socket.bytesAvailable():
+                self.read_data(socket)
+        except RuntimeError:
+            pass
+        self._buffers.pop(socket, None)
+        self._discarding.discard(socket)
+        conn_id = self._conn_ids.pop(socket, None)
+        self._sockets.pop(conn_id, None)
+        self._dropped_events.pop(conn_id, None)
         socket.deleteLater()
 
+    def shutdown(self):
+        """在所属线程中关闭监听与全部连接"""
+        self.server.close()
+        for socket in list(self._sockets.values()):
+            try:
+                socket.abort()
+                socket.deleteLater()
+            except RuntimeError:
+                pass
+        self._sockets.clear()
+        self._conn_ids.clear()
+        self._buffers.clear()
+        self._discarding.clear()
+        self._dropped_events.clear()
+
+
+class HttpIngest(QtCore.QObject):
+    """HTTP 接入层（仅监听回环地址），供不便使用 QLocalSocket 的 shell/其他语言生产者使用。
+    - POST /notify：请求体为单个 JSON 对象或数组（批量）；GET /health 探活
+    - 支持 keep-alive；同一连接上的请求逐个处理，上一个响应写出前不再读取，保证响应顺序并形成背压
+    - 解码/校验与 IpcIngest 相同，可一并移入 IPC worker 线程；请求体超过 schema.max_frame_bytes
+      时直接回复 413 并断开，不读取请求体
+    - 防跨站：POST /notify 要求 Content-Type: application/json（浏览器的简单请求无法携带，
+      必须先经 CORS 预检，而这里不响应预检），否则 415；带 Origin 头且不在 allowed_origins 中的请求 403"""
+    request_ready = QtCore.Signal(int, list, bool, float)  # (conn_id, [(payload, error), ...], 是否批量, 读取时刻)
+    MAX_HEADER_BYTES = 16 * 1024
+    MAX_BATCH = 1000
+    REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               403: "Forbidden", 411: "Length Required", 413: "Payload Too Large",
+               415: "Unsupported Media Type", 431: "Request Header Fields Too Large"}
+
+    def __init__(self, schema, port=0, allowed_origins=()):
+        super().__init__()
+        self.schema = schema
+        self.allowed_origins = frozenset(allowed_origins)  # 允许的浏览器 Origin（缺省全部拒绝）
+        self._conns = {}    # conn_id → 连接状态
+        self._conn_ids = {}  # socket → conn_id
+        self._next_conn_id = 1
+        self.server = QtNetwork.QTcpServer(self)
+        if not self.server.listen(QtNetwork.QHostAddress(QtNetwork.QHostAddress.SpecialAddress.LocalHost),
+                                  port):
+            print("HTTP 监听失败:", self.server.errorString())
+        self.port = self.server.serverPort()
+        self.server.newConnection.connect(self.handle_connection)
+
+    def handle_connection(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            socket.setReadBufferSize(IpcIngest.READ_BUFFER_BYTES)
+            conn_id = self._next_conn_id
+            self._next_conn_id += 1
+            self._conns[conn_id] = {"socket": socket, "buf": b"", "busy": False,
+                                    "keep_alive": True, "continued": False}
+            self._conn_ids[socket] = conn_id
+            socket.readyRead.connect(self._on_ready_read)
+            socket.disconnected.connect(self._on_disconnected)
+            if socket.bytesAvailable():
+                self.read_data(conn_id)
+
+    @QtCore.Slot()
+    def _on_ready_read(self):
+        conn_id = self._conn_ids.get(self.sender())
+        if conn_id is not None:
+            self.read_data(conn_id)
+
+    @QtCore.Slot()
+    def _on_disconnected(self):
+        conn_id = self._conn_ids.pop(self.sender(), None)
+        if conn_id is not None:
+            self._drop_connection(conn_id)
+
+    @timed("http_read_seconds")
+    def read_data(self, conn_id):
+        state = self._conns.get(conn_id)
+        if state is None or state["busy"]:
+            return  # 处理中的请求未响应前不读取（数据留在 socket 缓冲，形成背压）
+        state["buf"] += state["socket"].readAll().data()
+        self._process(conn_id)
+
+    def _process(self, conn_id):
+        """解析缓冲中的完整请求，直到需要等待更多数据或等待 GUI 线程响应"""
+        state = self._conns.get(conn_id)
+        while state is not None and not state["busy"]:
+            buf = state["buf"]
+            end = buf.find(b"\r\n\r\n")
+            if end < 0:
+                if len(buf) > self.MAX_HEADER_BYTES:
+                    self._respond(conn_id, 431, {"status": "invalid", "error": "headers too large"}, False)
+                return
+            lines = buf[:end].decode("latin-1").split("\r\n")
+            parts = lines[0].split(" ")
+            if len(parts) != 3:
+                self._respond(conn_id, 400, {"status": "invalid", "error": "bad request line"}, False)
+                return
+            method, path, version = parts
+            headers = {}
+            for line in lines[1:]:
+                key, _, value = line.partition(":")
+                headers[key.strip().lower()] = value.strip()
+            connection = headers.get("connection", "").lower()
+            keep_alive = connection == "keep-alive" or (version == "HTTP/1.1" and connection != "close")
+            if "chunked" in headers.get("transfer-encoding", "").lower():
+                self._respond(conn_id, 411, {"status": "invalid", "error": "chunked body not supported"},
+                              False)
+                return
+            try:
+                length = int(headers.get("content-length", "0"))
+            except ValueError:
+                self._respond(conn_id, 400, {"status": "invalid", "error": "bad content-length"}, False)
+                return
+            if length > self.schema.max_frame_bytes:
+                self._respond(conn_id, 413, {"status": "invalid",
+                                             "error": f"body exceeds {self.schema.max_frame_bytes} bytes"},
+                              False)
+                return
+            if len(buf) < end + 4 + length:
+                if headers.get("expect", "").lower() == "100-continue" and not state["continued"]:
+                    state["continued"] = True
+                    state["socket"].write(b"HTTP/1.1 100 Continue\r\n\r\n")
+                return
+            body = buf[end + 4:end + 4 + length]
+            state["buf"] = buf[end + 4 + length:]
+            state["keep_alive"] = keep_alive
+            state["continued"] = False
+            path = path.split("?", 1)[0]
+            if path == "/health" and method == "GET":
+                self._respond(conn_id, 200, {"status": "ok"}, keep_alive)
+            elif path != "/notify":
+                self._respond(conn_id, 404, {"status": "invalid", "error": "not found"}, keep_alive)
+            elif method != "POST":
+                self._respond(conn_id, 405, {"status": "invalid", "error": "use POST"}, keep_alive)
+            elif "origin" in headers and headers["origin"] not in self.allowed_origins:
+                METRICS.counter("http_invalid_total").inc()
+                self._respond(conn_id, 403, {"status": "invalid", "error": "origin not allowed"}, keep_alive)
+            elif headers.get("content-type", "").split(";", 1)[0].strip().lower() != "application/json":
+                METRICS.counter("http_invalid_total").inc()
+                self._respond(conn_id, 415, {"status": "invalid", "error": "Content-Type must be application/json"},
+                              keep_alive)
+            else:
+                self._dispatch_body(conn_id, body)
+            state = self._conns.get(conn_id)
+
+    def _dispatch_body(self, conn_id, body):
+        try:
+            data = json.loads(body.decode("utf-8", errors="ignore"))
+        except ValueError as e:
+            self._respond(conn_id, 400, {"status": "invalid", "error": f"malformed JSON: {e}"},
+                          self._conns[conn_id]["keep_alive"])
+            return
+        is_batch = isinstance(data, list)
+        entries = data if is_batch else [data]
+        if len(entries) > self.MAX_BATCH:
+            self._respond(conn_id, 413, {"status": "invalid", "error": f"at most {self.MAX_BATCH} per batch"},
+                          self._conns[conn_id]["keep_alive"])
+            return
+        items = []
+        for entry in entries:
+            if not isinstance(entry, dict):
+                items.append((None, "payload must be a JSON object"))
+                continue
+            try:
+                items.append((self.schema.validate(entry), None))
+            except ValueError as e:
+                items.append((entry, str(e)))
+        self._conns[conn_id]["busy"] = True
+        METRICS.counter("ipc_frames_read_total").inc(len(items))
+        self.request_ready.emit(conn_id, items, is_batch, time.perf_counter())
+
+    def write_response(self, conn_id, body):
+        """GUI 线程处理完成：写回 200 响应并继续处理该连接上已到达的后续请求"""
+        state = self._conns.get(conn_id)
+        if state is None:
+            return
+        state["busy"] = False
+        self._write(state, 200, body, state["keep_alive"])
+        if state["keep_alive"]:
+            self.read_data(conn_id)
+
+    def _respond(self, conn_id, code, obj, keep_alive):
+        state = self._conns.get(conn_id)
+        if state is not None:
+            self._write(state, code, json.dumps(obj, ensure_ascii=False).encode("utf-8"), keep_alive)
+
+    def _write(self, state, code, body, keep_alive):
+        socket = state["socket"]
+        head = (f"HTTP/1.1 {code} {self.REASONS.get(code, '')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        try:
+            socket.write(head.encode("latin-1") + body)
+            if not keep_alive:
+                state["busy"] = True  # 不再处理该连接的后续数据
+                socket.disconnectFromHost()
+        except RuntimeError:
+            pass
+
+    def _drop_connection(self, conn_id):
+        state = self._conns.pop(conn_id, None)
+        if state is not None:
+            state["socket"].deleteLater()
+
+    def shutdown(self):
+        """在所属线程中关闭监听与全部连接"""
+        self.server.close()
+        for state in self._conns.values():
+            try:
+                state["socket"].abort()
+                state["socket"].deleteLater()
+            except RuntimeError:
+                pass
+        self._conns.clear()
+        self._conn_ids.clear()
+
+
+class MetricsExporter(QtCore.QObject):
+    """Prometheus 抓取端点（仅监听回环地址）：GET /metrics 返回文本格式指标。
+    - 可与 IPC 接入层一同移入 worker 线程：抓取只读取计数，不经过 GUI 线程，GUI 卡顿时照常响应
+    - 每次抓取只分配响应缓冲（见 MetricsRegistry.prometheus）；每个连接处理一个请求后关闭"""
+    CONTENT_TYPE = b"text/plain; version=0.0.4; charset=utf-8"
+    MAX_HEADER_BYTES = 8 * 1024
+    REASONS = {200: b"OK", 400: b"Bad Request", 404: b"Not Found", 405: b"Method Not Allowed",
+               431: b"Request Header Fields Too Large"}
+
+    def __init__(self, registry=None, port=0):
+        super().__init__()
+        self.registry = registry or METRICS
+        self._bufs = {}  # socket → 已收到的请求头；None 表示已响应
+        self.server = QtNetwork.QTcpServer(self)
+        if not self.server.listen(QtNetwork.QHostAddress(QtNetwork.QHostAddress.SpecialAddress.LocalHost),
+                                  port):
+            print("指标端口监听失败:", self.server.errorString())
+        self.port = self.server.serverPort()
+        self.server.newConnection.connect(self.handle_connection)
+
+    def handle_connection(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            self._bufs[socket] = b""
+            socket.readyRead.connect(self._on_ready_read)
+            socket.disconnected.connect(self._on_disconnected)
+            if socket.bytesAvailable():
+                self.read_data(socket)
+
+    @QtCore.Slot()
+    def _on_ready_read(self):
+        self.read_data(self.sender())
+
+    @QtCore.Slot()
+    def _on_disconnected(self):
+        socket = self.sender()
+        if socket in self._bufs:
+            del self._bufs[socket]
+            socket.deleteLater()
+
+    def read_data(self, socket):
+        buf = self._bufs.get(socket)
+        if buf is None:
+            return
+        buf += socket.readAll().data()
+        end = buf.find(b"\r\n\r\n")
+        if end < 0:
+            if len(buf) > self.MAX_HEADER_BYTES:
+                self._write(socket, 431, b"headers too large\n")
+            else:
+                self._bufs[socket] = buf
+            return
+        parts = buf[:buf.find(b"\r\n")].split(b" ")
+        if len(parts) != 3:
+            self._write(socket, 400, b"bad request line\n")
+        elif parts[1].split(b"?", 1)[0] != b"/metrics":
+            self._write(socket, 404, b"not found\n")
+        elif parts[0] != b"GET":
+            self._write(socket, 405, b"use GET\n")
+        else:
+            self._write(socket, 200, self.registry.prometheus(), self.CONTENT_TYPE)
+
+    def _write(self, socket, code, body, content_type=b"text/plain; charset=utf-8"):
+        self._bufs[socket] = None
+        socket.write(b"HTTP/1.1 %d %s\r\nContent-Type: %s\r\nContent-Length: %d\r\n"
+                     b"Connection: close\r\n\r\n" % (code, self.REASONS[code], content_type, len(body)))
+        socket.write(body)
+        socket.disconnectFromHost()
+
+    def shutdown(self):
+        """在所属线程中关闭监听与全部连接"""
+        self.server.close()
+        for socket in self._bufs:
+            try:
+                socket.abort()
+                socket.deleteLater()
+            except RuntimeError:
+                pass
+        self._bufs.clear()
+
+
+class LocalServer(QtCore.QObject):
+    """按行分帧的 JSON IPC 服务端
+    - 每个连接独立缓冲，连接由客户端断开（支持同一连接多次请求/回复）
+    - handler(payload) 返回 dict 时作为一行 JSON 回复给该连接；payload 带 req 时回复中原样带回，
+      同一连接可连续发送多条请求（流水线），回复按请求顺序写回
+    - 无效帧回复 {"status": "invalid", "error": ...}
+    - pass_origin=True 时以 handler(payload, conn_id) 调用；send_event 向该连接推送事件（不阻塞）
+    - threaded=True 时读取/分帧/解码/校验在 worker 线程完成，GUI 线程只处理解析好的批次
+    - schema（PayloadSchema）限制字段类型、标题/正文长度与单帧字节数
+    - http_port 非 None 时额外监听回环 HTTP（见 HttpIngest），与本地 socket 共用分发流程；
+      http_origins 为允许的浏览器 Origin
+    - metrics_port 非 None 时在回环地址提供 Prometheus 抓取端点（见 MetricsExporter），与接入层同线程"""
+    message = QtCore.Signal(dict)
+    _reply = QtCore.Signal(int, bytes)       # → ingest.write_reply（跨线程排队）
+    _event = QtCore.Signal(int, bytes)       # → ingest.write_event（跨线程排队）
+    _shutdown = QtCore.Signal()              # → ingest.shutdown（阻塞直到完成）
+    _http_reply = QtCore.Signal(int, bytes)  # → http.write_response（跨线程排队）
+
+    def __init__(self, name="toast_server", handler=None, threaded=False, schema=None,
+                 pass_origin=False, http_port=None, metrics_port=None, http_origins=()):
+        super().__init__()
+        self.handler = handler
+        self.pass_origin = pass_origin
+        self.ingest = IpcIngest(name, schema)
+        self.server = self.ingest.server
+        self.http = HttpIngest(self.ingest.schema, http_port, http_origins) if http_port is not None else None
+        self.exporter = MetricsExporter(METRICS, metrics_port) if metrics_port is not None else None
+        ingests = [i for i in (self.ingest, self.http, self.exporter) if i is not None]
+        self._thread = None
+        if threaded:
+            self._thread = QtCore.QThread()
+            self._thread.setObjectName("toast-ipc")
+            for ingest in ingests:
+                ingest.moveToThread(self._thread)
+                self._shutdown.connect(ingest.shutdown,
+                                       QtCore.Qt.ConnectionType.BlockingQueuedConnection)
+            self._thread.start()
+        else:
+            for ingest in ingests:
+                self._shutdown.connect(ingest.shutdown)
+        self.ingest.batch_ready.connect(self._on_batch)
+        self._reply.connect(self.ingest.write_reply)
+        self._event.connect(self.ingest.write_event)
+        if self.http is not None:
+            self.http.request_ready.connect(self._on_http_request)
+            self._http_reply.connect(self.http.write_response)
+
+    def read_data(self, socket):
+        """读取一个 socket 的可用数据（非线程模式下由 readyRead 直接驱动）"""
+        self.ingest.read_data(socket)
+
+    def dispatch(self, payload, origin=None):
+        """GUI 线程：分发一条已校验的 payload，返回回复 dict（带回 req）或 None"""
+        self.message.emit(payload)
+        if self.handler is None:
+            reply = None
+        elif self.pass_origin:
+            reply = self.handler(payload, origin)
+        else:
+            reply = self.handler(payload)
+        if reply is not None and "req" in payload:
+            reply = {"req": payload["req"], **reply}
+        return reply
+
+    def _on_batch(self, batch, read_at):
+        """GUI 线程：逐条分发已解析的 payload；同一批次内同一连接的回复合并为一次写出。
+        校验失败的帧只在带 req 时回复 invalid。
+        ipc_latency_seconds 记录每帧从 worker 读到到分发完成的耗时（含跨线程排队）"""
+        replies = {}  # conn_id → [回复行]
+        latency = METRICS.histogram("ipc_latency_seconds")
+        METRICS.counter("ipc_frames_total").inc(len(batch))
+        for conn_id, payload, error in batch:
+            if error is not None:
+                # 无 req 的客户端不读回复：只计数，不写回
+                METRICS.counter("ipc_invalid_total").inc()
+                if payload is None or "req" not in payload:
+                    continue
+                reply = {"req": payload["req"], "status": "invalid", "error": error}
+            else:
+                reply = self.dispatch(payload, conn_id)
+                latency.observe(time.perf_counter() - read_at)
+            if reply is None:
+                continue
+            replies.setdefault(conn_id, []).append(json.dumps(reply, ensure_ascii=False) + "\n")
+        for conn_id, lines in replies.items():
+            self._reply.emit(conn_id, "".join(lines).encode("utf-8"))
+
+    def _on_http_request(self, conn_id, items, is_batch, read_at):
+        """GUI 线程：HTTP 请求总是返回投递状态（未带 req 时按批内下标补齐）；
+        HTTP 来源无法接收事件推送，origin 为 None"""
+        results = []
+        METRICS.counter("http_requests_total").inc()
+        METRICS.counter("http_frames_total").inc(len(items))
+        for i, (payload, error) in enumerate(items):
+            if error is not None:
+                METRICS.counter("http_invalid_total").inc()
+                results.append({"status": "invalid", "error": error})
+                continue
+            if "req" not in payload:
+                payload = {**payload, "req": i}
+            results.append(self.dispatch(payload, None) or {"req": payload["req"], "status": "ok"})
+        METRICS.histogram("http_latency_seconds").observe(time.perf_counter() - read_at)
+        body = results if is_batch else results[0]
+        self._http_reply.emit(conn_id, json.dumps(body, ensure_ascii=False).encode("utf-8"))
+
+    def send_event(self, conn_id, event):
+        """向来源连接推送一行事件；conn_id 为 None（非 IPC 来源）时忽略"""
+        if conn_id is None:
+            return
+        self._event.emit(conn_id, (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8"))
+
+    def close(self):
+        """停止监听并结束 worker 线程"""
+        if self._thread is not None:
+            if self._thread.isRunning():
+                self._shutdown.emit()
+                self._thread.quit()
+                self._thread.wait()
+            self._thread = None
+        else:
+            self._shutdown.emit()
+
 
 # ========== 客户端发送函数 ==========
 def send_message(payload, name="toast_server"):
@@ -1622,12 +4323,229 @@ def send_message(payload, name="toast_server"):
     if socket.waitForConnected(500):
         socket.write((json.dumps(payload) + "\n").encode("utf-8"))
         socket.flush()
-        socket.waitForBytesWritten(500)
+        # 大消息可能需要多次写出：直到缓冲清空或超时
+        while socket.bytesToWrite() > 0 and socket.waitForBytesWritten(500):
+            pass
         socket.disconnectFromServer()
         return True
     return False
 
 
+def send_request(payload, name="toast_server", timeout=1000):
+    """发送一条消息并等待一行 JSON 回复；无 server 或超时返回 None"""
+    socket = QtNetwork.QLocalSocket()
+    socket.connectToServer(name)
+    if not socket.waitForConnected(500):
+        return None
+    socket.write((json.dumps(payload) + "\n").encode("utf-8"))
+    socket.flush()
+    buf = b""
+    deadline = time.monotonic() + timeout / 1000
+    while b"\n" not in buf:
+        left_ms = int((deadline - time.monotonic()) * 1000)
+        if left_ms <= 0 or not socket.waitForReadyRead(left_ms):
+            break
+        buf += socket.readAll().data()
+    socket.disconnectFromServer()
+    if b"\n" not in buf:
+        return None
+    return json.loads(buf.split(b"\n", 1)[0].decode("utf-8"))
+
+
+def send_requests(payloads, name="toast_server", timeout=5000):
+    """流水线请求：在同一连接上连续写出全部消息，不等待逐条回复，再按 req 收集回复。
+    未带 req 的消息自动编号；返回与 payloads 一一对应的回复列表（超时未回复为 None）。
+    无 server 时返回 None"""
+    socket = QtNetwork.QLocalSocket()
+    socket.connectToServer(name)
+    if not socket.waitForConnected(500):
+        return None
+    index = {}  # req → payloads 下标
+    lines = []
+    for i, p in enumerate(payloads):
+        if "req" not in p:
+            p = {**p, "req": i}
+        index[p["req"]] = i
+        lines.append(json.dumps(p) + "\n")
+    socket.write("".join(lines).encode("utf-8"))
+    socket.flush()
+
+    replies = [None] * len(payloads)
+    pending = len(index)
+    buf = b""
+    deadline = time.monotonic() + timeout / 1000
+    while pending:
+        left_ms = int((deadline - time.monotonic()) * 1000)
+        if left_ms <= 0:
+            break
+        # 写缓冲未清空时边写边读，避免双方缓冲同时写满
+        if socket.bytesToWrite() > 0:
+            socket.waitForBytesWritten(min(left_ms, 10))
+        if not socket.waitForReadyRead(min(left_ms, 10)) and not socket.bytesAvailable():
+            if socket.state() != QtNetwork.QLocalSocket.LocalSocketState.ConnectedState:
+                break
+            continue
+        *done, buf = (buf + socket.readAll().data()).split(b"\n")
+        for raw in done:
+            reply = json.loads(raw.decode("utf-8"))
+            req = reply.get("req") if isinstance(reply, dict) else None
+            i = index.pop(req, None) if isinstance(req, (str, int)) else None
+            if i is not None:
+                replies[i] = reply
+                pending -= 1
+    socket.disconnectFromServer()
+    return replies
+
+
+def watch_events(payload, name="toast_server", timeout=None):
+    """发送一条消息并保持连接，逐行产出回复与该 toast 的用户事件，直到收到 closed 事件。
+    返回生成器；无 server 时返回 None。timeout（毫秒）为两条事件之间的最长等待"""
+    socket = QtNetwork.QLocalSocket()
+    socket.connectToServer(name)
+    if not socket.waitForConnected(500):
+        return None
+    socket.write((json.dumps({"req": 0, **payload}) + "\n").encode("utf-8"))
+    socket.flush()
+
+    def events():
+        buf = b""
+        try:
+            while True:
+                if not socket.waitForReadyRead(-1 if timeout is None else timeout):
+                    return
+                *lines, buf = (buf + socket.readAll().data()).split(b"\n")
+                for raw in lines:
+                    event = json.loads(raw.decode("utf-8"))
+                    yield event
+                    if event.get("event") == "closed":
+                        return
+        finally:
+            socket.disconnectFromServer()
+    return events()
+
+
+# ========== 标准输入流模式 ==========
+STDIN_QUEUE_LINES = 1024   # 读取线程与发送端之间的有界队列；写满时读取阻塞，背压传回管道
+STDIN_BATCH_LINES = 256    # 单次写出/分发的最大行数（输入快于消费时合并）
+STDIN_HIGH_WATER = 256 * 1024  # socket 待发送字节高水位，超过后等待服务端读走
+
+
+def parse_stream_line(line, defaults):
+    """解析一行输入：JSON 对象，或 "title<TAB>message"，或纯文本（作为正文）。
+    缺省字段取自 defaults；空行或无效 JSON 返回 None"""
+    line = line.strip("\r\n")
+    if not line.strip():
+        return None
+    if line.lstrip().startswith("{"):
+        try:
+            parsed = json.loads(line)
+        except ValueError as e:
+            print(f"解析输入行失败: {e}", file=sys.stderr)
+            return None
+        if not isinstance(parsed, dict):
+            return None
+        return {**defaults, **parsed}
+    title, sep, message = line.partition("\t")
+    if not sep:
+        title, message = defaults.get("title"), line
+    return {**defaults, "title": title, "message": message}
+
+
+def start_line_reader(stream, max_bytes):
+    """后台线程按行读取二进制流，放入有界队列（EOF 时放入 None）。
+    单行超过 max_bytes 时读到换行为止并丢弃，内存占用与输入总量无关"""
+    lines = queue.Queue(maxsize=STDIN_QUEUE_LINES)
+
+    def run():
+        try:
+            while True:
+                raw = stream.readline(max_bytes + 1)
+                if not raw:
+                    break
+                if len(raw) > max_bytes and not raw.endswith(b"\n"):
+                    while raw and not raw.endswith(b"\n"):
+                        raw = stream.readline(max_bytes + 1)
+                    print(f"输入行超过 {max_bytes} 字节，已丢弃", file=sys.stderr)
+                    continue
+                lines.put(raw.decode("utf-8", errors="replace"))
+        finally:
+            lines.put(None)
+
+    threading.Thread(target=run, name="toast-stdin", daemon=True).start()
+    return lines
+
+
+def take_batch(lines, block=True):
+    """从队列取出一批行（最多 STDIN_BATCH_LINES）；第二项为是否已读到 EOF"""
+    batch = []
+    try:
+        item = lines.get(block=block)
+        while item is not None:
+            batch.append(item)
+            if len(batch) >= STDIN_BATCH_LINES:
+                return batch, False
+            item = lines.get_nowait()
+        return batch, True
+    except queue.Empty:
+        return batch, False
+
+
+def stream_to_server(lines, defaults, name="toast_server"):
+    """把行队列经单个常驻连接流式发送给 server，直到 EOF。
+    输入快于服务端读取时合并为批量写出；待发送数据超过高水位时阻塞等待（不在内存中堆积）。
+    本连接从不读取，每条 payload 都带 "events": false，server 不向它推送用户事件。
+    无 server 时返回 False（不消费队列）"""
+    socket = QtNetwork.QLocalSocket()
+    socket.connectToServer(name)
+    if not socket.waitForConnected(500):
+        return False
+    connected = QtNetwork.QLocalSocket.LocalSocketState.ConnectedState
+    eof = False
+    while not eof:
+        batch, eof = take_batch(lines)
+        payloads = (parse_stream_line(line, defaults) for line in batch)
+        data = "".join(json.dumps({**p, "events": False}) + "\n" for p in payloads if p is not None)
+        if not data:
+            continue
+        socket.write(data.encode("utf-8"))
+        while socket.bytesToWrite() > STDIN_HIGH_WATER and socket.state() == connected:
+            socket.waitForBytesWritten(1000)
+        socket.flush()
+        if socket.state() != connected:
+            print("toast server 已断开", file=sys.stderr)
+            return True
+    while socket.bytesToWrite() > 0 and socket.waitForBytesWritten(1000):
+        pass
+    socket.disconnectFromServer()
+    return True
+
+
+class StdinFeeder(QtCore.QObject):
+    """本进程即 server 时：每帧从行队列取一批交给 handler（GUI 线程），EOF 后发射 finished"""
+    finished = QtCore.Signal()
+
+    def __init__(self, lines, defaults, handler):
+        super().__init__()
+        self.lines = lines
+        self.defaults = defaults
+        self.handler = handler
+        self.active = True
+        self._timer = QtCore.QTimer(self)
+        self._timer.timeout.connect(self._drain)
+        self._timer.start(FRAME_INTERVAL_MS)
+
+    def _drain(self):
+        batch, eof = take_batch(self.lines, block=False)
+        for line in batch:
+            payload = parse_stream_line(line, self.defaults)
+            if payload is not None:
+                self.handler(payload)
+        if eof:
+            self._timer.stop()
+            self.active = False
+            self.finished.emit()
+
+
 # ========== 主入口 ==========
 def main():
     parser = argparse.ArgumentParser(
@@ -1645,12 +4563,90 @@ def main():
                         help="Keep the program running after all toasts are closed")
     parser.add_argument("--show-countdown", action="store_true",
                         help="Show a countdown timer inside each toast")
-    parser.add_argument("--theme", choices=["light", "dark"], default="dark",
+    parser.add_argument("--theme", choices=THEMES, default="dark",
                         help="Select theme (default: dark)")
     parser.add_argument("--no-expired-history", action="store_true",
                         help="Disable expired history list (no button, no recording)")
+    parser.add_argument("--id", dest="toast_id", default=None,
+                        help="Notification ID; a live toast with the same ID is updated in place")
+    parser.add_argument("--cancel", action="store_true",
+                        help="Close the live toast with the given --id")
+    parser.add_argument("--progress", type=float, default=None,
+                        help="Show a progress bar (0-100); 100 marks the toast as completed")
+    parser.add_argument("--at", default=None,
+                        help="Show the toast at a time (HH:MM, ISO datetime or epoch seconds)")
+    parser.add_argument("--every", default=None,
+                        help="Repeat the toast at an interval (e.g. 90s, 30m, 2h)")
+    parser.add_argument("--list-schedules", action="store_true",
+                        help="Print pending scheduled toasts of the running server")
+    parser.add_argument("--cancel-schedule", default=None, metavar="SCHEDULE_ID",
+                        help="Cancel a pending scheduled toast")
+    parser.add_argument("--schedule-file", default=None,
+                        help="Persist pending scheduled toasts to this JSON file")
+    parser.add_argument("--priority", choices=PRIORITIES, default=None,
+                        help="Toast priority (default: normal); critical skips stagger and rate limits")
+    parser.add_argument("--screen", default=None, metavar="NAME_OR_INDEX",
+                        help="Show the toast on this screen (name or index; default: primary screen)")
+    parser.add_argument("--channel", default=None,
+                        help="Send the toast to this channel (separate stack, limits and history)")
+    parser.add_argument("--channel-config", dest="channel_config", action="append", default=None,
+                        type=parse_channel_spec, metavar="NAME:KEY=VALUE,...",
+                        help="Server: policy for a channel; keys theme, max_visible, rate_limit, "
+                             "history (repeatable; unset keys use the server defaults)")
+    parser.add_argument("--max-visible", type=int, default=None,
+                        help="Server: maximum number of visible toasts; lowest priority is evicted first")
+    parser.add_argument("--rate-limit", type=float, default=None,
+                        help="Server: maximum new toasts per second (critical toasts are exempt)")
+    parser.add_argument("--action", dest="actions", action="append", default=None,
+                        metavar="ID[=LABEL]", help="Add an action button (repeatable, at most 3)")
+    parser.add_argument("--wait", action="store_true",
+                        help="Print user events (dismissed/swiped/clicked/expired/closed) as JSON lines "
+                             "until the toast closes")
+    parser.add_argument("--http-port", type=int, default=None,
+                        help="Server: also accept JSON notifications over HTTP on 127.0.0.1:PORT "
+                             "(POST /notify with Content-Type: application/json)")
+    parser.add_argument("--http-allow-origin", action="append", default=None, metavar="ORIGIN",
+                        help="Server: accept HTTP requests from this browser Origin "
+                             "(repeatable; requests with any other Origin header are rejected)")
+    parser.add_argument("--stdin", action="store_true",
+                        help="Read notifications from standard input, one per line "
+                             "(JSON object or TITLE<TAB>MESSAGE), over one persistent connection")
+    parser.add_argument("--headless", action="store_true",
+                        help="Server: run without any windows (IPC, history and scheduling only)")
+    parser.add_argument("--max-title-chars", type=int, default=256,
+                        help="Server: truncate longer titles (default: 256)")
+    parser.add_argument("--max-message-chars", type=int, default=65536,
+                        help="Server: truncate longer messages (default: 65536)")
+    parser.add_argument("--max-frame-bytes", type=int, default=1024 * 1024,
+                        help="Server: drop IPC messages larger than this many bytes (default: 1 MiB)")
+    parser.add_argument("--stats", action="store_true",
+                        help="Print counters and latency histograms of the running server")
+    parser.add_argument("--metrics-file", default=None, metavar="PATH",
+                        help="Server: write metrics as JSON to PATH on exit ('-' for stderr)")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="Server: serve metrics in Prometheus text format on "
+                             "http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--watchdog", type=int, default=None, metavar="STALL_MS",
+                        help="Server: measure event-loop lag and animation frame times; "
+                             "log the call sites of stalls longer than STALL_MS")
+    parser.add_argument("--profile-start", default=None, metavar="NAME",
+                        help="Start profiling the running server; writes the new file NAME in the "
+                             "server's profile directory (~/.toast_profiles, or $TOAST_PROFILE_DIR) "
+                             "on --profile-stop (.pstats via cProfile, .folded for sampled collapsed stacks)")
+    parser.add_argument("--profile-stop", action="store_true",
+                        help="Stop profiling the running server and write the profile")
+    parser.add_argument("--set-theme", choices=THEMES, default=None,
+                        help="Switch the theme of the running server; live toasts are restyled "
+                             "in place (only the --channel channel if given)")
+    parser.add_argument("--no-timing", action="store_true",
+                        help="Server: remove the hot-path timing spans (zero overhead)")
+    parser.add_argument("--motion", choices=("auto",) + MotionGovernor.LEVELS, default="auto",
+                        help="Server: animation level; 'auto' degrades to fade-only, then none, "
+                             "under load (default: auto). 'fade' or 'off' suit low-powered VDI sessions")
 
     args = parser.parse_args()
+    if args.cancel and args.toast_id is None:
+        parser.error("--cancel requires --id")
 
     payload = {
         "title": args.title,
@@ -1659,36 +4655,151 @@ def main():
         "show_countdown": args.show_countdown,
         "theme": args.theme,
     }
+    if args.toast_id is not None:
+        payload["id"] = args.toast_id
+    if args.progress is not None:
+        payload["progress"] = args.progress
+    if args.priority is not None:
+        payload["priority"] = args.priority
+    if args.screen is not None:
+        payload["screen"] = args.screen
+    if args.channel is not None:
+        payload["channel"] = args.channel
+    if args.at is not None:
+        payload["at"] = args.at
+    if args.every is not None:
+        payload["every"] = args.every
+    if args.actions:
+        payload["actions"] = [dict(zip(("id", "label"), a.split("=", 1))) for a in args.actions]
+    if args.cancel:
+        payload = {"cmd": "cancel", "id": args.toast_id}
+    schema = PayloadSchema(max_title_chars=args.max_title_chars,
+                           max_message_chars=args.max_message_chars,
+                           max_frame_bytes=args.max_frame_bytes)
+    try:
+        payload = schema.validate(payload)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.headless:
+        # 无界面：不需要显示设备与 GUI 插件
+        app = QtCore.QCoreApplication(sys.argv)
+    else:
+        app = QtWidgets.QApplication(sys.argv)
+
+        QtWidgets.QToolTip.setFont(QtGui.QFont("Microsoft YaHei", 9))
+        app.setStyleSheet("""
+            QToolTip {
+                color: white;
+                background-color: rgba(50, 50, 50, 220);
+                border: 1px solid white;
+                font: 10pt "Microsoft YaHei";
+            }
+        """)
 
-    app = QtWidgets.QApplication(sys.argv)
-
-    QtWidgets.QToolTip.setFont(QtGui.QFont("Microsoft YaHei", 9))
-    app.setStyleSheet("""
-        QToolTip {
-            color: white;
-            background-color: rgba(50, 50, 50, 220);
-            border: 1px solid white;
-            font: 10pt "Microsoft YaHei";
-        }
-    """)
-
-    if send_message(payload):
+    if args.list_schedules or args.cancel_schedule is not None or args.stats \
+            or args.profile_start or args.profile_stop or args.set_theme:
+        # 查询类命令：只与常驻进程交互，不启动新的 server
+        if args.stats:
+            request = {"cmd": "stats"}
+        elif args.profile_start:
+            # 只传文件名：server 写入自己的剖析目录
+            request = {"cmd": "profile_start", "path": args.profile_start}
+        elif args.profile_stop:
+            request = {"cmd": "profile_stop"}
+        elif args.set_theme:
+            request = {"cmd": "theme", "theme": args.set_theme}
+            if args.channel is not None:
+                request["channel"] = args.channel
+        elif args.list_schedules:
+            request = {"cmd": "schedule_list"}
+        else:
+            request = {"cmd": "schedule_cancel", "schedule_id": args.cancel_schedule}
+        reply = send_request(request)
+        if reply is None:
+            print("toast server is not running", file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(reply, ensure_ascii=False, indent=2))
         return
 
-    mgr = ToastManager(theme=args.theme, no_expired_history=args.no_expired_history)
-    srv = LocalServer()
-    srv.message.connect(lambda p: mgr.show_toast(
-        p.get("title", "Notification"),
-        p.get("message", ""),
-        p.get("duration", 3000),
-        p.get("show_countdown", False)
-    ))
+    lines = stream_defaults = None
+    if args.stdin:
+        # 每行一条通知；命令行参数作为缺省字段（title 仅用于纯文本行）
+        stream_defaults = {k: v for k, v in payload.items() if k != "message"}
+        lines = start_line_reader(sys.stdin.buffer, schema.max_frame_bytes)
+        if stream_to_server(lines, stream_defaults):
+            return
+    elif args.wait:
+        events = watch_events(payload)
+        if events is not None:
+            for event in events:
+                print(json.dumps(event, ensure_ascii=False), flush=True)
+            return
+    elif send_message(payload):
+        return
+    if args.cancel:
+        return  # 无常驻进程，没有可取消的 toast
+
+    mgr = ToastManager(theme=args.theme, no_expired_history=args.no_expired_history,
+                       schedule_file=args.schedule_file, max_visible=args.max_visible,
+                       rate_limit=args.rate_limit, headless=args.headless, motion=args.motion,
+                       channels=dict(args.channel_config or ()))
+    srv = LocalServer(handler=mgr.handle_payload, threaded=True, schema=schema, pass_origin=True,
+                      http_port=args.http_port, metrics_port=args.metrics_port,
+                      http_origins=args.http_allow_origin or ())
+    mgr.toast_event.connect(srv.send_event)
+    if args.wait:
+        # 本进程即 server：直接打印本地发起的 toast 的事件
+        mgr.toast_event.connect(lambda origin, event: origin is None and
+                                print(json.dumps(event, ensure_ascii=False), flush=True))
+    app.aboutToQuit.connect(mgr.scheduler.flush)
+    app.aboutToQuit.connect(srv.close)
+    if args.watchdog is not None:
+        watchdog = LoopWatchdog(stall_ms=args.watchdog)
+        if mgr.container is not None:
+            mgr.container.frame_monitor = watchdog
+        watchdog.start()
+        app.aboutToQuit.connect(watchdog.stop)
+    if args.no_timing:
+        METRICS.enabled = False
+    if os.environ.get("TOAST_PROFILE"):
+        # 从启动开始剖析，退出时写出（也可随时用 --profile-stop 提前写出）
+        try:
+            PROFILER.start(os.environ["TOAST_PROFILE"])
+        except ValueError as e:
+            print("无法启动剖析:", e, file=sys.stderr)
+        def stop_profile():
+            try:
+                PROFILER.stop()
+            except OSError as e:
+                print("写出剖析结果失败:", e, file=sys.stderr)
+        app.aboutToQuit.connect(stop_profile)
+    if args.metrics_file:
+        def dump_metrics():
+            mgr.stats()  # 刷新瞬时值
+            METRICS.dump(args.metrics_file)
+        app.aboutToQuit.connect(dump_metrics)
+
+    feeder = None
+    if lines is not None:
+        def feed(p):
+            try:
+                mgr.handle_payload(schema.validate(p))
+            except ValueError as e:
+                print(f"消息校验失败，已忽略: {e}", file=sys.stderr)
+        feeder = StdinFeeder(lines, stream_defaults, feed)
 
     if not args.keep_alive:
-        mgr.all_closed.connect(app.quit)
-
-    mgr.show_toast(payload["title"], payload["message"],
-                   payload["duration"], payload["show_countdown"])
+        # 仍有待触发的定时通知或标准输入未结束时保持运行
+        def maybe_quit():
+            if not mgr.toasts and not mgr.scheduler.count() and not (feeder and feeder.active):
+                app.quit()
+        mgr.all_closed.connect(maybe_quit)
+        if feeder is not None:
+            feeder.finished.connect(maybe_quit)
+
+    if feeder is None:
+        mgr.handle_payload(payload)
 
     sys.exit(app.exec())
 